@@ -9,7 +9,9 @@ from flask import Flask
 from flask_principal import Principal
 from flask_cors import CORS
 
-from init_dep import db, ma, logger
+from init_dep import db, ma, logger, token_cache, hasher, \
+    login_failures, listing_counter
+from lib.auth import AuthGlobals
 from lib.wsgi import ReverseProxied
 from lib import errors
 from modules import health_check, locations, app_keys, roles, administrators, \
@@ -34,6 +36,11 @@ def create_app(config):
 
     # init authorization
     Principal(app)
+    app.app_ctx_globals_class = AuthGlobals
+    token_cache.init_app(app)
+    hasher.init_app(app)
+    login_failures.init_app(app)
+    listing_counter.init_app(app)
 
     # init CORS
     if 'CORS_ORIGIN' in app.config:
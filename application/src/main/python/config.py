@@ -24,6 +24,85 @@ class Config:
     AUTH_SECRET_KEY = os.environ.get('AUTH_SECRET_KEY')
     AUTH_TOKEN_EXPIRATION = int(os.getenv('AUTH_TOKEN_EXPIRATION', '1800'))
     AUTH_HASH_ROUNDS = int(os.getenv('AUTH_HASH_ROUNDS', '15'))
+    AUTH_HASH_TARGET_MS = int(os.getenv('AUTH_HASH_TARGET_MS', '0'))
+    AUTH_HASH_MIN_ROUNDS = int(os.getenv('AUTH_HASH_MIN_ROUNDS', '10'))
+    AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+    AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', '60'))
+    AUTH_HASH_POOL_ENABLED = bool(int(os.getenv(
+        'AUTH_HASH_POOL_ENABLED', '0')))
+    AUTH_HASH_POOL_WORKERS = int(os.getenv('AUTH_HASH_POOL_WORKERS', '0'))
+    AUTH_HASH_POOL_QUEUE_SIZE = int(os.getenv(
+        'AUTH_HASH_POOL_QUEUE_SIZE', '0'))
+    AUTH_HASH_POOL_RETRY_AFTER = int(os.getenv(
+        'AUTH_HASH_POOL_RETRY_AFTER', '1'))
+    AUTH_HASH_POOL_TIMEOUT = int(os.getenv('AUTH_HASH_POOL_TIMEOUT', '30'))
+    AUTH_HASH_POOL_START_METHOD = os.getenv(
+        'AUTH_HASH_POOL_START_METHOD', 'forkserver')
+    AUTH_HASH_REUSE_TIMEOUT = int(os.getenv('AUTH_HASH_REUSE_TIMEOUT', '5'))
+    AUTH_LOCKOUT_BACKEND = os.getenv('AUTH_LOCKOUT_BACKEND', 'shared')
+    AUTH_LOCKOUT_SHARED_PATH = os.getenv('AUTH_LOCKOUT_SHARED_PATH')
+    AUTH_LOCKOUT_SLOTS = int(os.getenv('AUTH_LOCKOUT_SLOTS', '10000'))
+    AUTH_LOCKOUT_HISTORY = int(os.getenv('AUTH_LOCKOUT_HISTORY', '16'))
+
+    # app key cache properties
+    APP_KEY_CACHE_SIZE = int(os.getenv('APP_KEY_CACHE_SIZE', '1000'))
+    APP_KEY_CACHE_TTL = int(os.getenv('APP_KEY_CACHE_TTL', '300'))
+    APP_KEY_CACHE_STAMP_PATH = os.getenv('APP_KEY_CACHE_STAMP_PATH')
+    APP_KEY_NEGATIVE_CACHE_SIZE = int(os.getenv(
+        'APP_KEY_NEGATIVE_CACHE_SIZE', '10000'))
+    APP_KEY_NEGATIVE_CACHE_TTL = int(os.getenv(
+        'APP_KEY_NEGATIVE_CACHE_TTL', '60'))
+    APP_KEY_BLOOM_ENABLED = bool(int(os.getenv('APP_KEY_BLOOM_ENABLED', '0')))
+    APP_KEY_BLOOM_TTL = int(os.getenv('APP_KEY_BLOOM_TTL', '10'))
+
+    # role registry properties; the stamp file only reaches the processes of
+    # one host, so changes made by the admin deployment, by scripts or on
+    # other hosts are picked up after the TTL (seconds)
+    ROLES_REGISTRY_STAMP_PATH = os.getenv('ROLES_REGISTRY_STAMP_PATH')
+    ROLES_REGISTRY_TTL = int(os.getenv('ROLES_REGISTRY_TTL', '10'))
+
+    # login audit properties
+    LOGINS_WRITER_ENABLED = bool(int(os.getenv('LOGINS_WRITER_ENABLED', '0')))
+    LOGINS_WRITER_BATCH_SIZE = int(os.getenv(
+        'LOGINS_WRITER_BATCH_SIZE', '500'))
+    LOGINS_WRITER_INTERVAL = float(os.getenv('LOGINS_WRITER_INTERVAL', '1'))
+    LOGINS_WRITER_SPOOL_DIR = os.getenv('LOGINS_WRITER_SPOOL_DIR')
+    LOGINS_WRITER_FSYNC = bool(int(os.getenv('LOGINS_WRITER_FSYNC', '0')))
+    LOGINS_WRITER_RETRIES = int(os.getenv('LOGINS_WRITER_RETRIES', '10'))
+    LOGINS_PARTITIONS_AHEAD = int(os.getenv('LOGINS_PARTITIONS_AHEAD', '3'))
+    LOGINS_RETENTION_MONTHS = int(os.getenv('LOGINS_RETENTION_MONTHS', '0'))
+    LOGINS_ARCHIVE_DIR = os.getenv('LOGINS_ARCHIVE_DIR')
+
+    # listing properties
+    LISTING_COUNT_STRATEGY = os.getenv('LISTING_COUNT_STRATEGY', 'exact')
+    LISTING_COUNT_CACHE_SIZE = int(os.getenv(
+        'LISTING_COUNT_CACHE_SIZE', '1000'))
+    LISTING_COUNT_CACHE_TTL = int(os.getenv('LISTING_COUNT_CACHE_TTL', '30'))
+    LOADING_PROFILE_ASSERT = bool(int(os.getenv(
+        'LOADING_PROFILE_ASSERT', '0')))
+    EXPORT_YIELD_PER = int(os.getenv('EXPORT_YIELD_PER', '1000'))
+    CONDITIONAL_GET_ENABLED = bool(int(os.getenv(
+        'CONDITIONAL_GET_ENABLED', '0')))
+
+    # locations properties; the stamp file is host-local, as for the role
+    # registry, so admin changes reach other hosts after the TTL (seconds)
+    LOCATIONS_INDEX_ENABLED = bool(int(os.getenv(
+        'LOCATIONS_INDEX_ENABLED', '0')))
+    LOCATIONS_INDEX_TTL = int(os.getenv('LOCATIONS_INDEX_TTL', '30'))
+    LOCATIONS_INDEX_STAMP_PATH = os.getenv('LOCATIONS_INDEX_STAMP_PATH')
+
+    # rendered responses properties; the stamp files are host-local, as for
+    # the role registry, so admin changes reach other hosts after the TTL
+    RENDERED_RESPONSES_ENABLED = bool(int(os.getenv(
+        'RENDERED_RESPONSES_ENABLED', '0')))
+    RENDERED_RESPONSES_SIZE = int(os.getenv('RENDERED_RESPONSES_SIZE', '1000'))
+    RENDERED_RESPONSES_TTL = int(os.getenv('RENDERED_RESPONSES_TTL', '30'))
+    RENDERED_RESPONSES_MAX_AGE = int(os.getenv(
+        'RENDERED_RESPONSES_MAX_AGE', '0'))
+    RENDERED_RESPONSES_STAMP_DIR = os.getenv('RENDERED_RESPONSES_STAMP_DIR')
+
+    # bulk write properties
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '1000'))
 
     # encryption properties
     CRYPT_SYM_SECRET_KEY = os.environ.get('CRYPT_SYM_SECRET_KEY')
@@ -8,9 +8,17 @@ which is part of this source code package.
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 
+from lib.auth.hashing import PasswordHasher
+from lib.auth.login_failures import LoginFailures
+from lib.auth.token_cache import TokenCache
 from lib.logger import JSONLogger
+from lib.routes.counter import ListingCounter
 
 
 db = SQLAlchemy()
 ma = Marshmallow()
 logger = JSONLogger()
+token_cache = TokenCache()
+hasher = PasswordHasher()
+login_failures = LoginFailures()
+listing_counter = ListingCounter()
@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from functools import wraps
 
 from flask import g, abort
+from flask.ctx import _AppCtxGlobals
 from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth
 from flask_principal import Permission, RoleNeed
 
@@ -20,6 +21,143 @@ permission_user = Permission(RoleNeed('USER'))
 permission_super_admin = Permission(RoleNeed('SUPER_ADMIN'))
 
 
+class AuthSnapshot:
+    """Small, immutable view of an authenticated account containing only what
+    is needed to authorize a request"""
+
+    __slots__ = ('id', 'type', 'username', 'roles', 'password_expires_at',
+                 'version')
+
+    def __init__(self, user_id, user_type, username, roles,
+                 password_expires_at, version=None):
+        """Initialize snapshot.
+
+        :param user_id: The account's ID
+        :type user_id: int
+        :param user_type: The account type: `user` | `administrator`
+        :type user_type: str
+        :param username: The account's username
+        :type username: str
+        :param roles: Names of the account's roles, ordered by priority
+        :type roles: tuple
+        :param password_expires_at: When the account's password expires
+        :type password_expires_at: datetime | None
+        :param version: The account's version counter
+        :type version: int | None
+        """
+
+        self.id = user_id  # pylint: disable=invalid-name
+        self.type = user_type
+        self.username = username
+        self.roles = tuple(roles)
+        self.password_expires_at = password_expires_at
+        self.version = version
+
+    @staticmethod
+    def from_user(user, user_type):
+        """Creates a snapshot from a user or administrator record.
+
+        :param user: The account record
+        :type user: User | Administrator
+        :param user_type: The account type: `user` | `administrator`
+        :type user_type: str
+        :return: Snapshot of the account
+        :rtype: AuthSnapshot
+        """
+
+        password_expires_at = None
+        if user.roles and user.password_changed_at:
+            password_expires_at = (user.password_changed_at + timedelta(
+                days=user.roles[0].password_reset_days)).replace(tzinfo=None)
+
+        return AuthSnapshot(user.id, user_type, user.username,
+                            [role.name for role in user.roles],
+                            password_expires_at, user.version)
+
+    @staticmethod
+    def from_claims(claims):
+        """Creates a snapshot from the claims of a verified token.
+
+        :param claims: The token's payload, see `to_claims()`
+        :type claims: dict
+        :return: Snapshot of the account
+        :rtype: AuthSnapshot
+        """
+
+        password_expires_at = None
+        if claims.get('pwd_exp') is not None:
+            password_expires_at = datetime.fromtimestamp(claims['pwd_exp'])
+
+        return AuthSnapshot(claims['id'], claims['type'],
+                            claims.get('username'), claims.get('roles', []),
+                            password_expires_at, claims.get('ver'))
+
+    def to_claims(self, roles_generation=None):
+        """Creates the claims to sign into an authentication token.
+
+        :param roles_generation: Generation of the role policies the claims
+            derive from, see `RoleRegistry.generation()`
+        :type roles_generation: str | None
+        :return: Token payload
+        :rtype: dict
+        """
+
+        password_expires_at = None
+        if self.password_expires_at is not None:
+            password_expires_at = int(self.password_expires_at.timestamp())
+
+        return {'id': self.id, 'type': self.type, 'username': self.username,
+                'roles': list(self.roles), 'pwd_exp': password_expires_at,
+                'ver': self.version, 'rgen': roles_generation}
+
+    def is_password_expired(self):
+        """Checks if the account's password has expired.
+
+        :return: True if expired, False otherwise
+        :rtype: bool
+        """
+
+        return (self.password_expires_at is not None
+                and self.password_expires_at < datetime.now())
+
+
+class AuthGlobals(_AppCtxGlobals):
+    """Application globals object where `g.user` is resolved lazily.
+
+    Token authentication only sets `g.auth` (an `AuthSnapshot`) and
+    `g.user_loader`; the account record is loaded the first time a handler
+    reads `g.user`.
+    """
+
+    @property
+    def user(self):
+        """Gets the current account record, loading it if needed.
+
+        :return: The authenticated account record
+        :rtype: User | Administrator
+        """
+
+        if 'user' not in self.__dict__:
+            loader = self.__dict__.get('user_loader')
+            if loader is None:
+                raise AttributeError('user')
+            user = loader()
+            if user is None:
+                abort(401, "Bad credentials")
+            self.__dict__['user'] = user
+        return self.__dict__['user']
+
+    @user.setter
+    def user(self, user):
+        """Sets the current account record.
+
+        :param user: The authenticated account record
+        :type user: User | Administrator
+        """
+
+        self.__dict__['user'] = user
+
+
 def check_password_expiration(view_function):
     """A Decorator function to check if the current user's password has
     expired.
@@ -34,11 +172,7 @@ def check_password_expiration(view_function):
     def decorated_function(*args, **kwargs):
         """Internal decorator function"""
 
-        if hasattr(g, 'user'):
-            password_valid_window = g.user.password_changed_at + timedelta(
-                days=g.user.roles[0].password_reset_days)
-            pvw = password_valid_window.replace(tzinfo=None)
-            if pvw < datetime.now():
-                abort(403, "Password expired")
+        if 'auth' in g and g.auth.is_password_expired():
+            abort(403, "Password expired")
         return view_function(*args, **kwargs)
     return decorated_function
@@ -0,0 +1,399 @@
+"""
+Bcrypt execution service.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+from werkzeug.exceptions import ServiceUnavailable
+
+
+def _hashpw(password, rounds):
+    """Hashes a password, runs in a pool worker.
+
+    :param password: Plaintext password
+    :type password: bytes
+    :param rounds: Bcrypt cost factor
+    :type rounds: int
+    :return: Bcrypt hash
+    :rtype: bytes
+    """
+
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password, hashed):
+    """Checks a password against a hash, runs in a pool worker.
+
+    :param password: Plaintext password
+    :type password: bytes
+    :param hashed: Bcrypt hash
+    :type hashed: bytes
+    :return: True if the password matches, False otherwise
+    :rtype: bool
+    """
+
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification, optionally in a bounded pool of
+    worker processes.
+
+    When the pool is enabled at most `queue_size` operations may be pending
+    per process; further requests are rejected right away with a 503 and a
+    `Retry-After` header instead of queuing behind a login burst.
+    """
+
+    def __init__(self):
+        """Initialize a hasher running inline, see `init_app()`."""
+
+        self.rounds = 12
+        self.enabled = False
+        self.workers = 0
+        self.queue_size = 0
+        self.retry_after = 1
+        self.timeout = None
+        self.reuse_timeout = None
+        self.start_method = 'forkserver'
+        self._slots = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def init_app(self, app):
+        """Configure the hasher for a Flask application.
+
+        :param app: The Flask application instance
+        :type app: Flask
+        """
+
+        self.shutdown()
+        self.rounds = app.config.get('AUTH_HASH_ROUNDS', 12)
+        target = app.config.get('AUTH_HASH_TARGET_MS', 0)
+        if target:
+            configured, self.rounds = self.rounds, self.calibrate(
+                target, app.config.get('AUTH_HASH_MIN_ROUNDS', 10))
+            log = (app.logger.warning if self.rounds != configured
+                   else app.logger.info)
+            log("Calibrated bcrypt cost to %d for a %d ms target "
+                "(AUTH_HASH_ROUNDS=%d).", self.rounds, target, configured)
+
+        self.enabled = app.config.get('AUTH_HASH_POOL_ENABLED', False)
+        self.workers = (app.config.get('AUTH_HASH_POOL_WORKERS')
+                        or os.cpu_count() or 1)
+        self.queue_size = (app.config.get('AUTH_HASH_POOL_QUEUE_SIZE')
+                           or self.workers * 2)
+        self.retry_after = app.config.get('AUTH_HASH_POOL_RETRY_AFTER', 1)
+        self.timeout = app.config.get('AUTH_HASH_POOL_TIMEOUT', 30) or None
+        self.reuse_timeout = app.config.get('AUTH_HASH_REUSE_TIMEOUT', 5)
+        self.start_method = app.config.get(
+            'AUTH_HASH_POOL_START_METHOD', 'forkserver')
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+
+    @staticmethod
+    def calibrate(target_ms, min_rounds=4, max_rounds=31):
+        """Measures bcrypt on this host to find the highest cost whose hash
+        time stays within a latency target.
+
+        Each extra round doubles the hash time, so the cost is raised one
+        round at a time while the last measurement is at most half the target.
+
+        :param target_ms: Latency target for one hash in milliseconds
+        :type target_ms: int | float
+        :param min_rounds: Lowest cost to return
+        :type min_rounds: int
+        :param max_rounds: Highest cost to return
+        :type max_rounds: int
+        :return: Bcrypt cost factor
+        :rtype: int
+        """
+
+        def measure(rounds):
+            start = time.perf_counter()
+            _hashpw(b'calibration', rounds)
+            return (time.perf_counter() - start) * 1000
+
+        rounds = max(min_rounds, 4)
+        elapsed = measure(rounds)
+        while rounds < max_rounds and elapsed * 2 <= target_ms:
+            rounds += 1
+            elapsed = measure(rounds)
+        return rounds
+
+    @staticmethod
+    def get_rounds(hashed):
+        """Gets the cost factor a hash was created with.
+
+        :param hashed: Bcrypt hash
+        :type hashed: str
+        :return: Bcrypt cost factor, None if not a bcrypt hash
+        :rtype: int | None
+        """
+
+        try:
+            return int(hashed.split('$')[2])
+        except (AttributeError, IndexError, ValueError):
+            return None
+
+    def needs_rehash(self, hashed):
+        """Checks if a hash was created with a cost other than the current
+        policy.
+
+        :param hashed: Bcrypt hash
+        :type hashed: str
+        :return: True if the hash should be recreated, False otherwise
+        :rtype: bool
+        """
+
+        return self.get_rounds(hashed) != self.rounds
+
+    def hashpw(self, password, rounds=None):
+        """Hashes a password.
+
+        :param password: Plaintext password
+        :type password: str
+        :param rounds: Bcrypt cost factor, defaults to the current policy
+        :type rounds: int
+        :return: Bcrypt hash
+        :rtype: str
+        """
+
+        return str(self.run(_hashpw, password.encode('utf-8'),
+                            rounds or self.rounds), 'utf8')
+
+    def hashpw_many(self, passwords, rounds=None):
+        """Hashes several passwords, i.e.: for a batch of new accounts.
+
+        The passwords are hashed in parallel, in the process pool if enabled
+        or else in threads (bcrypt releases the GIL), at most `workers` at a
+        time.
+
+        :param passwords: Plaintext passwords
+        :type passwords: list
+        :param rounds: Bcrypt cost factor, defaults to the current policy
+        :type rounds: int
+        :return: Bcrypt hashes, in the order of the passwords
+        :rtype: list
+        :raises ServiceUnavailable: If the pool's queue is full or an
+            operation timed out
+        """
+
+        rounds = rounds or self.rounds
+        encoded = [password.encode('utf-8') for password in passwords]
+        hashes = [None] * len(encoded)
+        pending = list(range(len(encoded) - 1, -1, -1))
+        running = {}
+        try:
+            while pending or running:
+                while pending and len(running) < max(self.workers, 1):
+                    future = self.submit(_hashpw, encoded[pending[-1]],
+                                         rounds)
+                    if future is None:
+                        break
+                    running[future] = pending.pop()
+                if not running:
+                    raise self._busy()
+
+                done, _ = futures.wait(
+                    running, timeout=self.timeout,
+                    return_when=futures.FIRST_COMPLETED)
+                if not done:
+                    raise self._busy()
+                for future in done:
+                    hashes[running.pop(future)] = str(future.result(), 'utf8')
+            return hashes
+        except BrokenProcessPool:
+            self.shutdown()
+            return [hashed if hashed is not None else
+                    str(_hashpw(password, rounds), 'utf8')
+                    for password, hashed in zip(encoded, hashes)]
+        finally:
+            for future in running:
+                future.cancel()
+
+    def checkpw(self, password, hashed):
+        """Checks a password against a hash.
+
+        :param password: Plaintext password
+        :type password: str
+        :param hashed: Bcrypt hash
+        :type hashed: str
+        :return: True if the password matches, False otherwise
+        :rtype: bool
+        """
+
+        return self.run(_checkpw, password.encode('utf-8'),
+                        hashed.encode('utf-8'))
+
+    def checkpw_any(self, password, hashes, timeout=None):
+        """Checks a password against several hashes, i.e.: a password history.
+
+        The hashes are checked in parallel, in the process pool if enabled or
+        else in threads (bcrypt releases the GIL), in the given order. Checks
+        not yet started are cancelled on the first match.
+
+        :param password: Plaintext password
+        :type password: str
+        :param hashes: Bcrypt hashes
+        :type hashes: list
+        :param timeout: Time budget in seconds, defaults to
+            `AUTH_HASH_REUSE_TIMEOUT`
+        :type timeout: int | float
+        :return: True if the password matches any hash, False otherwise
+        :rtype: bool
+        :raises ServiceUnavailable: If the pool's queue is full or the time
+            budget ran out, with a `Retry-After` header: the password is
+            neither accepted nor reported as reused
+        """
+
+        password = password.encode('utf-8')
+        pending = [hashed.encode('utf-8') for hashed in reversed(hashes)]
+        timeout = self.reuse_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout else None
+        running = set()
+        try:
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    future = self.submit(_checkpw, password, pending[-1])
+                    if future is None:
+                        break
+                    pending.pop()
+                    running.add(future)
+                if not running:
+                    raise self._busy()
+
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._busy(
+                            "Password history check timed out, please try "
+                            "again later.")
+                done, running = futures.wait(
+                    running, timeout=remaining,
+                    return_when=futures.FIRST_COMPLETED)
+                if any(future.result() for future in done):
+                    return True
+            return False
+        except BrokenProcessPool:
+            self.shutdown()
+            return any(_checkpw(password, hashed.encode('utf-8'))
+                       for hashed in hashes)
+        finally:
+            for future in running:
+                future.cancel()
+
+    def run(self, function, *args):
+        """Runs a hashing function, in the pool if enabled.
+
+        :param function: Module level (picklable) function to run
+        :type function: function
+        :return: The function's result
+        :raises ServiceUnavailable: If the pool's queue is full or the
+            operation timed out
+        """
+
+        if not self.enabled:
+            return function(*args)
+
+        try:
+            future = self.submit(function, *args)
+            if future is None:
+                raise self._busy()
+            return future.result(timeout=self.timeout)
+        except futures.TimeoutError as error:
+            future.cancel()
+            raise self._busy() from error
+        except BrokenProcessPool:
+            self.shutdown()
+            return function(*args)
+
+    def submit(self, function, *args):
+        """Schedules a hashing function, in the pool if enabled or else in a
+        thread.
+
+        :param function: Module level (picklable) function to run
+        :type function: function
+        :return: The function's future, None if the pool's queue is full
+        :rtype: concurrent.futures.Future | None
+        """
+
+        if not self.enabled:
+            return self._get_executor(futures.ThreadPoolExecutor).submit(
+                function, *args)
+
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            future = self._get_executor().submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        return future
+
+    def shutdown(self):
+        """Stops the pool's workers, if running."""
+
+        with self._lock:
+            self._discard()
+
+    def _busy(self, description="Server busy, please try again later."):
+        """Creates the error for a request that could not be admitted or
+        completed in time.
+
+        :param description: The error's message
+        :type description: str
+        :return: 503 error with a `Retry-After` header
+        :rtype: ServiceUnavailable
+        """
+
+        return ServiceUnavailable(description, retry_after=self.retry_after)
+
+    def _get_executor(self, executor_class=futures.ProcessPoolExecutor):
+        """Gets the pool for the current process, starting it if needed.
+
+        The pool is started lazily so that forked application workers (i.e.:
+        uWSGI) never share the master's pool. By then the worker runs several
+        threads, so the pool's processes are started with `start_method`
+        (`forkserver` or `spawn`) rather than forked from it.
+
+        :param executor_class: The type of pool to start
+        :type executor_class: type
+        :return: The pool
+        :rtype: concurrent.futures.Executor
+        """
+
+        with self._lock:
+            if (self._executor is None or self._pid != os.getpid() or
+                    not isinstance(self._executor, executor_class)):
+                self._discard()
+                if executor_class is futures.ProcessPoolExecutor:
+                    self._executor = executor_class(
+                        self.workers, mp_context=multiprocessing.get_context(
+                            self.start_method))
+                else:
+                    self._executor = executor_class(self.workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _discard(self):
+        """Stops and forgets the current pool, the caller holds `_lock`. A
+        pool inherited from a parent process is forgotten only, the parent
+        owns its workers."""
+
+        executor, self._executor = self._executor, None
+        owned, self._pid = self._pid == os.getpid(), None
+        if executor is not None and owned:
+            executor.shutdown(wait=False)
@@ -0,0 +1,526 @@
+"""
+Sliding-window login failure counters.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import bisect
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+
+from lib.net import IPAddress
+
+
+def to_timestamp(when):
+    """Converts an attempt date to Unix time.
+
+    :param when: Attempt date, naive dates are local time
+    :type when: datetime | int | float | None
+    :return: Unix time, now if `when` is None
+    :rtype: float
+    """
+
+    if when is None:
+        when = datetime.now()
+    if isinstance(when, datetime):
+        return when.timestamp()
+    return float(when)
+
+
+class MemoryBackend:
+    """Failure windows held in the current process only, for tests and
+    single-process servers: every worker process counts failures on its
+    own."""
+
+    def __init__(self, slots, history):
+        """Initialize empty windows.
+
+        :param slots: Maximum number of windows to hold before evicting
+        :type slots: int
+        :param history: Maximum number of failures kept per window
+        :type history: int
+        """
+
+        self.slots = slots
+        self.history = history
+        self._windows = OrderedDict()
+        self._loaded = set()
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        """Gets the failure times of a window.
+
+        :param key: The window's key
+        :type key: str
+        :return: Failure times since the last success, oldest first
+        :rtype: list
+        """
+
+        with self._lock:
+            return list(self._windows.get(key, ()))
+
+    def add(self, key, timestamp):
+        """Adds a failure to a window.
+
+        :param key: The window's key
+        :type key: str
+        :param timestamp: Unix time of the failure
+        :type timestamp: float
+        """
+
+        with self._lock:
+            times = self._windows.setdefault(key, [])
+            self._windows.move_to_end(key)
+            insert(times, timestamp, self.history)
+            while len(self._windows) > self.slots:
+                self._windows.popitem(last=False)
+
+    def clear(self, key):
+        """Empties a window after a successful login.
+
+        :param key: The window's key
+        :type key: str
+        """
+
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def is_loaded(self, namespace):
+        """Checks if the windows of a namespace have been rebuilt.
+
+        :param namespace: The account type: `user` | `administrator`
+        :type namespace: str
+        :return: True if rebuilt, False otherwise
+        :rtype: bool
+        """
+
+        return namespace in self._loaded
+
+    def set_loaded(self, namespace):
+        """Marks the windows of a namespace as rebuilt.
+
+        :param namespace: The account type: `user` | `administrator`
+        :type namespace: str
+        """
+
+        self._loaded.add(namespace)
+
+    def lock(self):
+        """Gets a lock to hold while rebuilding.
+
+        :return: The backend's lock
+        :rtype: threading.RLock
+        """
+
+        return self._lock
+
+
+class SharedMemoryBackend:
+    """Failure windows in a memory mapped file shared by all processes on the
+    host, i.e.: uWSGI workers.
+
+    The file holds a fixed size open addressing table; each slot stores a
+    digest of its key and up to `history` failure times. When all the slots
+    probed for a new key are in use, the one with the oldest last failure is
+    reused.
+    """
+
+    MAGIC = b'LOGINWIN'
+    HEADER = struct.Struct('<8sIII')
+    PROBES = 16
+
+    def __init__(self, slots, history, path):
+        """Initialize the backend, the file is opened on first use.
+
+        :param slots: Number of slots in the table
+        :type slots: int
+        :param history: Maximum number of failures kept per window
+        :type history: int
+        :param path: Path of the shared file, preferably on a tmpfs
+        :type path: str
+        """
+
+        self.slots = slots
+        self.history = history
+        self.path = path
+        self.slot = struct.Struct('<16sH%dd' % history)
+        self.size = self.HEADER.size + self.slot.size * slots
+        self._map = None
+        self._fd = None
+        self._pid = None
+        self._depth = 0
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        """Gets the failure times of a window.
+
+        :param key: The window's key
+        :type key: str
+        :return: Failure times since the last success, oldest first
+        :rtype: list
+        """
+
+        digest = self._digest(key)
+        with self.lock():
+            index = self._find(digest, claim=False)
+            if index is None:
+                return []
+            return self._read(index)[1]
+
+    def add(self, key, timestamp):
+        """Adds a failure to a window.
+
+        :param key: The window's key
+        :type key: str
+        :param timestamp: Unix time of the failure
+        :type timestamp: float
+        """
+
+        digest = self._digest(key)
+        with self.lock():
+            index = self._find(digest, claim=True)
+            times = self._read(index)[1]
+            insert(times, timestamp, self.history)
+            self._write(index, digest, times)
+
+    def clear(self, key):
+        """Empties a window after a successful login.
+
+        :param key: The window's key
+        :type key: str
+        """
+
+        digest = self._digest(key)
+        with self.lock():
+            index = self._find(digest, claim=False)
+            if index is not None:
+                self._write(index, digest, [])
+
+    def is_loaded(self, namespace):
+        """Checks if the windows of a namespace have been rebuilt.
+
+        :param namespace: The account type: `user` | `administrator`
+        :type namespace: str
+        :return: True if rebuilt, False otherwise
+        :rtype: bool
+        """
+
+        with self.lock():
+            return bool(self._header()[3] & self._flag(namespace))
+
+    def set_loaded(self, namespace):
+        """Marks the windows of a namespace as rebuilt.
+
+        :param namespace: The account type: `user` | `administrator`
+        :type namespace: str
+        """
+
+        with self.lock():
+            magic, slots, history, loaded = self._header()
+            self.HEADER.pack_into(self._map, 0, magic, slots, history,
+                                  loaded | self._flag(namespace))
+
+    def lock(self):
+        """Gets a lock excluding all other threads and processes.
+
+        :return: Context manager holding the lock
+        :rtype: _FileLock
+        """
+
+        return _FileLock(self)
+
+    def _open(self):
+        """Maps the shared file for the current process, creating and
+        formatting it if needed.
+
+        Every process opens its own file descriptor so that `flock()`
+        excludes the other processes.
+        """
+
+        if self._map is not None and self._pid == os.getpid():
+            return
+        self._map = None
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._pid = os.getpid()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            header = None
+            if os.fstat(self._fd).st_size == self.size:
+                self._map = mmap.mmap(self._fd, self.size)
+                header = self._header()
+            if header is None or header[:3] != (self.MAGIC, self.slots,
+                                                self.history):
+                if self._map is not None:
+                    self._map.close()
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self.size)
+                self._map = mmap.mmap(self._fd, self.size)
+                self.HEADER.pack_into(self._map, 0, self.MAGIC, self.slots,
+                                      self.history, 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _header(self):
+        return self.HEADER.unpack_from(self._map, 0)
+
+    @staticmethod
+    def _flag(namespace):
+        return 1 << (zlib.crc32(namespace.encode('utf-8')) % 32)
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+    def _offset(self, index):
+        return self.HEADER.size + self.slot.size * index
+
+    def _read(self, index):
+        values = self.slot.unpack_from(self._map, self._offset(index))
+        return values[0], list(values[2:2 + values[1]])
+
+    def _write(self, index, digest, times):
+        self.slot.pack_into(
+            self._map, self._offset(index), digest, len(times),
+            *(times + [0.0] * (self.history - len(times))))
+
+    def _find(self, digest, claim):
+        """Finds the slot of a key.
+
+        :param digest: Digest of the key
+        :type digest: bytes
+        :param claim: Whether to take over a slot if the key has none
+        :type claim: bool
+        :return: The slot's index, None if not found and not claimed
+        :rtype: int | None
+        """
+
+        start = int.from_bytes(digest[:8], 'little') % self.slots
+        victim, victim_last = None, None
+        for probe in range(min(self.PROBES, self.slots)):
+            index = (start + probe) % self.slots
+            slot_digest, times = self._read(index)
+            if slot_digest == digest:
+                return index
+            if not claim:
+                if slot_digest == bytes(16):
+                    return None
+                continue
+            last = times[-1] if times else 0.0
+            if victim is None or last < victim_last:
+                victim, victim_last = index, last
+        if claim:
+            self._write(victim, digest, [])
+        return victim if claim else None
+
+
+class _FileLock:
+    """Reentrant context manager holding a shared backend's thread and file
+    locks."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __enter__(self):
+        # pylint: disable=protected-access
+        self.backend._lock.acquire()
+        try:
+            if not self.backend._depth:
+                self.backend._open()
+                fcntl.flock(self.backend._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self.backend._lock.release()
+            raise
+        self.backend._depth += 1
+        return self
+
+    def __exit__(self, *args):
+        # pylint: disable=protected-access
+        self.backend._depth -= 1
+        try:
+            if not self.backend._depth:
+                fcntl.flock(self.backend._fd, fcntl.LOCK_UN)
+        finally:
+            self.backend._lock.release()
+        return False
+
+
+def insert(times, timestamp, history):
+    """Inserts a failure time into a sorted window, skipping duplicates and
+    keeping only the most recent `history` times.
+
+    :param times: Failure times, oldest first
+    :type times: list
+    :param timestamp: Unix time of the failure
+    :type timestamp: float
+    :param history: Maximum number of times to keep
+    :type history: int
+    """
+
+    index = bisect.bisect_left(times, timestamp)
+    if index < len(times) and times[index] == timestamp:
+        return
+    times.insert(index, timestamp)
+    del times[:-history]
+
+
+class LoginFailures:
+    """Incremental record of recent failed logins per username, and per
+    username and IP address, answering whether an account is locked without
+    querying the login history.
+
+    A window holds the times of the failures since the last successful login,
+    which is all the lockout policy needs: an account is locked if its last
+    `max_attempts` attempts failed within `timeframe` seconds and the last one
+    is less than `ban_time` seconds ago.
+    """
+
+    def __init__(self):
+        """Initialize in-process counters, see `init_app()`."""
+
+        self.backend = MemoryBackend(10000, 16)
+
+    def init_app(self, app):
+        """Configure the counters for a Flask application.
+
+        :param app: The Flask application instance
+        :type app: Flask
+        """
+
+        slots = app.config.get('AUTH_LOCKOUT_SLOTS', 10000)
+        history = app.config.get('AUTH_LOCKOUT_HISTORY', 16)
+        if app.config.get('AUTH_LOCKOUT_BACKEND', 'shared') == 'shared':
+            path = app.config.get('AUTH_LOCKOUT_SHARED_PATH') or os.path.join(
+                '/dev/shm' if os.path.isdir('/dev/shm')
+                else tempfile.gettempdir(), 'api_login_failures')
+            self.backend = SharedMemoryBackend(slots, history, path)
+        else:
+            self.backend = MemoryBackend(slots, history)
+
+    @property
+    def history(self):
+        """The number of failures kept per window, the largest `max_attempts`
+        that can lock an account."""
+
+        return self.backend.history
+
+    @staticmethod
+    def keys(namespace, username, ip_address):
+        """Creates the window keys for a login attempt.
+
+        :param namespace: The account type: `user` | `administrator`
+        :type namespace: str
+        :param username: The username attempted
+        :type username: str
+        :param ip_address: The client's IP address, in any of its forms
+        :type ip_address: str
+        :return: The username key and the username/IP key
+        :rtype: (str, str)
+        """
+
+        ip_address = IPAddress.normalize(ip_address) or ip_address
+        return ('\0'.join((namespace, username)),
+                '\0'.join((namespace, username, ip_address or '')))
+
+    def record(self, namespace, username, ip_address, success, when=None):
+        """Records a login attempt.
+
+        Attempts are ignored until the namespace has been rebuilt, the
+        rebuild picks them up from the login history.
+
+        :param namespace: The account type: `user` | `administrator`
+        :type namespace: str
+        :param username: The username attempted
+        :type username: str
+        :param ip_address: The client's IP address
+        :type ip_address: str
+        :param success: Whether the attempt succeeded
+        :type success: bool
+        :param when: When the attempt was made, defaults to now
+        :type when: datetime | float
+        """
+
+        if not self.backend.is_loaded(namespace):
+            return
+        self._record(namespace, username, ip_address, success, when)
+
+    def _record(self, namespace, username, ip_address, success, when):
+        for key in self.keys(namespace, username, ip_address):
+            if success:
+                self.backend.clear(key)
+            else:
+                self.backend.add(key, to_timestamp(when))
+
+    def is_loaded(self, namespace):
+        """Checks if the counters of a namespace have been rebuilt.
+
+        :param namespace: The account type: `user` | `administrator`
+        :type namespace: str
+        :return: True if rebuilt, False otherwise
+        :rtype: bool
+        """
+
+        return self.backend.is_loaded(namespace)
+
+    def load(self, namespace, attempts):
+        """Rebuilds the counters of a namespace from the login history, once
+        for all processes sharing the backend.
+
+        :param namespace: The account type: `user` | `administrator`
+        :type namespace: str
+        :param attempts: Recent login attempts, oldest first, as tuples of
+            (username, ip_address, success, attempt_date)
+        :type attempts: iterable
+        """
+
+        with self.backend.lock():
+            if self.backend.is_loaded(namespace):
+                return
+            for username, ip_address, success, when in attempts:
+                self._record(namespace, username, ip_address, success, when)
+            self.backend.set_loaded(namespace)
+
+    def is_locked(self, namespace, username, ip_address, max_attempts,
+                  timeframe, ban_time, now=None):
+        """Checks if an account is locked by the lockout policy.
+
+        :param namespace: The account type: `user` | `administrator`
+        :type namespace: str
+        :param username: The username attempted
+        :type username: str
+        :param ip_address: The client's IP address to ban by, None to ban by
+            username only
+        :type ip_address: str | None
+        :param max_attempts: Number of failed attempts that locks the account,
+            from 1 to `history`
+        :type max_attempts: int
+        :param timeframe: Seconds the failed attempts must fall within
+        :type timeframe: int
+        :param ban_time: Seconds the account stays locked
+        :type ban_time: int
+        :param now: The current time, defaults to now
+        :type now: datetime | float
+        :return: True if locked, False otherwise
+        :rtype: bool
+        :raises ValueError: If `max_attempts` is out of range
+        """
+
+        if not 1 <= max_attempts <= self.history:
+            raise ValueError('max_attempts must be from 1 to {}'.format(
+                self.history))
+
+        by_username, by_ip = self.keys(namespace, username, ip_address)
+        times = self.backend.get(by_username if ip_address is None
+                                 else by_ip)
+        if len(times) < max_attempts:
+            return False
+        return (times[-1] - times[-max_attempts] <= timeframe and
+                times[-1] + ban_time > to_timestamp(now))
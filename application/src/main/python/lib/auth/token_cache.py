@@ -0,0 +1,142 @@
+"""
+Cache of verified authentication tokens.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import hashlib
+import threading
+import time
+
+from lib.cache import TTLCache
+
+
+class TokenCache:
+    """In-process cache mapping a hash of a verified authentication token to a
+    snapshot of its account, so repeat requests skip signature verification
+    and the account lookup.
+
+    Also tracks the latest account versions written by this process so that
+    the claims of older tokens can be recognized as stale without a query;
+    writes made by other processes or deployments are only seen through the
+    account's version in the database, which the models compare the claims
+    with before trusting them.
+    """
+
+    def __init__(self):
+        """Initialize a disabled cache, see `init_app()`."""
+
+        self.cache = TTLCache(0, 0)
+        self._generations = {}
+        self._versions = {}
+        self._claims_not_before = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the cache for a Flask application.
+
+        :param app: The Flask application instance
+        :type app: Flask
+        """
+
+        self.cache = TTLCache(
+            app.config.get('AUTH_TOKEN_CACHE_SIZE', 10000),
+            app.config.get('AUTH_TOKEN_CACHE_TTL', 60))
+        with self._lock:
+            self._generations = {}
+            self._versions = {}
+            self._claims_not_before = 0
+
+    @staticmethod
+    def key(token):
+        """Creates the cache key for a token.
+
+        :param token: Authentication token
+        :type token: str | bytes
+        :return: SHA-256 hex digest of the token
+        :rtype: str
+        """
+
+        if isinstance(token, str):
+            token = token.encode('utf-8')
+        return hashlib.sha256(token).hexdigest()
+
+    def get(self, token):
+        """Retrieves the snapshot for a previously verified token.
+
+        :param token: Authentication token
+        :type token: str | bytes
+        :return: The account snapshot, None if not cached
+        :rtype: AuthSnapshot | None
+        """
+
+        if not token:
+            return None
+        entry = self.cache.get(self.key(token))
+        if entry is None:
+            return None
+        snapshot, generation = entry
+        if generation != self._generations.get(
+                (snapshot.type, snapshot.id), 0):
+            return None
+        return snapshot
+
+    def set(self, token, snapshot, expires_at):
+        """Stores the snapshot for a verified token.
+
+        :param token: Authentication token
+        :type token: str | bytes
+        :param snapshot: Snapshot of the token's account
+        :type snapshot: AuthSnapshot
+        :param expires_at: Unix time the token expires
+        :type expires_at: int | float
+        """
+
+        generation = self._generations.get((snapshot.type, snapshot.id), 0)
+        self.cache.set(self.key(token), (snapshot, generation),
+                       ttl=expires_at - time.time())
+
+    def is_current(self, claims, issued_at):
+        """Checks if the claims of a verified token are still current, i.e.:
+        the token carries an account version, and neither the account nor
+        any role has since been written by this process.
+
+        :param claims: The token's payload
+        :type claims: dict
+        :param issued_at: Unix time the token was issued
+        :type issued_at: int | float
+        :return: True if the claims can be trusted as is, False otherwise
+        :rtype: bool
+        """
+
+        version = claims.get('ver')
+        if version is None or issued_at < self._claims_not_before:
+            return False
+        latest = self._versions.get((claims.get('type'), claims.get('id')))
+        return latest is None or version >= latest
+
+    def invalidate(self, user_type, user_id, version=None):
+        """Drops all cached tokens for an account.
+
+        :param user_type: The account type: `user` | `administrator`
+        :type user_type: str
+        :param user_id: The account's ID
+        :type user_id: int
+        :param version: The account's new version, `math.inf` if deleted
+        :type version: int | float | None
+        """
+
+        with self._lock:
+            key = (user_type, user_id)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if version is not None:
+                self._versions[key] = version
+
+    def clear(self):
+        """Drops all cached tokens and marks the claims of all tokens issued
+        until now as stale."""
+
+        with self._lock:
+            self._claims_not_before = time.time()
+        self.cache.clear()
@@ -0,0 +1,94 @@
+"""
+In-process caching library.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Bounded, thread safe LRU cache where every entry carries its own
+    expiration time."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        """Initialize an empty cache.
+
+        :param maxsize: Maximum number of entries to hold before evicting
+        :type maxsize: int
+        :param ttl: Default number of seconds an entry is valid
+        :type ttl: int | float
+        """
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key, default=None):
+        """Retrieves a value from the cache, marking it as recently used.
+
+        :param key: The cache key
+        :param default: The value to return on a miss
+        :return: The cached value or `default`
+        """
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Stores a value in the cache, evicting the least recently used entry
+        if the cache is full.
+
+        :param key: The cache key
+        :param value: The value to store
+        :param ttl: Seconds the entry is valid, defaults to the cache's TTL
+        :type ttl: int | float
+        """
+
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Removes an entry from the cache.
+
+        :param key: The cache key
+        :param default: The value to return if the key is not cached
+        :return: The removed value or `default`
+        """
+
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        """Removes all entries from the cache."""
+
+        with self._lock:
+            self._data.clear()
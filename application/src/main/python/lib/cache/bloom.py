@@ -0,0 +1,57 @@
+"""
+Bloom filter.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Compact, probabilistic set: membership tests have no false negatives
+    and a bounded rate of false positives."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        """Initialize an empty filter.
+
+        :param capacity: Number of items the filter is sized for
+        :type capacity: int
+        :param error_rate: False positive rate at capacity
+        :type error_rate: float
+        """
+
+        capacity = max(capacity, 1)
+        self.size = max(8, int(math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        """Computes the bit positions of an item by double hashing.
+
+        :param item: The item
+        :type item: str
+        :return: Bit positions
+        :rtype: generator
+        """
+
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        """Adds an item to the filter.
+
+        :param item: The item
+        :type item: str
+        """
+
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
@@ -0,0 +1,89 @@
+"""
+Cross-process version stamp.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import threading
+
+
+class VersionStamp:
+    """Counter in a small memory mapped file shared by all processes on the
+    host, i.e.: uWSGI workers. A process that changes cached data bumps the
+    counter, the others compare it to the value they last saw, which costs a
+    memory read.
+
+    The file is local to the host: processes of other hosts, such as the
+    admin and public deployments when they run apart, never see the bump, so
+    caches relying on a stamp must also expire after a short TTL.
+    """
+
+    COUNTER = struct.Struct('<Q')
+
+    def __init__(self, path=None):
+        """Initialize the stamp, the file is opened on first use.
+
+        :param path: Path of the shared file, None for an in-process counter
+        :type path: str | None
+        """
+
+        self.path = path
+        self._value = 0
+        self._map = None
+        self._fd = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Gets the current version.
+
+        :return: The version
+        :rtype: int
+        """
+
+        if self.path is None:
+            return self._value
+        self._open()
+        return self.COUNTER.unpack_from(self._map, 0)[0]
+
+    def bump(self):
+        """Increments the version, telling all processes to drop their
+        cached data.
+
+        :return: The new version
+        :rtype: int
+        """
+
+        with self._lock:
+            if self.path is None:
+                self._value += 1
+                return self._value
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                value = self.COUNTER.unpack_from(self._map, 0)[0] + 1
+                self.COUNTER.pack_into(self._map, 0, value)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            return value
+
+    def _open(self):
+        """Maps the shared file for the current process, creating it if
+        needed."""
+
+        if self._map is not None and self._pid == os.getpid():
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < self.COUNTER.size:
+                os.ftruncate(fd, self.COUNTER.size)
+            self._map = mmap.mmap(fd, self.COUNTER.size)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd, self._pid = fd, os.getpid()
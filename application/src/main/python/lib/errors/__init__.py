@@ -6,7 +6,7 @@ which is part of this source code package.
 """
 
 from .handlers import error_400, error_401, error_403, error_404, error_405, \
-    error_500
+    error_500, error_503
 
 
 def register(app):
@@ -21,3 +21,4 @@ def register(app):
     app.errorhandler(404)(error_404)
     app.errorhandler(405)(error_405)
     app.errorhandler(500)(error_500)
+    app.errorhandler(503)(error_503)
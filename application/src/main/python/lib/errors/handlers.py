@@ -79,3 +79,25 @@ def error_500(error):
     :rtype: (str, int)
     """
     return make_response(jsonify({'error': 'Server error'}), 500)
+
+
+def error_503(error):
+    """503 error handler.
+
+    Passes on the `Retry-After` header of the error, if any.
+
+    :param error: Error type
+    :type error: ServiceUnavailable
+    :returns: JSON string of error response; status code
+    :rtype: (str, int)
+    """
+
+    # replace default message with a simpler one
+    description = 'Service unavailable' if error.description.startswith(
+        "The server is temporarily unable to service your request"
+    ) else error.description
+    response = make_response(jsonify({'error': description}), 503)
+    retry_after = dict(error.get_headers()).get('Retry-After')
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return response
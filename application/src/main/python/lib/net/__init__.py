@@ -0,0 +1,47 @@
+"""
+Network address library.
+
+Canonical forms of IP addresses and networks.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import ipaddress
+
+
+class IPAddress:
+    """Helper for IP address values"""
+
+    @staticmethod
+    def normalize(value):
+        """Creates the canonical form of an IP address: IPv6 addresses are
+        compressed and lowercased, IPv4-mapped IPv6 addresses are unmapped.
+
+        :param value: The IP address
+        :type value: str | None
+        :return: The canonical IP address, None if not an IP address
+        :rtype: str | None
+        """
+
+        try:
+            address = ipaddress.ip_address((value or '').strip())
+        except ValueError:
+            return None
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        return str(address)
+
+    @staticmethod
+    def network(value):
+        """Creates the canonical form of a network in CIDR notation, a single
+        address being a network of its own. Host bits are ignored.
+
+        :param value: The network, e.g. `203.0.113.0/24`
+        :type value: str
+        :return: The canonical network
+        :rtype: str
+        :raises ValueError: If not a network
+        """
+
+        return str(ipaddress.ip_network(value.strip(), strict=False))
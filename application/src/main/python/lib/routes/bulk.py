@@ -0,0 +1,202 @@
+"""
+Routing helper class for writing batches of records.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy import inspect
+
+from init_dep import hasher
+from lib.schema.factory import get_schema
+from lib.schema.validate import unique_many, unique_email_many, exists_many
+
+
+class Bulk:
+    """Helper for creating, updating and deleting batches of accounts
+    (users, administrators) in a single request.
+
+    The batch is validated set-wise: one query for username collisions, one
+    for email digests and one for the roles, for all of its items. Passwords
+    are hashed in parallel. Items are reported on individually: invalid
+    items are skipped, the others are written in one transaction.
+    """
+
+    def __init__(self, model, schema, key):
+        """Initialize a batch.
+
+        :param model: SQLAlchemy database model of the accounts
+        :type model: flask_sqlalchemy.Model
+        :param schema: The schema class the accounts are loaded with
+        :type schema: type
+        :param key: Name of an account in the request and response, i.e.:
+            `user`
+        :type key: str
+        """
+
+        self.model = model
+        self.schema = schema
+        self.key = key
+        self.results = []
+
+    def items(self, request_json, name):
+        """Gets the items of the batch from the request's JSON body.
+
+        :param request_json: The request's JSON body
+        :type request_json: dict
+        :param name: Name of the list of items in the body, i.e.: `users`
+        :type name: str
+        :return: The items; the errors, if the batch itself is invalid
+        :rtype: (list, dict)
+        """
+
+        items = None
+        if isinstance(request_json, dict):
+            items = request_json.get(name, None)
+        max_items = current_app.config.get('BULK_MAX_ITEMS', 1000)
+
+        errors = {}
+        if not isinstance(items, list) or not items:
+            errors[name] = ["Missing data for required field."]
+        elif len(items) > max_items:
+            errors[name] = ["Longer than maximum length {}.".format(
+                max_items)]
+        else:
+            self.results = [None] * len(items)
+
+        return items, errors
+
+    def load(self, items, records=None):
+        """Validates the items of the batch, recording the errors of invalid
+        items in `results`. Items that already have a result (i.e.: missing
+        records) are skipped.
+
+        :param items: The items
+        :type items: list
+        :param records: Existing records the items update, None to create
+        :type records: list
+        :return: The loaded data and the roles of each item, None for
+            invalid items
+        :rtype: (list, list)
+        """
+
+        records = records or [None] * len(items)
+        items = [item if isinstance(item, dict) else {} for item in items]
+
+        # pre-validate data
+        errors = [{} for item in items]
+        errors = unique_many(
+            errors, self.model, self.model.username,
+            [item['username'].lower().strip()
+             if isinstance(item.get('username', None), str) else None
+             for item in items], updates=records)
+        errors = unique_email_many(
+            errors, self.model, self.model.email,
+            [item.get('email', None) for item in items], updates=records)
+        errors, roles = exists_many(
+            errors, inspect(self.model).relationships['roles'].mapper.class_,
+            'roles', [item.get('roles', []) for item in items])
+
+        # validate data
+        schema = get_schema(self.schema)
+        schema_no_password = get_schema(self.schema, exclude=('password',))
+        data = []
+        for i, item in enumerate(items):
+            loaded = None
+            if self.results[i] is not None:
+                roles[i] = None
+                data.append(loaded)
+                continue
+            try:
+                if records[i] is None or item.get('password', None):
+                    loaded = schema.load(item)
+                else:
+                    loaded = schema_no_password.load(item)
+            except ValidationError as err:
+                errors[i] = dict(list(errors[i].items()) +
+                                 list(err.messages.items()))
+            if errors[i]:
+                self.results[i] = {'status': 400, 'error': errors[i]}
+                loaded, roles[i] = None, None
+            data.append(loaded)
+
+        return data, roles
+
+    def fetch(self, ids):
+        """Retrieves the records of the batch with a single query, recording
+        missing records in `results`.
+
+        :param ids: IDs of the records, one per item
+        :type ids: list
+        :return: The records, None for missing records
+        :rtype: list
+        """
+
+        valid = {record_id for record_id in ids
+                 if isinstance(record_id, int)}
+        found = {}
+        if valid:
+            found = {record.id: record for record in self.model.query.filter(
+                self.model.id.in_(valid))}
+
+        records = []
+        for i, record_id in enumerate(ids):
+            records.append(found.get(record_id, None)
+                           if isinstance(record_id, int) else None)
+            if records[i] is None:
+                self.results[i] = {'status': 404, 'error': 'Not found.'}
+        return records
+
+    @staticmethod
+    def hash_passwords(records, data):
+        """Sets the passwords of the records of the batch, hashed in parallel.
+
+        :param records: The records, None for invalid items
+        :type records: list
+        :param data: The loaded data of each record, None for invalid items
+        :type data: list
+        """
+
+        pending = [(record, item['password'])
+                   for record, item in zip(records, data)
+                   if record is not None and item.get('password', None)]
+        hashes = hasher.hashpw_many([password for _, password in pending])
+        for (record, _), hashed in zip(pending, hashes):
+            record.set_password_hash(hashed)
+
+    def written(self, records, status):
+        """Records the result of the written records of the batch.
+
+        :param records: The records, None for invalid items
+        :type records: list
+        :param status: The HTTP status of a written item
+        :type status: int
+        """
+
+        # reload the records with a single query (i.e.: server defaults)
+        if status != 204:
+            ids = [record.id for record in records if record is not None]
+            if ids:
+                self.model.query.filter(self.model.id.in_(ids)).all()
+
+        schema = get_schema(self.schema)
+        for i, record in enumerate(records):
+            if record is None:
+                continue
+            if status == 204:
+                self.results[i] = {'status': status}
+            else:
+                self.results[i] = {'status': status,
+                                   self.key: schema.dump(record)}
+
+    def response(self):
+        """Creates the response body with the per-item results.
+
+        :return: Response data
+        :rtype: dict
+        """
+
+        return {'results': [dict(result, index=i)
+                            for i, result in enumerate(self.results)]}
@@ -0,0 +1,231 @@
+"""
+Routing helper class for answering conditional GET requests.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, current_app, make_response, request
+from sqlalchemy import String, Table, func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from init_dep import db
+
+
+class Conditional:
+    """Answers conditional GET requests of a route from the `updated_at`
+    timestamps of its records, used as a decorator on the route:
+
+        @Conditional(User, UserProfile.user_id, roles.c.user_id, Role,
+                     id='user_id', username='username')
+        def get_user(user_id=None, username=None):
+
+        @Conditional(Region, Country)
+        def get_regions(country_code, page=1, limit=100):
+
+    The related models and relation tables given must cover everything the
+    route's schema serializes besides the model's own columns.
+
+    With criteria (model attribute name -> route argument name), the route
+    returns a single record, found by the first criterion whose argument is
+    given. Its state is its ID and `updated_at`, and the state of the rows
+    referencing it through the given foreign key columns (i.e.: its profile,
+    its role assignments). Related models and tables given as such, rather
+    than by column, add the state of all their rows (i.e.: role names).
+
+    Without criteria, the route returns a listing. Its state is the state of
+    all the rows of the model's table and of the related models and relation
+    tables given (i.e.: nested records).
+
+    The state of rows is their latest `updated_at` and their count, so that
+    deletions are detected too. Relation tables have no timestamps: their
+    state is the count and a digest of all their primary keys, in order.
+
+    The state is read with one query of the timestamps only, and a weak ETag
+    is derived from it and from the request's path and arguments. Requests
+    whose `If-None-Match` (or, for records, `If-Modified-Since`) matches are
+    answered with a 304 before the route runs. Otherwise the route's 200
+    responses get an `ETag` (and, for records, a `Last-Modified`) header.
+
+    Changes to related rows not given here do not change the state. Enabled
+    with `CONDITIONAL_GET_ENABLED`.
+    """
+
+    def __init__(self, model, *related, **criteria):
+        """Initialize the conditional route.
+
+        :param model: SQLAlchemy database model of the route's records
+        :type model: flask_sqlalchemy.Model
+        :param related: Models and relation tables of nested records; for a
+            record, preferably their foreign key columns referencing it
+        :param criteria: Route argument names by model attribute name
+        """
+
+        self.model = model
+        self.related = related
+        self.criteria = criteria
+
+    def __call__(self, view):
+        """Answers the route's conditional requests.
+
+        :param view: The route's view function
+        :type view: function
+        :return: The wrapped view function
+        :rtype: function
+        """
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if (request.method not in ('GET', 'HEAD') or
+                    not current_app.config.get(
+                        'CONDITIONAL_GET_ENABLED', False)):
+                return view(*args, **kwargs)
+
+            state = self.state(kwargs)
+            if state is None:
+                return view(*args, **kwargs)
+            etag, last_modified = self.validators(state)
+
+            if self.is_fresh(etag, last_modified):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+
+        return wrapper
+
+    def state(self, kwargs):
+        """Reads the state of the route's records.
+
+        :param kwargs: The route's arguments
+        :type kwargs: dict
+        :return: The state; None if no record matches
+        :rtype: tuple | None
+        """
+
+        if not self.criteria:
+            columns = []
+            for table in map(_table, (self.model,) + self.related):
+                columns.extend(_summary(table))
+            return tuple(db.session.query(*columns).one())
+
+        for attribute, argument in self.criteria.items():
+            if kwargs.get(argument, None) is not None:
+                criterion = getattr(self.model, attribute) == kwargs[argument]
+                break
+        else:
+            return None
+
+        columns = [self.model.id, self.model.updated_at]
+        for related in self.related:
+            table = _table(related)
+            if table is not None:
+                columns.extend(_summary(table))
+                continue
+            column = related.__clause_element__() \
+                if hasattr(related, '__clause_element__') else related
+            columns.extend(_summary(column.table, column == self.model.id))
+        row = db.session.query(*columns).filter(criterion).first()
+        return tuple(row) if row is not None else None
+
+    def validators(self, state):
+        """Creates the validators of a state.
+
+        :param state: The state of the route's records
+        :type state: tuple
+        :return: The weak ETag; the last modification, None for a listing
+        :rtype: (str, datetime | None)
+        """
+
+        etag = hashlib.sha1('|'.join(
+            [request.full_path] +
+            [value.isoformat() if hasattr(value, 'isoformat') else str(value)
+             for value in state]).encode('utf-8')).hexdigest()
+
+        last_modified = None
+        if self.criteria:
+            timestamps = [value for value in state[1:]
+                          if isinstance(value, datetime)]
+            last_modified = max(timestamps).astimezone(timezone.utc).replace(
+                tzinfo=None, microsecond=0)
+
+        return etag, last_modified
+
+    @staticmethod
+    def is_fresh(etag, last_modified):
+        """Checks if the client's copy of the response is current.
+
+        :param etag: The weak ETag of the current response
+        :type etag: str
+        :param last_modified: The last modification of the current response
+        :type last_modified: datetime | None
+        :return: True if the client's copy matches, False otherwise
+        :rtype: bool
+        """
+
+        # If-Modified-Since is ignored when If-None-Match is sent
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(etag)
+        if last_modified is not None and request.if_modified_since:
+            return last_modified <= request.if_modified_since
+        return False
+
+
+def _table(related):
+    """The table of a model or relation table, None for a column."""
+
+    if isinstance(related, Table):
+        return related
+    return getattr(related, '__table__', None)
+
+
+def _summary(table, *criteria):
+    """Subqueries summarizing the state of a table's rows, see
+    `Conditional`.
+
+    :param table: The table
+    :type table: sqlalchemy.Table
+    :param criteria: Conditions of the rows to summarize
+    :return: The subqueries
+    :rtype: list
+    """
+
+    if 'updated_at' in table.c:
+        aggregates = [func.max(table.c.updated_at), func.count()]
+    else:
+        aggregates = [func.count(),
+                      _KeysDigest(*table.primary_key.columns)]
+    return [select(aggregate).select_from(table).where(
+        *criteria).scalar_subquery() for aggregate in aggregates]
+
+
+class _KeysDigest(FunctionElement):
+    """MD5 digest of the primary keys of all rows, in order"""
+
+    type = String()
+    name = 'keys_digest'
+    inherit_cache = True
+
+
+@compiles(_KeysDigest)
+def _compile_keys_digest(element, compiler, **kwargs):
+    columns = ', '.join(compiler.process(column, **kwargs)
+                        for column in element.clauses)
+    return "md5(string_agg(concat_ws(':', {0}), ',' ORDER BY {0}))".format(
+        columns)
+
+
+@compiles(_KeysDigest, 'sqlite')
+def _compile_keys_digest_sqlite(element, compiler, **kwargs):
+    return "group_concat({}, ',')".format(" || ':' || ".join(
+        compiler.process(column, **kwargs) for column in element.clauses))
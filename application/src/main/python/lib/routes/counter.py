@@ -0,0 +1,132 @@
+"""
+Routing helper class for counting the records of listings.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from lib.cache import TTLCache
+
+
+class ListingCounter:
+    """Counts the records of listings with one of several strategies:
+
+    - `exact`: counts all matching records
+    - `estimate`: reads the planner's row estimate from EXPLAIN, which is
+      based on the table statistics (`pg_class.reltuples`) and does not read
+      the records
+    - `cached`: counts all matching records, and remembers the count for
+      `ttl` seconds for the same filtering criteria
+    - `none`: does not count, listings detect if there is a next page by
+      fetching one record more than the page holds
+    - `window`: listings count all matching records with `count(*) OVER ()`
+      in the same statement that retrieves the page, saving a round trip to
+      the database; counts exactly when not retrieved by page number
+    """
+
+    COUNT_EXACT = 'exact'
+    COUNT_ESTIMATE = 'estimate'
+    COUNT_CACHED = 'cached'
+    COUNT_NONE = 'none'
+    COUNT_WINDOW = 'window'
+
+    STRATEGIES = (COUNT_EXACT, COUNT_ESTIMATE, COUNT_CACHED, COUNT_NONE,
+                  COUNT_WINDOW)
+
+    def __init__(self):
+        """Initialize a counter with exact counts, see `init_app()`."""
+
+        self.default = self.COUNT_EXACT
+        self.cache = TTLCache(0, 0)
+
+    def init_app(self, app):
+        """Configure the counter for a Flask application.
+
+        :param app: The Flask application instance
+        :type app: Flask
+        """
+
+        default = app.config.get('LISTING_COUNT_STRATEGY', self.COUNT_EXACT)
+        if default not in self.STRATEGIES:
+            raise ValueError(
+                'Invalid LISTING_COUNT_STRATEGY: {}'.format(default))
+        self.default = default
+        self.cache = TTLCache(app.config.get('LISTING_COUNT_CACHE_SIZE', 1000),
+                              app.config.get('LISTING_COUNT_CACHE_TTL', 30))
+
+    def count(self, query, strategy):
+        """Counts the records of a listing query.
+
+        :param query: The listing's query object
+        :type query: flask_sqlalchemy.BaseQuery
+        :param strategy: The count strategy, see `STRATEGIES`
+        :type strategy: str
+        :return: The (estimated) number of records, None for `none`
+        :rtype: int | None
+        """
+
+        if strategy == self.COUNT_ESTIMATE:
+            return self.estimate(query)
+        if strategy == self.COUNT_CACHED:
+            return self.cached(query)
+        if strategy == self.COUNT_NONE:
+            return None
+        return query.count()
+
+    @staticmethod
+    def estimate(query):
+        """Estimates the number of records of a query with the planner.
+
+        :param query: The query object
+        :type query: flask_sqlalchemy.BaseQuery
+        :return: The estimated number of records
+        :rtype: int
+        """
+
+        plan = query.session.execute(
+            Explain(query.order_by(None).statement)).scalar()
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def cached(self, query):
+        """Counts the records of a query, reusing the count of a query with
+        the same filtering criteria for `ttl` seconds.
+
+        :param query: The query object
+        :type query: flask_sqlalchemy.BaseQuery
+        :return: The number of records
+        :rtype: int
+        """
+
+        compiled = query.order_by(None).statement.compile(
+            dialect=query.session.get_bind().dialect,
+            compile_kwargs={'render_postcompile': True})
+        key = (str(compiled), repr(sorted(compiled.params.items())))
+        total = self.cache.get(key)
+        if total is None:
+            total = query.count()
+            self.cache.set(key, total)
+        return total
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a select statement"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        """Initialize the statement.
+
+        :param statement: The statement to explain
+        :type statement: sqlalchemy.sql.expression.Select
+        """
+
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kwargs):
+    return 'EXPLAIN (FORMAT JSON) ' + compiler.process(
+        element.statement, **kwargs)
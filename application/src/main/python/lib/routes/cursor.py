@@ -0,0 +1,62 @@
+"""
+Routing helper class for keyset pagination cursors.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+
+class Cursor:
+    """Helper for encoding and decoding opaque pagination cursors"""
+
+    @staticmethod
+    def encode(order_by, value, record_id):
+        """Creates a cursor pointing at a record of a listing.
+
+        :param order_by: The listing's requested order, None for the default
+        :type order_by: str | None
+        :param value: The record's value of the ordering column
+        :param record_id: The record's ID
+        :type record_id: int
+        :return: The cursor
+        :rtype: str
+        """
+
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        data = json.dumps([order_by, value, record_id], separators=(',', ':'))
+        return base64.urlsafe_b64encode(
+            data.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode(cursor, python_type=None):
+        """Reads a cursor created by `Cursor.encode()`.
+
+        :param cursor: The cursor
+        :type cursor: str
+        :param python_type: Type of the ordering column, used to restore
+            dates and times
+        :type python_type: type | None
+        :return: The listing's order, the value of the ordering column and
+            the record ID
+        :rtype: (str | None, object, int)
+        :raises ValueError: If the cursor is malformed
+        """
+
+        try:
+            order_by, value, record_id = json.loads(base64.urlsafe_b64decode(
+                cursor + '=' * (-len(cursor) % 4)).decode('utf-8'))
+            if not isinstance(record_id, int) or not (
+                    order_by is None or isinstance(order_by, str)):
+                raise ValueError('Invalid cursor')
+            if value is not None and python_type in (datetime, date):
+                value = python_type.fromisoformat(value)
+        except (binascii.Error, UnicodeDecodeError, TypeError) as err:
+            raise ValueError('Invalid cursor') from err
+
+        return order_by, value, record_id
@@ -0,0 +1,109 @@
+"""
+Routing helper class for streaming exports of listings.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import csv
+import io
+import json
+
+from flask import Response, abort, current_app, g, stream_with_context
+
+from init_dep import db
+
+
+class Export:
+    """Streams all the records of a listing query as newline delimited JSON
+    (`ndjson`, the default) or CSV, selected with the `format` argument.
+
+    The records are read from a server-side cursor `EXPORT_YIELD_PER` at a
+    time, dumped one by one and released, so the memory used does not grow
+    with the number of records. In CSV, nested values are written as JSON.
+    The route's loading profiles stay active while the body is generated.
+    """
+
+    FORMAT_NDJSON = 'ndjson'
+    FORMAT_CSV = 'csv'
+
+    MIMETYPES = {
+        FORMAT_NDJSON: 'application/x-ndjson',
+        FORMAT_CSV: 'text/csv',
+    }
+
+    def __init__(self, query, schema, request_args):
+        """Initialize an export.
+
+        :param query: The listing's query object
+        :type query: flask_sqlalchemy.BaseQuery
+        :param schema: The schema instance to dump the records with
+        :type schema: marshmallow.Schema
+        :param request_args: The Flask Request.args object
+        :type request_args: ImmutableMultiDict
+        """
+
+        self.query = query
+        self.schema = schema
+        self.loading_profiles = g.get('loading_profiles', ())
+        self.format = request_args.get('format', self.FORMAT_NDJSON)
+        if self.format not in self.MIMETYPES:
+            abort(400)
+
+    def response(self, name):
+        """Creates the streamed response.
+
+        :param name: Base name of the downloaded file, i.e.: `logins`
+        :type name: str
+        :return: The response
+        :rtype: flask.Response
+        """
+
+        return Response(
+            stream_with_context(self.generate()),
+            mimetype=self.MIMETYPES[self.format],
+            headers={'Content-Disposition':
+                     'attachment; filename={}.{}'.format(name, self.format)})
+
+    def generate(self):
+        """Generates the export's body, a batch of records at a time.
+
+        :return: Chunks of the body
+        :rtype: generator
+        """
+
+        # the body is generated after the route returned
+        g.loading_profiles = self.loading_profiles
+
+        yield_per = current_app.config.get('EXPORT_YIELD_PER', 1000)
+        buffer = io.StringIO()
+
+        writer = None
+        if self.format == self.FORMAT_CSV:
+            order = list(self.schema.opts.fields or
+                         self.schema.declared_fields)
+            names = sorted(self.schema.dump_fields, key=lambda name: (
+                order.index(name) if name in order else len(order)))
+            writer = csv.DictWriter(buffer, names, lineterminator='\n')
+            writer.writeheader()
+
+        query = self.query.execution_options(
+            stream_results=True).yield_per(yield_per)
+        for count, record in enumerate(query, 1):
+            data = self.schema.dump(record)
+            if writer is None:
+                buffer.write(json.dumps(data, separators=(',', ':')))
+                buffer.write('\n')
+            else:
+                writer.writerow({
+                    name: json.dumps(value, separators=(',', ':'))
+                    if isinstance(value, (dict, list)) else value
+                    for name, value in data.items()})
+            db.session.expunge(record)
+
+            if count % yield_per == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
@@ -0,0 +1,311 @@
+"""
+Routing helper class for retrieving pages of listings.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+from flask import abort
+from flask_marshmallow.fields import URLFor
+from sqlalchemy import and_, func, inspect, or_, tuple_
+from sqlalchemy.orm import load_only
+from sqlalchemy.sql import operators
+
+from init_dep import listing_counter
+from lib.sqlalchemy.loading import narrow_loading_profiles
+from .counter import ListingCounter
+from .cursor import Cursor
+from .pager import Pager
+from .query import Query
+
+
+class Listing:
+    """Helper for retrieving a page of a listing and its pagination data.
+
+    Pages are retrieved by page number, unless the request has an `after` or
+    a `before` cursor, in which case the page is retrieved by keyset: the
+    records ordered right after (or before) the one the cursor points to,
+    which does not require the database to skip over the records of the
+    previous pages. Pass an empty `after` cursor to request the first page.
+
+    The total is counted with the endpoint's count strategy, which the
+    request can override with the `count` argument, see `ListingCounter`.
+
+    The request can narrow the fields of the records with the `fields`
+    argument, see `select_fields()`.
+    """
+
+    def __init__(self, model, default_order, order_options, request_args,
+                 status_filter, count=None):
+        """Initialize a listing, arguments are the same as `Query.make()`.
+
+        :param model: SQLAlchemy database model
+        :type model: flask_sqlalchemy.Model
+        :param default_order: The default query ordering
+        :type default_order: sqlalchemy.sql.elements.UnaryExpression
+        :param order_options: A mapping of order options: str->object
+        :type order_options: dict
+        :param request_args: The Flask Request.args object
+        :type request_args: ImmutableMultiDict
+        :param status_filter: Flag for status filtering behavior
+        :type status_filter: int
+        :param count: The endpoint's count strategy, None for the configured
+            default
+        :type count: str | None
+        """
+
+        self.model = model
+        self.request_args = request_args
+        self.order_by = request_args.get('order_by', None)
+        if self.order_by not in order_options:
+            self.order_by = None
+        self.order = order_options.get(self.order_by, default_order)
+        self.query = Query.make(model, default_order, order_options,
+                                request_args, status_filter)
+        self.count = request_args.get('count', None)
+        if self.count not in ListingCounter.STRATEGIES:
+            self.count = count or listing_counter.default
+        self.page = 1
+        self.limit = None
+        self.more = False
+        self.total = None
+        self.previous_cursor = None
+        self.next_cursor = None
+
+    @property
+    def is_cursor(self):
+        """Checks if the listing is paged by cursor.
+
+        :return: True if paged by cursor, False if by page number
+        :rtype: bool
+        """
+
+        return 'after' in self.request_args or 'before' in self.request_args
+
+    def filter(self, *criterion):
+        """Adds filtering criteria to the query.
+
+        :param criterion: Filtering criteria, as accepted by `Query.filter()`
+        """
+
+        self.query = self.query.filter(*criterion)
+
+    def select_fields(self, schema):
+        """Narrows the listing to the fields requested with the `fields`
+        argument, a comma separated list of the schema's field names, with
+        dots for the fields of nested schemas.
+
+        Only the columns of the requested fields are loaded, and the route's
+        loading profile of the model is narrowed to the requested
+        relationships. Columns of underscored attributes back the hybrid
+        properties of the same name.
+
+        :param schema: The schema class the records are dumped with
+        :type schema: type
+        :return: Names of the fields to dump, as the schema's `only`
+            argument, None for all fields
+        :rtype: tuple | None
+        """
+
+        only = tuple(sorted({
+            name.strip() for name in self.request_args.get(
+                'fields', '').split(',') if name.strip()}))
+        if not only:
+            return None
+
+        try:
+            dump_fields = schema(only=only).dump_fields
+        except ValueError:
+            abort(400)
+
+        attributes = set()
+        for name, field in dump_fields.items():
+            if isinstance(field, URLFor):
+                attributes.update(
+                    value[1:-1] for value in field.values.values()
+                    if isinstance(value, str) and value.startswith('<')
+                    and value.endswith('>'))
+            else:
+                attributes.add(field.attribute or name)
+
+        # the ID and the ordering column are needed for cursors
+        mapper = inspect(self.model)
+        keys = {'id', mapper.get_property_by_column(self.order.element).key}
+        for attribute in attributes:
+            for key in (attribute, '_' + attribute):
+                if key in mapper.column_attrs:
+                    keys.add(key)
+                    break
+
+        self.query = self.query.options(
+            load_only(*[getattr(self.model, column.key)
+                        for column in mapper.column_attrs
+                        if column.key in keys]))
+        narrow_loading_profiles(self.model, attributes)
+
+        return only
+
+    def fetch(self, page, limit):
+        """Retrieves a page of records.
+
+        :param page: Page number, ignored when paged by cursor
+        :type page: int
+        :param limit: Maximum number of records to retrieve
+        :type limit: int
+        :return: The records
+        :rtype: list
+        """
+
+        self.page = page
+        self.limit = limit
+        if self.is_cursor:
+            return self._fetch_keyset(limit)
+        if self.count == ListingCounter.COUNT_NONE:
+            results = list(self.query.limit(limit + 1).offset(
+                (page - 1) * limit))
+            self.more = len(results) > limit
+            return results[:limit]
+        if self.count == ListingCounter.COUNT_WINDOW:
+            rows = list(self.query.add_columns(func.count().over()).limit(
+                limit).offset((page - 1) * limit))
+            if rows:
+                self.total = rows[0][-1]
+            return [row[0] for row in rows]
+        return list(self.query.limit(limit).offset((page - 1) * limit))
+
+    def get_pagination(self, endpoint, **kwargs):
+        """Creates a dictionary with the pagination data of the fetched page:
+        page, limit, total (unless not counted) and next/previous endpoints.
+
+        :param endpoint: A Flask endpoint string used in url_for()
+        :type endpoint: str
+        :param kwargs: Additional keyword arguments to pass to url_for()
+        :return: Pagination data
+        :rtype: dict
+        """
+
+        output = {'limit': self.limit}
+        total = self.total
+        if total is None:
+            total = listing_counter.count(self.query, self.count)
+        if total is not None:
+            output['total'] = total
+
+        if self.is_cursor:
+            output.update(Pager.get_cursor_uris(
+                endpoint, self.limit, self.previous_cursor, self.next_cursor,
+                self.request_args, **kwargs))
+        else:
+            output['page'] = self.page
+            if total is None:
+                # not counted: as many records as there are pages, so far
+                total = (self.page + self.more) * self.limit
+            output.update(Pager.get_uris(
+                endpoint, self.page, self.limit, total, self.request_args,
+                **kwargs))
+
+        return output
+
+    def _fetch_keyset(self, limit):
+        """Retrieves the page of records after (or before) the request's
+        cursor, ordered by the active order and then by ID.
+
+        :param limit: Maximum number of records to retrieve
+        :type limit: int
+        :return: The records
+        :rtype: list
+        """
+
+        column = self.order.element
+        attribute = inspect(self.model).get_property_by_column(column).key
+        backward = not self.request_args.get('after') and bool(
+            self.request_args.get('before'))
+        cursor = self.request_args.get(
+            'before' if backward else 'after') or None
+
+        # records before the cursor are retrieved in reverse order
+        descending = (self.order.modifier is operators.desc_op) != backward
+
+        query = self.query.order_by(None)
+        if attribute == 'id':
+            query = query.order_by(
+                column.desc() if descending else column.asc())
+        else:
+            query = query.order_by(
+                column.desc() if descending else column.asc(),
+                self.model.id.desc() if descending else self.model.id.asc())
+
+        if cursor is not None:
+            try:
+                order_by, value, record_id = Cursor.decode(
+                    cursor, _python_type(column))
+            except ValueError:
+                abort(400)
+            if order_by != self.order_by:
+                abort(400)
+            query = query.filter(self._after(
+                column, attribute, value, record_id, descending))
+
+        results = list(query.limit(limit + 1))
+        more = len(results) > limit
+        results = results[:limit]
+        if backward:
+            results.reverse()
+
+        if results:
+            first = Cursor.encode(self.order_by, getattr(
+                results[0], attribute), results[0].id)
+            last = Cursor.encode(self.order_by, getattr(
+                results[-1], attribute), results[-1].id)
+            if backward:
+                self.previous_cursor = first if more else None
+                self.next_cursor = last
+            else:
+                self.previous_cursor = first if cursor is not None else None
+                self.next_cursor = last if more else None
+
+        return results
+
+    def _after(self, column, attribute, value, record_id, descending):
+        """Creates the criterion matching records ordered after the cursor.
+
+        Non-nullable columns are compared as a row with the ID, which the
+        database can resolve with an index on both columns. NULL values are
+        ordered last ascending and first descending, as PostgreSQL does.
+
+        :param column: The ordering column
+        :type column: sqlalchemy.Column
+        :param attribute: The model attribute of the ordering column
+        :type attribute: str
+        :param value: The cursor's value of the ordering column
+        :param record_id: The cursor's record ID
+        :type record_id: int
+        :param descending: True if ordered descending
+        :type descending: bool
+        :return: The criterion
+        :rtype: sqlalchemy.sql.elements.ClauseElement
+        """
+
+        primary = self.model.id
+        if attribute == 'id':
+            return primary < record_id if descending else primary > record_id
+
+        if value is None:
+            if descending:
+                return or_(column.isnot(None), primary < record_id)
+            return and_(column.is_(None), primary > record_id)
+
+        if descending:
+            criterion = tuple_(column, primary) < tuple_(value, record_id)
+        else:
+            criterion = tuple_(column, primary) > tuple_(value, record_id)
+        if column.nullable and not descending:
+            criterion = or_(criterion, column.is_(None))
+        return criterion
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
@@ -0,0 +1,200 @@
+"""
+Routing helper class for retrieving pages of listings held in memory.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+from flask import abort
+
+from .counter import ListingCounter
+from .cursor import Cursor
+from .pager import Pager
+
+
+class MemoryListing:
+    """Helper for retrieving a page of a listing from records held in
+    memory, already sorted in the requested order, with the same interface
+    and pagination data as `Listing`.
+
+    Records are sorted by the ordering attribute and then by ID, in the
+    database's collation, so that cursors can be exchanged with `Listing`.
+    A cursor pointing at a record that is no longer in memory, or whose
+    ordering value changed, cannot be located: `is_resolved` is then False
+    and the caller should use a `Listing` instead.
+
+    The total is always exact, unless the request's `count` argument is
+    `none`.
+    """
+
+    def __init__(self, records, order_by, attribute, request_args):
+        """Initialize a listing.
+
+        :param records: The listing's records, in the requested order
+        :type records: tuple
+        :param order_by: The requested order, None for the default
+        :type order_by: str | None
+        :param attribute: Name of the ordering attribute of the records
+        :type attribute: str
+        :param request_args: The Flask Request.args object
+        :type request_args: ImmutableMultiDict
+        """
+
+        self.records = records
+        self.order_by = order_by
+        self.attribute = attribute
+        self.request_args = request_args
+        self.count = request_args.get('count', None)
+        self.page = 1
+        self.limit = None
+        self.more = False
+        self.previous_cursor = None
+        self.next_cursor = None
+
+        self.backward = not request_args.get('after') and bool(
+            request_args.get('before'))
+        self.cursor = request_args.get(
+            'before' if self.backward else 'after') or None
+        self.position = None
+        if self.cursor is not None:
+            self.position = self._locate(self.cursor)
+
+    @property
+    def is_cursor(self):
+        """Checks if the listing is paged by cursor.
+
+        :return: True if paged by cursor, False if by page number
+        :rtype: bool
+        """
+
+        return 'after' in self.request_args or 'before' in self.request_args
+
+    @property
+    def is_resolved(self):
+        """Checks if the request's cursor, if any, points at a record held in
+        memory.
+
+        :return: True if the listing can be served from memory
+        :rtype: bool
+        """
+
+        return self.cursor is None or self.position is not None
+
+    def select_fields(self, schema):
+        """Validates the fields requested with the `fields` argument, see
+        `Listing.select_fields()`.
+
+        :param schema: The schema class the records are dumped with
+        :type schema: type
+        :return: Names of the fields to dump, as the schema's `only`
+            argument, None for all fields
+        :rtype: tuple | None
+        """
+
+        only = tuple(sorted({
+            name.strip() for name in self.request_args.get(
+                'fields', '').split(',') if name.strip()}))
+        if not only:
+            return None
+
+        try:
+            schema(only=only)
+        except ValueError:
+            abort(400)
+        return only
+
+    def fetch(self, page, limit):
+        """Retrieves a page of records.
+
+        :param page: Page number, ignored when paged by cursor
+        :type page: int
+        :param limit: Maximum number of records to retrieve
+        :type limit: int
+        :return: The records
+        :rtype: list
+        """
+
+        self.page = page
+        self.limit = limit
+        if not self.is_cursor:
+            start = (page - 1) * limit
+            self.more = len(self.records) > start + limit
+            return list(self.records[start:start + limit])
+
+        if self.backward:
+            end = self.position
+            start = max(end - limit, 0)
+            self.more = start > 0
+        else:
+            start = 0 if self.position is None else self.position + 1
+            end = start + limit
+            self.more = len(self.records) > end
+        results = list(self.records[start:end])
+
+        if results:
+            first = Cursor.encode(self.order_by, getattr(
+                results[0], self.attribute), results[0].id)
+            last = Cursor.encode(self.order_by, getattr(
+                results[-1], self.attribute), results[-1].id)
+            if self.backward:
+                self.previous_cursor = first if self.more else None
+                self.next_cursor = last
+            else:
+                self.previous_cursor = first if self.cursor else None
+                self.next_cursor = last if self.more else None
+
+        return results
+
+    def get_pagination(self, endpoint, **kwargs):
+        """Creates a dictionary with the pagination data of the fetched page,
+        see `Listing.get_pagination()`.
+
+        :param endpoint: A Flask endpoint string used in url_for()
+        :type endpoint: str
+        :param kwargs: Additional keyword arguments to pass to url_for()
+        :return: Pagination data
+        :rtype: dict
+        """
+
+        output = {'limit': self.limit}
+        total = None
+        if self.count != ListingCounter.COUNT_NONE:
+            total = len(self.records)
+            output['total'] = total
+
+        if self.is_cursor:
+            output.update(Pager.get_cursor_uris(
+                endpoint, self.limit, self.previous_cursor, self.next_cursor,
+                self.request_args, **kwargs))
+        else:
+            output['page'] = self.page
+            if total is None:
+                total = (self.page + self.more) * self.limit
+            output.update(Pager.get_uris(
+                endpoint, self.page, self.limit, total, self.request_args,
+                **kwargs))
+
+        return output
+
+    def _locate(self, cursor):
+        """Finds the position of the record a cursor points at.
+
+        :param cursor: The cursor
+        :type cursor: str
+        :return: The record's position, None if not held in memory
+        :rtype: int | None
+        """
+
+        try:
+            order_by, value, record_id = Cursor.decode(cursor)
+        except ValueError:
+            abort(400)
+        if order_by != self.order_by:
+            abort(400)
+
+        for position, record in enumerate(self.records):
+            if record.id == record_id:
+                if getattr(record, self.attribute) == value:
+                    return position
+                return None
+        return None
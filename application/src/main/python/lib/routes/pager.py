@@ -78,3 +78,40 @@ class Pager:
 
         return url_for(endpoint, page=page + 1, limit=limit, _external=True,
                        **kwargs, **request_args)
+
+    @staticmethod
+    def get_cursor_uris(endpoint, limit, previous_cursor, next_cursor,
+                        request_args, **kwargs):
+        """Creates a dictionary with next/previous endpoints for a listing
+        endpoint paged by cursor.
+
+        :param endpoint: A Flask endpoint string used in url_for()
+        :type endpoint: str
+        :param limit: The current listing results limit per page
+        :type limit: int
+        :param previous_cursor: Cursor of the first record of the current
+            page, None if there is no previous page
+        :type previous_cursor: str | None
+        :param next_cursor: Cursor of the last record of the current page,
+            None if there is no next page
+        :type next_cursor: str | None
+        :param request_args: The Flask Request.args object
+        :type request_args: ImmutableMultiDict
+        :param kwargs: Additional keyword arguments to pass to url_for()
+        """
+
+        output = {}
+        args = {k: v for (k, v) in request_args.items()
+                if k not in ('app_key', 'after', 'before')}
+
+        if previous_cursor is not None:
+            output['previous_uri'] = url_for(
+                endpoint, page=1, limit=limit, before=previous_cursor,
+                _external=True, **kwargs, **args)
+
+        if next_cursor is not None:
+            output['next_uri'] = url_for(
+                endpoint, page=1, limit=limit, after=next_cursor,
+                _external=True, **kwargs, **args)
+
+        return output
@@ -14,6 +14,10 @@ class Query:
     STATUS_FILTER_USER = 1
     STATUS_FILTER_ADMIN = 2
 
+    SEARCH_CONTAINS = 'contains'
+    SEARCH_PREFIX = 'prefix'
+    SEARCH_EXACT = 'exact'
+
     @staticmethod
     def make(model, default_order, order_options, request_args, status_filter):
         """Generates a query object for a sqlalchemy model with optional
@@ -46,6 +50,40 @@ class Query:
 
         return query
 
+    @staticmethod
+    def search(column, value, mode=None):
+        """Generates a criterion for searching a text column, in one of
+        several modes:
+
+        - `contains`: the column contains the value, ignoring case; resolved
+          with the column's trigram index, see `trigram_index()`
+        - `prefix`: the column starts with the value; resolved with the
+          column's btree index under the C collation, with its trigram index
+          otherwise
+        - `exact`: the column equals the value; resolved with the column's
+          btree index
+
+        Wildcards in the value are matched literally.
+
+        :param column: The column to search
+        :type column: sqlalchemy.Column
+        :param value: The value to search for
+        :type value: str
+        :param mode: The search mode, None for `contains`
+        :type mode: str | None
+        :return: The criterion
+        :rtype: sqlalchemy.sql.elements.BinaryExpression
+        """
+
+        if mode == Query.SEARCH_EXACT:
+            return column == value
+
+        value = value.replace('\\', '\\\\').replace(
+            '%', '\\%').replace('_', '\\_')
+        if mode == Query.SEARCH_PREFIX:
+            return column.like(value + '%', escape='\\')
+        return column.ilike('%' + value + '%', escape='\\')
+
     @staticmethod
     def _filter_status(query, model, status_filter, status):
         """Adds filtering by status to query.
@@ -0,0 +1,225 @@
+"""
+Routing helper class for serving pre-rendered, compressed responses.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+from functools import wraps
+
+from flask import Response, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from lib.cache import TTLCache
+from lib.cache.version_stamp import VersionStamp
+
+# brotli compression is optional
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class RenderedResponses:
+    """Process-wide cache of the rendered 200 responses of public routes
+    whose data rarely changes, used as a decorator on the routes:
+
+        rendered = RenderedResponses('locations', Country, Region)
+
+        @rendered
+        def get_countries(page=1, limit=250):
+
+    A response is rendered once per variant (URL root, path and arguments
+    but the application key) and stored as bytes, along with gzip and, if
+    the `brotli` package is installed, brotli compressed copies. Later
+    requests of the variant are answered from the cache, in the encoding
+    negotiated with `Accept-Encoding`, without running the route; a request
+    whose `If-None-Match` matches the cached ETag gets a 304. Responses carry
+    `Cache-Control: public, no-cache`, so that clients and CDNs revalidate
+    them with their ETag on every use (or `public, max-age=<max_age>` to let
+    them serve stale copies that long), and `Vary: Accept-Encoding`.
+
+    Writes to the watched models bump a version stamp shared by all the
+    processes on the host, which every request compares to the version its
+    process last saw to drop the cache. Entries also expire after `ttl`
+    seconds, to pick up changes made on other hosts.
+    """
+
+    ENCODINGS = ('br', 'gzip', 'identity')
+
+    def __init__(self, name, *models):
+        """Initialize a disabled cache, see `init_app()`.
+
+        :param name: Name of the cache, used for its version stamp file
+        :type name: str
+        :param models: SQLAlchemy database models whose writes drop the cache
+        """
+
+        self.name = name
+        self.enabled = False
+        self.max_age = 0
+        self.entries = TTLCache(0, 0)
+        self.stamp = VersionStamp()
+        self._version = None
+
+        for model in models:
+            for identifier in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, identifier, self._mark_changed)
+
+    def init_app(self, app):
+        """Configure the cache for a Flask application.
+
+        :param app: The Flask application instance
+        :type app: Flask
+        """
+
+        self.enabled = app.config.get('RENDERED_RESPONSES_ENABLED', False)
+        self.max_age = app.config.get('RENDERED_RESPONSES_MAX_AGE', 0)
+        self.entries = TTLCache(
+            app.config.get('RENDERED_RESPONSES_SIZE', 1000),
+            app.config.get('RENDERED_RESPONSES_TTL', 30))
+        self.stamp = VersionStamp(os.path.join(
+            app.config.get('RENDERED_RESPONSES_STAMP_DIR') or
+            tempfile.gettempdir(),
+            'api_responses_{}.stamp'.format(self.name)))
+        self._version = None
+
+    def __call__(self, view):
+        """Serves the route's responses from the cache.
+
+        :param view: The route's view function
+        :type view: function
+        :return: The wrapped view function
+        :rtype: function
+        """
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            version = self.stamp.get()
+            if version != self._version:
+                self.entries.clear()
+                self._version = version
+
+            key = (request.url_root, request.path, tuple(sorted(
+                (name, value) for name, value in request.args.items(
+                    multi=True) if name != 'app_key')))
+            entry = self.entries.get(key)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if (response.status_code != 200 or
+                        response.direct_passthrough or
+                        response.is_streamed):
+                    return response
+                entry = self.render(response)
+                self.entries.set(key, entry)
+
+            return self.respond(entry)
+
+        return wrapper
+
+    @staticmethod
+    def render(response):
+        """Creates the cache entry of a response.
+
+        :param response: The route's response
+        :type response: flask.Response
+        :return: The cache entry: headers and bodies by encoding
+        :rtype: dict
+        """
+
+        body = response.get_data()
+        etag, _ = response.get_etag()
+        if etag is None:
+            etag = hashlib.sha1(body).hexdigest()
+
+        bodies = {'identity': body,
+                  'gzip': gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            bodies['br'] = brotli.compress(body)
+
+        return {
+            'mimetype': response.mimetype,
+            'etag': etag,
+            'last_modified': response.last_modified,
+            'bodies': bodies,
+        }
+
+    def respond(self, entry):
+        """Creates the response of the current request from a cache entry.
+
+        :param entry: The cache entry
+        :type entry: dict
+        :return: The response
+        :rtype: flask.Response
+        """
+
+        if request.if_none_match.contains_weak(entry['etag']):
+            response = Response(status=304)
+        else:
+            encoding = request.accept_encodings.best_match(
+                [encoding for encoding in self.ENCODINGS
+                 if encoding in entry['bodies']], 'identity')
+            response = Response(entry['bodies'][encoding],
+                                mimetype=entry['mimetype'])
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(entry['etag'], weak=True)
+        if entry['last_modified'] is not None:
+            response.last_modified = entry['last_modified']
+        response.headers['Cache-Control'] = 'public, {}'.format(
+            'max-age={}'.format(self.max_age) if self.max_age else 'no-cache')
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def invalidate(self):
+        """Drops the cache in all processes, after a watched model was
+        written."""
+
+        self.entries.clear()
+        self.stamp.bump()
+
+    def _mark_changed(self, mapper, connection, target):
+        """Flags the session writing a watched model, so the cache is
+        invalidated once the change is committed.
+
+        :param mapper: The model's mapper
+        :param connection: The database connection
+        :param target: The record being written
+        """
+        # pylint: disable=unused-argument
+
+        object_session(target).info.setdefault(
+            'rendered_changed', set()).add(self)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_rendered_responses(session):
+    """Invalidates the caches of the models written by a commit.
+
+    :param session: The committed session
+    :type session: Session
+    """
+
+    for rendered in session.info.pop('rendered_changed', ()):
+        rendered.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_rendered_changed(session):
+    """Clears the flags set by `RenderedResponses._mark_changed()` on
+    rollback.
+
+    :param session: The rolled back session
+    :type session: Session
+    """
+
+    session.info.pop('rendered_changed', None)
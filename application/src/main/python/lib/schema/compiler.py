@@ -0,0 +1,239 @@
+"""
+Compiler of schemas into specialized dump functions.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import re
+import weakref
+from importlib.metadata import version
+
+from flask import url_for
+from flask_marshmallow.fields import URLFor, AbsoluteURLFor
+from marshmallow import Schema, fields, missing
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+from werkzeug.routing import BuildError
+
+# marshmallow versions the compiler was checked against (it reads the dump
+# processors of schemas from their internals); with other versions, schemas
+# are not compiled and `Schema.dump()` is used
+MARSHMALLOW_VERSIONS = ('3.13',)
+SUPPORTED = '.'.join(
+    version('marshmallow').split('.')[:2]) in MARSHMALLOW_VERSIONS
+
+# compiled dump functions by schema instance
+_compiled = weakref.WeakKeyDictionary()
+
+# sentinel values of URL templates, see `_compile_url()`
+_URL_SENTINEL_INT = 918273645546372819
+_URL_SENTINEL_STR = 'zq918273645546372819qz'
+_URL_SAFE = re.compile(r'^[A-Za-z0-9_.-]+$')
+_URL_VARIABLE = re.compile(r'\s*<\s*(\S*)\s*>\s*')
+
+
+def dump(schema, obj, many=None):
+    """Serializes objects with the compiled dump function of a schema, same
+    as `schema.dump(obj, many=many)`.
+
+    :param schema: The schema instance
+    :type schema: marshmallow.Schema
+    :param obj: The object(s) to serialize
+    :param many: Whether to serialize `obj` as a collection, None for the
+        schema's `many`
+    :type many: bool | None
+    :return: Serialized data
+    :rtype: dict | list
+    """
+
+    return compile_schema(schema)(obj, many)
+
+
+def compile_schema(schema):
+    """Compiles a schema instance into a function with the output of its
+    `dump()` method, cached on the instance.
+
+    The dump fields of the schema, after `Meta.fields`, `only`, `exclude`,
+    `load_only` and the `only` of nested fields were applied, are resolved
+    once; each field is turned into a closure reading the attribute and
+    formatting the value directly. Nested schemas are compiled too, and the
+    URL of an `URLFor` field is built once per call and completed with each
+    object's value. Fields of other types are serialized by marshmallow.
+
+    Schemas with `pre_dump` or `post_dump` processors or a custom
+    `get_attribute()` are not compiled, nor are objects that support item
+    access (i.e.: dicts), nor any schema with a marshmallow version not in
+    `MARSHMALLOW_VERSIONS`: their `dump()` method is used instead.
+
+    :param schema: The schema instance
+    :type schema: marshmallow.Schema
+    :return: The dump function, taking the object(s) and `many`
+    :rtype: function
+    """
+
+    function = _compiled.get(schema)
+    if function is None:
+        function = _compiled[schema] = _compile(schema)
+    return function
+
+
+def _compile(schema):
+    # pylint: disable=protected-access
+    if (not SUPPORTED or
+            type(schema).get_attribute is not Schema.get_attribute or
+            schema._has_processors(PRE_DUMP) or
+            schema._has_processors(POST_DUMP)):
+        return lambda obj, many=None: schema.dump(obj, many=many)
+
+    dict_class = schema.dict_class
+    writers = [(field.data_key if field.data_key is not None else name,
+                _compile_field(schema, name, field))
+               for name, field in schema.dump_fields.items()]
+
+    def dump_one(obj, urls):
+        if hasattr(obj, '__getitem__'):
+            return schema.dump(obj, many=False)
+        ret = dict_class()
+        for key, writer in writers:
+            value = writer(obj, urls)
+            if value is not missing:
+                ret[key] = value
+        return ret
+
+    def dump_many(obj, many, urls):
+        if many and obj is not None:
+            return [dump_one(item, urls) for item in obj]
+        return dump_one(obj, urls)
+
+    def dump_function(obj, many=None):
+        many = schema.many if many is None else bool(many)
+        return dump_many(obj, many, {})
+
+    dump_function.dump_many = dump_many
+    return dump_function
+
+
+def _compile_field(schema, name, field):
+    # pylint: disable=too-many-return-statements,unused-argument
+    field_type = type(field)
+    if field_type in (URLFor, AbsoluteURLFor):
+        return _compile_url(field, name)
+
+    attribute = field.attribute or name
+    if not isinstance(attribute, str) or '.' in attribute:
+        return _generic(schema, name, field)
+
+    if field_type in (fields.String, fields.Email):
+        def format_value(value, urls):
+            if value is None:
+                return None
+            if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+                return value
+            if isinstance(value, bytes):
+                return value.decode('utf-8')
+            return str(value)
+    elif field_type is fields.Integer:
+        as_string = field.as_string
+
+        def format_value(value, urls):
+            if value is None:
+                return None
+            return str(int(value)) if as_string else int(value)
+    elif field_type is fields.Boolean:
+        truthy, falsy = field.truthy, field.falsy
+
+        def format_value(value, urls):
+            if value is None:
+                return None
+            try:
+                if value in truthy:
+                    return True
+                if value in falsy:
+                    return False
+            except TypeError:
+                pass
+            return bool(value)
+    elif field_type is fields.DateTime:
+        data_format = field.format or field.DEFAULT_FORMAT
+        function = field.SERIALIZATION_FUNCS.get(data_format)
+
+        def format_value(value, urls):
+            if value is None:
+                return None
+            if function is not None:
+                return function(value)
+            return value.strftime(data_format)
+    elif field_type is fields.Nested:
+        nested = field.schema
+        nested_many = bool(nested.many or field.many)
+        nested_dump = compile_schema(nested)
+        dump_many = getattr(nested_dump, 'dump_many', None)
+
+        def format_value(value, urls):
+            if value is None:
+                return None
+            if dump_many is None:
+                return nested_dump(value, nested_many)
+            return dump_many(value, nested_many, urls)
+    else:
+        return _generic(schema, name, field)
+
+    default = field.dump_default
+
+    def writer(obj, urls):
+        value = getattr(obj, attribute, missing)
+        if value is missing:
+            value = default() if callable(default) else default
+            if value is missing:
+                return value
+        return format_value(value, urls)
+
+    return writer
+
+
+def _compile_url(field, name):
+    variables = []
+    for key, value in field.values.items():
+        match = _URL_VARIABLE.match(str(value))
+        if match and match.group(1):
+            variables.append((key, match.group(1)))
+    if len(variables) != 1 or '.' in variables[0][1]:
+        return lambda obj, urls: field.serialize(name, obj)
+
+    key, attribute = variables[0]
+    static = {k: v for k, v in field.values.items() if k != key}
+
+    def template(sentinel):
+        try:
+            url = url_for(field.endpoint, **static, **{key: sentinel})
+        except (BuildError, ValueError, TypeError):
+            return None
+        parts = url.split(str(sentinel))
+        return tuple(parts) if len(parts) == 2 else None
+
+    def writer(obj, urls):
+        value = getattr(obj, attribute, missing)
+        if value is None:
+            return None
+        value_type = type(value)
+        if value_type is int:
+            sentinel = _URL_SENTINEL_INT
+        elif value_type is str and _URL_SAFE.match(value):
+            sentinel = _URL_SENTINEL_STR
+        else:
+            return field.serialize(name, obj)
+
+        cache_key = (id(field), value_type)
+        parts = urls.get(cache_key, missing)
+        if parts is missing:
+            parts = urls[cache_key] = template(sentinel)
+        if parts is None:
+            return field.serialize(name, obj)
+        return parts[0] + str(value) + parts[1]
+
+    return writer
+
+
+def _generic(schema, name, field):
+    accessor = schema.get_attribute
+    return lambda obj, urls: field.serialize(name, obj, accessor=accessor)
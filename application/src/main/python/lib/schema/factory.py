@@ -0,0 +1,51 @@
+"""
+Factory of shared schema instances.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+from lib.cache import TTLCache
+
+# configured schema instances, evicted when unused
+_schemas = TTLCache(1024, float('inf'))
+
+
+def get_schema(schema_class, *, only=None, exclude=(), many=False,
+               partial=False):
+    """Retrieves the process-wide instance of a schema class configured with
+    the given options, creating it on the first call.
+
+    Building a schema resolves its nested schemas from the class registry
+    and its field maps, which is done once per configuration instead of once
+    per request. Schema instances hold no per-call state (their context is
+    not used), so the instance is shared by all requests and threads; the
+    compiled dump function of `lib.schema.compiler` is cached for it too.
+
+    :param schema_class: The schema class
+    :type schema_class: type
+    :param only: Names of the fields to include, None for all
+    :type only: tuple | list | None
+    :param exclude: Names of the fields to exclude
+    :type exclude: tuple | list
+    :param many: Whether the schema works on collections
+    :type many: bool
+    :param partial: Whether to ignore missing fields on load, or the names of
+        the fields to ignore
+    :type partial: bool | tuple | list
+    :return: The schema instance
+    :rtype: marshmallow.Schema
+    """
+
+    only = None if only is None else tuple(only)
+    exclude = tuple(exclude)
+    many = bool(many)
+    partial = partial if isinstance(partial, bool) else tuple(partial)
+
+    key = (schema_class, only, exclude, many, partial)
+    schema = _schemas.get(key)
+    if schema is None:
+        schema = schema_class(only=only, exclude=exclude, many=many,
+                              partial=partial)
+        _schemas.set(key, schema)
+    return schema
@@ -120,3 +120,143 @@ def exists(errors, model, field, pkey, *, missing_error=None,
                         record.append(record_item)
 
     return errors, record
+
+
+def unique_many(errors, model, field, values, *, updates=None):
+    """Validates that a field is unique for a batch of records, with a single
+    query. Values repeated within the batch are errors after their first
+    occurrence.
+
+    :param errors: The existing error maps, one per record
+    :type errors: list
+    :param model: The SQLAlchemy database model to check against
+    :type model: flask_sqlalchemy.Model
+    :param field: The model's property to check
+    :type field: sqlalchemy.orm.attributes.InstrumentedAttribute
+    :param values: The new values to check, one per record, None to skip
+    :type values: list
+    :param updates: Existing instances of the records, one per record, None
+        for new records
+    :type updates: list
+    :return: The updated error maps
+    :rtype: list
+    """
+
+    updates = updates or [None] * len(values)
+    values = [None if update is not None and getattr(update, field.name) ==
+              value else value for value, update in zip(values, updates)]
+
+    return _unique_many(errors, model, field, field.name, values, updates)
+
+
+def unique_email_many(errors, model, field, values, *, updates=None):
+    """Validates that the email field is unique for a batch of records by
+    comparing hashes, with a single query.
+
+    :param errors: The existing error maps, one per record
+    :type errors: list
+    :param model: The SQLAlchemy database model to check against
+    :type model: flask_sqlalchemy.Model
+    :param field: The model's property to check
+    :type field: sqlalchemy.orm.attributes.InstrumentedAttribute
+    :param values: The new values to check, one per record, None to skip
+    :type values: list
+    :param updates: Existing instances of the records, one per record, None
+        for new records
+    :type updates: list
+    :return: The updated error maps
+    :rtype: list
+    """
+
+    updates = updates or [None] * len(values)
+    digests = [
+        model(email=value).email_digest if isinstance(value, str) and (
+            update is None or getattr(update, field.name) != value) else None
+        for value, update in zip(values, updates)]
+
+    return _unique_many(errors, model, model.email_digest, field.name,
+                        digests, updates)
+
+
+def _unique_many(errors, model, column, name, values, updates):
+    """Adds the errors for values, None to skip, that are repeated within
+    the batch or taken by records other than the ones updated."""
+
+    existing = {}
+    if any(value is not None for value in values):
+        existing = {
+            value: record_id for value, record_id in model.query.with_entities(
+                column, model.id).filter(column.in_(
+                    {value for value in values if value is not None}))}
+
+    seen = set()
+    for record_errors, value, update in zip(errors, values, updates):
+        if value is None:
+            continue
+        if value in seen or existing.get(value, None) not in (
+                None, getattr(update, 'id', None)):
+            record_errors.setdefault(name, [])
+            record_errors[name].append("Value must be unique.")
+        seen.add(value)
+
+    return errors
+
+
+def exists_many(errors, model, field, pkeys, *, missing_error=None,
+                invalid_error=None):
+    """Validates that the related records (via IDs) of a batch of records
+    exist in the database, with a single query.
+
+    :param errors: The existing error maps, one per record
+    :type errors: list
+    :param model: The SQLAlchemy database model to check against
+    :type model: flask_sqlalchemy.Model
+    :param field: The property being checked
+    :type field: str
+    :param pkeys: The lists of IDs of the records that should exist, one per
+        record
+    :type pkeys: list
+    :param missing_error: Error message if IDs are missing
+    :type missing_error: str
+    :param invalid_error: Error message if an ID is not valid
+    :type invalid_error: str
+    :return: The updated error maps; the existing records, one list per
+        record
+    :rtype: (list, list)
+    """
+
+    if missing_error is None:
+        missing_error = "Missing data for required field."
+
+    if invalid_error is None:
+        invalid_error = "Invalid value."
+
+    def is_id(value):
+        return isinstance(value, int) or (isinstance(value, str)
+                                          and value.isnumeric())
+
+    ids = {int(record_id) for record_ids in pkeys
+           if isinstance(record_ids, list)
+           for record_id in record_ids if is_id(record_id)}
+    found = {}
+    if ids:
+        found = {record.id: record for record in model.query.filter(
+            model.id.in_(ids))}
+
+    records = []
+    for record_errors, record_ids in zip(errors, pkeys):
+        if not record_ids:
+            record_errors.setdefault(field, [])
+            record_errors[field].append(missing_error)
+            records.append(None)
+        elif isinstance(record_ids, list):
+            records.append([found[int(record_id)] for record_id in record_ids
+                            if is_id(record_id) and int(record_id) in found])
+            if any(is_id(record_id) and int(record_id) not in found
+                   for record_id in record_ids):
+                record_errors.setdefault(field, [])
+                record_errors[field].append(invalid_error)
+        else:
+            records.append(None)
+
+    return errors, records
@@ -0,0 +1,357 @@
+"""
+Write-behind batch writer for append-only records.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, exc
+
+from init_dep import db
+
+
+class BatchWriter:
+    """Buffers new records of a model and inserts them in bulk, on a
+    background thread, once `batch_size` records are pending or `interval`
+    seconds have passed.
+
+    Every buffered record is first appended to a spool file of the current
+    process, which is deleted once its records are inserted. Spool files left
+    behind by processes that died are picked up by the next process to write.
+    Pending records are flushed when the process exits.
+
+    Records that cannot be inserted, see `flush()`, are logged and appended
+    to a rejects file of the process, `<table>.<pid>.rejected`, in the spool
+    directory.
+    """
+
+    def __init__(self, model, fields):
+        """Initialize a writer inserting synchronously, see `init_app()`.
+
+        :param model: The model to insert records of
+        :type model: db.Model
+        :param fields: Names of the columns to insert
+        :type fields: tuple
+        """
+
+        self.model = model
+        self.fields = tuple(fields)
+        self.app = None
+        self.enabled = False
+        self.batch_size = 500
+        self.interval = 1.0
+        self.spool_dir = None
+        self.fsync = False
+        self.retries = 10
+        self._failures = 0
+        self._rows = []
+        self._spools = []
+        self._spool = None
+        self._spool_seq = 0
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        atexit.register(self.close)
+
+    def init_app(self, app):
+        """Configure the writer for a Flask application.
+
+        :param app: The Flask application instance
+        :type app: Flask
+        """
+
+        self.close()
+        prefix = self.model.__tablename__.upper() + '_WRITER_'
+        self.app = app
+        self.enabled = app.config.get(prefix + 'ENABLED', False)
+        self.batch_size = app.config.get(prefix + 'BATCH_SIZE', 500)
+        self.interval = app.config.get(prefix + 'INTERVAL', 1.0)
+        self.spool_dir = (app.config.get(prefix + 'SPOOL_DIR')
+                          or tempfile.gettempdir())
+        self.fsync = app.config.get(prefix + 'FSYNC', False)
+        self.retries = app.config.get(prefix + 'RETRIES', 10)
+
+    def add(self, record):
+        """Queues a new record for insertion.
+
+        :param record: The record to insert, it is not added to the session
+        :type record: db.Model
+        """
+
+        row = {field: getattr(record, field) for field in self.fields}
+        with self._lock:
+            self._start()
+            self._spool.write(json.dumps(row, default=_encode) + '\n')
+            self._spool.flush()
+            if self.fsync:
+                os.fsync(self._spool.fileno())
+            self._rows.append(row)
+            if len(self._rows) >= self.batch_size:
+                self._wakeup.notify()
+
+    def flush(self):
+        """Inserts all pending records.
+
+        When the batch fails on a transient error (i.e.: a lost connection)
+        the records stay pending, and spooled, for the next try, until
+        `retries` tries in a row have failed: the records are then rejected.
+        On any other error (i.e.: a constraint violation) the records are
+        inserted one by one, and only those that still fail are rejected.
+
+        :return: True if all pending records were inserted, False otherwise
+        :rtype: bool
+        """
+
+        with self._lock:
+            if not self._rows or self._pid != os.getpid():
+                return True
+            rows, self._rows = self._rows, []
+            spools, self._spools = self._spools + [self._rotate()], []
+
+        try:
+            self._insert(rows)
+        except exc.SQLAlchemyError as error:
+            if _is_transient(error):
+                return self._retry(rows, spools, error)
+            self.app.logger.warning(
+                "Failed to insert %d %s records, inserting them one by one: "
+                "%s", len(rows), self.model.__tablename__, error)
+            return self._insert_each(rows, spools)
+
+        self._failures = 0
+        _remove(spools)
+        return True
+
+    def close(self):
+        """Stops the background thread and flushes pending records."""
+
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._wakeup.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self.flush()
+
+        # records that could not be flushed remain in the spool files, to be
+        # adopted once this process exits
+        with self._lock:
+            if self._spool is not None:
+                self._spool.close()
+            self._spool = None
+            self._pid = None
+
+    def _insert(self, rows):
+        with db.get_engine(self.app).begin() as connection:
+            connection.execute(self.model.__table__.insert(), rows)
+
+    def _insert_each(self, rows, spools):
+        """Inserts records one at a time, rejecting those that fail.
+
+        :param rows: The records
+        :type rows: list
+        :param spools: Paths of the spool files covering the records
+        :type spools: list
+        :return: True if all records were inserted, False otherwise
+        :rtype: bool
+        """
+
+        rejected = []
+        for index, row in enumerate(rows):
+            try:
+                self._insert([row])
+            except exc.SQLAlchemyError as error:
+                if not _is_transient(error):
+                    rejected.append(row)
+                    self._reject([row], error)
+                    continue
+
+                # the spool files also cover the records already inserted,
+                # the remaining ones are spooled again
+                remaining = rows[index:]
+                with self._lock:
+                    for pending in remaining:
+                        self._spool.write(
+                            json.dumps(pending, default=_encode) + '\n')
+                    self._spool.flush()
+                _remove(spools)
+                return self._retry(remaining, [], error)
+
+        self._failures = 0
+        _remove(spools)
+        return not rejected
+
+    def _retry(self, rows, spools, error):
+        """Puts records back in the queue after a transient error, or rejects
+        them once `retries` tries in a row have failed.
+
+        :param rows: The records
+        :type rows: list
+        :param spools: Paths of the spool files covering the records
+        :type spools: list
+        :param error: The error of the last try
+        :type error: sqlalchemy.exc.SQLAlchemyError
+        :return: False
+        :rtype: bool
+        """
+
+        self._failures += 1
+        if self._failures >= self.retries:
+            self.app.logger.error(
+                "Failed to insert %d %s records after %d tries.", len(rows),
+                self.model.__tablename__, self._failures)
+            self._failures = 0
+            self._reject(rows, error)
+            _remove(spools)
+            return False
+
+        self.app.logger.warning(
+            "Failed to insert %d %s records, will retry: %s", len(rows),
+            self.model.__tablename__, error)
+        with self._lock:
+            self._rows[:0] = rows
+            self._spools[:0] = spools
+        return False
+
+    def _reject(self, rows, error):
+        """Logs records that cannot be inserted and appends them to the
+        rejects file of the process.
+
+        :param rows: The records
+        :type rows: list
+        :param error: The error of their last try
+        :type error: sqlalchemy.exc.SQLAlchemyError
+        """
+
+        lines = [json.dumps(row, default=_encode) + '\n' for row in rows]
+        for line in lines:
+            self.app.logger.error("Rejected %s record %s: %s",
+                                  self.model.__tablename__, line.rstrip(),
+                                  getattr(error, 'orig', None) or error)
+        with self._lock:
+            with open(os.path.join(self.spool_dir, '%s.%d.rejected' % (
+                    self.model.__tablename__, os.getpid())), 'a',
+                    encoding='utf-8') as rejects:
+                rejects.writelines(lines)
+                rejects.flush()
+                if self.fsync:
+                    os.fsync(rejects.fileno())
+
+    def _start(self):
+        """Opens the spool file and starts the background thread of the
+        current process, adopting orphaned spool files. Requires the lock.
+
+        Runs lazily so that forked application workers (i.e.: uWSGI) each
+        get their own.
+        """
+
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._rows = []
+        self._spools = []
+        self._spool = open(self._spool_path(), 'a', encoding='utf-8')
+        self._recover()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Background thread flushing pending records."""
+
+        while True:
+            with self._lock:
+                if self._thread is not threading.current_thread():
+                    return
+                if len(self._rows) < self.batch_size:
+                    self._wakeup.wait(self.interval)
+            self.flush()
+
+    def _spool_path(self, suffix=''):
+        return os.path.join(self.spool_dir, '%s.%d.spool%s' % (
+            self.model.__tablename__, os.getpid(), suffix))
+
+    def _rotate(self):
+        """Starts a new spool file, returning the path of the previous one,
+        which covers all pending records. Requires the lock.
+
+        :return: Path of the closed spool file
+        :rtype: str
+        """
+
+        self._spool.close()
+        self._spool_seq += 1
+        path = self._spool_path(suffix='.%d' % self._spool_seq)
+        os.rename(self._spool_path(), path)
+        self._spool = open(self._spool_path(), 'a', encoding='utf-8')
+        return path
+
+    def _recover(self):
+        """Adopts the spool files of processes that are no longer running.
+        Requires the lock."""
+
+        pattern = os.path.join(self.spool_dir, '%s.*.spool*' % (
+            self.model.__tablename__))
+        for path in sorted(glob.glob(pattern)):
+            pid = int(os.path.basename(path).split('.')[1])
+            if pid == os.getpid() or _is_running(pid):
+                continue
+
+            # claim the file so no other process adopts it
+            self._spool_seq += 1
+            claimed = self._spool_path(suffix='.%d' % self._spool_seq)
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            with open(claimed, encoding='utf-8') as spool:
+                for line in spool:
+                    if line.endswith('\n'):
+                        self._rows.append(self._decode(json.loads(line)))
+            self._spools.append(claimed)
+
+    def _decode(self, row):
+        columns = self.model.__table__.c
+        for field, value in row.items():
+            if value is not None and isinstance(
+                    columns[field].type, (DateTime, Date)):
+                row[field] = columns[field].type.python_type.fromisoformat(
+                    value)
+        return row
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(repr(value))
+
+
+def _is_transient(error):
+    return isinstance(error, (exc.OperationalError, exc.InterfaceError,
+                              exc.DisconnectionError, exc.TimeoutError)) or \
+        getattr(error, 'connection_invalidated', False)
+
+
+def _remove(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,213 @@
+"""
+Per-route relationship loading profiles.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+from functools import wraps
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, defaultload, joinedload, lazyload, \
+    noload, raiseload, selectinload, subqueryload
+
+# loader option of each strategy, for the first and for chained relationships
+STRATEGIES = {
+    'select': (lazyload, 'lazyload'),
+    'selectin': (selectinload, 'selectinload'),
+    'joined': (joinedload, 'joinedload'),
+    'subquery': (subqueryload, 'subqueryload'),
+    'noload': (noload, 'noload'),
+    'raise': (raiseload, 'raiseload'),
+}
+
+
+class LoadingProfile:
+    """Declares how the relationships of a model are loaded while a route
+    runs, used as a decorator on the route:
+
+        @LoadingProfile(User, selectin=('roles', 'terms_of_services'),
+                        joined=('profile',))
+        def get_user(user_id):
+
+    Relationships are given by name, with dots for the relationships of
+    related models, grouped by strategy: `select` (lazy), `selectin`,
+    `joined`, `subquery`, `noload` and `raise`. The options are added to
+    every query selecting the model as an entity while the route runs,
+    including the ones of `Query.make()` and of `query.get()`; queries of
+    its columns only (i.e.: `with_entities()`) are left as is.
+
+    If `LOADING_PROFILE_ASSERT` is enabled, a relationship of the model that
+    is lazily loaded while the route runs, but is not declared, raises an
+    `AssertionError`.
+    """
+
+    def __init__(self, model, **strategies):
+        """Initialize the profile.
+
+        :param model: SQLAlchemy database model
+        :type model: flask_sqlalchemy.Model
+        :param strategies: Relationship names by loading strategy
+        :raises ValueError: If a strategy is unknown
+        """
+
+        self.model = model
+        self.paths = {}
+        for strategy, paths in strategies.items():
+            if strategy not in STRATEGIES:
+                raise ValueError('Unknown loading strategy: {}'.format(
+                    strategy))
+            for path in paths:
+                self.paths[path] = strategy
+
+    def __call__(self, view):
+        """Activates the profile while a route runs.
+
+        :param view: The route's view function
+        :type view: function
+        :return: The wrapped view function
+        :rtype: function
+        """
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            previous = g.get('loading_profiles', ())
+            g.loading_profiles = previous + (self,)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                g.loading_profiles = previous
+
+        return wrapper
+
+    def options(self):
+        """Creates the loader options of the profile.
+
+        :return: Loader options
+        :rtype: list
+        """
+
+        options = []
+        for path in sorted(self.paths):
+            option = None
+            mapper = inspect(self.model)
+            keys = path.split('.')
+            for i, key in enumerate(keys):
+                relationship = mapper.relationships[key]
+                strategy = self.paths.get('.'.join(keys[:i + 1]))
+                attribute = getattr(mapper.class_, key)
+                if option is None:
+                    option = (STRATEGIES[strategy][0] if strategy
+                              else defaultload)(attribute)
+                else:
+                    option = getattr(option, STRATEGIES[strategy][1]
+                                     if strategy else 'defaultload')(
+                                         attribute)
+                mapper = relationship.mapper
+            options.append(option)
+        return options
+
+    def narrow(self, keys):
+        """Creates a copy of the profile limited to some relationships of the
+        model, and theirs.
+
+        :param keys: Names of the model's relationships to keep
+        :type keys: iterable
+        :return: The narrowed profile
+        :rtype: LoadingProfile
+        """
+
+        keys = set(keys)
+        profile = LoadingProfile(self.model)
+        profile.paths = {path: strategy for path, strategy
+                         in self.paths.items() if path.split('.')[0] in keys}
+        return profile
+
+    def covers(self, path):
+        """Checks if a relationship is declared.
+
+        :param path: Dotted relationship names, from the model
+        :type path: str
+        :return: True if declared, False otherwise
+        :rtype: bool
+        """
+
+        return path in self.paths
+
+
+def narrow_loading_profiles(model, keys):
+    """Limits the active loading profiles of a model to some of its
+    relationships, until the route returns.
+
+    :param model: SQLAlchemy database model
+    :type model: flask_sqlalchemy.Model
+    :param keys: Names of the model's relationships to keep
+    :type keys: iterable
+    """
+
+    if 'loading_profiles' in g:
+        g.loading_profiles = tuple(
+            profile.narrow(keys) if profile.model is model else profile
+            for profile in g.loading_profiles)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def apply_loading_profiles(orm_execute_state):
+    """Adds the loader options of the active loading profiles to queries of
+    their models, and checks lazy loads against them.
+
+    :param orm_execute_state: The statement being executed
+    :type orm_execute_state: sqlalchemy.orm.ORMExecuteState
+    """
+
+    if not has_app_context() or not g.get('loading_profiles'):
+        return
+
+    if orm_execute_state.lazy_loaded_from is not None:
+        if current_app.config.get('LOADING_PROFILE_ASSERT', False):
+            _assert_lazy_load(orm_execute_state)
+
+    elif (orm_execute_state.is_select and
+          not orm_execute_state.is_relationship_load):
+        entities = _entities(orm_execute_state.statement)
+        options = [option for profile in g.loading_profiles
+                   if profile.model in entities
+                   for option in profile.options()]
+        if options:
+            orm_execute_state.statement = \
+                orm_execute_state.statement.options(*options)
+
+
+def _entities(statement):
+    """Gets the models selected as ORM entities by a statement; the models of
+    column expressions (i.e.: `query.with_entities(Model.id)`) are left out,
+    loader options do not apply to them.
+
+    :param statement: The statement being executed
+    :return: The models
+    :rtype: set
+    """
+
+    return {description['entity'] for description
+            in getattr(statement, 'column_descriptions', ())
+            if description['entity'] is not None and
+            description['expr'] is description['entity']}
+
+
+def _assert_lazy_load(orm_execute_state):
+    """Raises an AssertionError for a lazy load of a relationship that an
+    active loading profile of its model does not declare.
+
+    :param orm_execute_state: The lazy load being executed
+    :type orm_execute_state: sqlalchemy.orm.ORMExecuteState
+    """
+
+    path = orm_execute_state.loader_strategy_path.path
+    root = path[0].class_
+    names = '.'.join(prop.key for prop in path[1::2])
+    for profile in g.loading_profiles:
+        if profile.model is root and not profile.covers(names):
+            raise AssertionError(
+                'Lazy load of {}.{} outside of its loading profile'.format(
+                    root.__name__, names))
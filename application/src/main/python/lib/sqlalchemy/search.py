@@ -0,0 +1,35 @@
+"""
+Trigram indexes for substring searches.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+from init_dep import db
+
+
+def trigram_index(table_name, column_name):
+    """Creates a GIN trigram index on a text column, which lets PostgreSQL
+    resolve `LIKE`/`ILIKE` searches with wildcards on both ends, and prefix
+    searches under any collation, without scanning the table. Declare it in
+    the model's `__table_args__`:
+
+        __table_args__ = (trigram_index('users', 'username'),)
+
+    The trigram operator classes are provided by the `pg_trgm` extension,
+    which only a superuser can create: the build scripts add it to the
+    databases before the tables are created.
+
+    :param table_name: Name of the model's table
+    :type table_name: str
+    :param column_name: Name of the indexed column
+    :type column_name: str
+    :return: The index
+    :rtype: sqlalchemy.schema.Index
+    """
+
+    return db.Index(
+        'ix_{}_{}_trgm'.format(table_name, column_name),
+        column_name,
+        postgresql_using='gin',
+        postgresql_ops={column_name: 'gin_trgm_ops'})
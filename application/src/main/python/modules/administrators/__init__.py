@@ -14,7 +14,9 @@ from lib.auth import auth_basic, permission_super_admin, \
 from modules.app_keys.middleware import require_appkey
 from .routes_auth import get_auth_token, get_auth_token_check
 from .routes_admin import get_administrators, post_administrator,\
-    get_administrator, put_administrator, delete_administrator
+    get_administrator, put_administrator, delete_administrator, \
+    post_administrators_bulk, put_administrators_bulk, \
+    delete_administrators_bulk
 from .authentication import Authentication
 
 
@@ -102,4 +104,28 @@ def admin_routes(app):
         check_password_expiration(
             delete_administrator)))))  # noqa
 
+    # POST /administrators/bulk
+    admin.route('/administrators/bulk', methods=['POST'])(
+        require_appkey(
+        auth_basic.login_required(
+        permission_super_admin.require(http_exception=403)(
+        check_password_expiration(
+            post_administrators_bulk)))))  # noqa
+
+    # PUT /administrators/bulk
+    admin.route('/administrators/bulk', methods=['PUT'])(
+        require_appkey(
+        auth_basic.login_required(
+        permission_super_admin.require(http_exception=403)(
+        check_password_expiration(
+            put_administrators_bulk)))))  # noqa
+
+    # DELETE /administrators/bulk
+    admin.route('/administrators/bulk', methods=['DELETE'])(
+        require_appkey(
+        auth_basic.login_required(
+        permission_super_admin.require(http_exception=403)(
+        check_password_expiration(
+            delete_administrators_bulk)))))  # noqa
+
     app.register_blueprint(admin)
@@ -11,9 +11,10 @@ from datetime import datetime, timedelta
 from flask import g, current_app, request, abort
 from flask_principal import Identity, RoleNeed, UserNeed, identity_changed
 
-from init_dep import db
-from modules.logins.model import Login
-from modules.roles.model import Role
+from init_dep import db, login_failures
+from lib.auth import AuthSnapshot
+from modules.logins.model import Login, login_writer
+from modules.roles.registry import role_registry
 from .model import Administrator
 
 
@@ -34,9 +35,12 @@ class Authentication:
         :rtype: bool
         """
 
-        # first try to authenticate by token
-        user = Administrator.verify_auth_token(username_or_token)
-        if not user:
+        # first try to authenticate by token, deferring the account lookup
+        # until a handler needs it
+        auth = Administrator.verify_auth_token(username_or_token)
+        if auth:
+            g.user_loader = lambda: Administrator.query.get(auth.id)
+        else:
 
             # ADMIN login lockout policy
             if Authentication.is_account_locked(username_or_token):
@@ -58,13 +62,16 @@ class Authentication:
                         api=Login.API_ADMIN,
                         success=False,
                         attempt_date=datetime.now())
-                    db.session.add(login_record)
-                    db.session.commit()
+                    Authentication.record_login(login_record)
 
                 # fail
                 abort(401, "Bad credentials")
             else:
 
+                # upgrade the hash if the cost policy changed since it was set
+                if user.rehash_password(password):
+                    db.session.commit()
+
                 # log successful login
                 login_record = Login(
                     user_id=user.id,
@@ -74,40 +81,36 @@ class Authentication:
                     api=Login.API_ADMIN,
                     success=True,
                     attempt_date=datetime.now())
-                db.session.add(login_record)
-                db.session.commit()
+                Authentication.record_login(login_record)
 
-        # set global user
-        g.user = user
+            # set global user
+            g.user = user
+            auth = AuthSnapshot.from_user(user, 'administrator')
+
+        # set global authentication snapshot
+        g.auth = auth
 
         # Tell Flask-Principal the identity changed
         # pylint: disable=protected-access
         identity_changed.send(current_app._get_current_object(),
-                              identity=Identity(user.id))
+                              identity=Identity(auth.id))
         return True
 
     @staticmethod
     def on_identity_loaded(sender, identity):
-        """Initialize user with roles.
+        """Initialize identity with the current account's roles.
 
         :param sender:
         :param identity:
         """
         # pylint: disable=unused-argument
 
-        # Set the identity user object
-        if hasattr(g, 'user'):
-            identity.user = g.user
-
-            # Add the UserNeed to the identity
-            if hasattr(g.user, 'id'):
-                identity.provides.add(UserNeed(g.user.id))
-
-            # Assuming the User model has a list of roles, update the
-            # identity with the roles that the user provides
-            if hasattr(g.user, 'roles'):
-                for role in g.user.roles:
-                    identity.provides.add(RoleNeed(role.name))
+        # Set the identity from the authentication snapshot, which does not
+        # require loading the account record
+        if 'auth' in g:
+            identity.provides.add(UserNeed(g.auth.id))
+            for role in g.auth.roles:
+                identity.provides.add(RoleNeed(role))
 
     @staticmethod
     def is_account_locked(username_or_token):
@@ -119,30 +122,45 @@ class Authentication:
         :rtype: bool
         """
 
-        admin_role = Role.query.filter(Role.name == 'SUPER_ADMIN').first()
-        if admin_role.login_lockout_policy:
-            login_query = Login.query
-            if admin_role.login_ban_by_ip:
-                login_query = login_query.filter(
-                    Login.username == username_or_token,
-                    Login.ip_address == request.environ.get(
-                        'HTTP_X_REAL_IP', request.remote_addr))
-            else:
-                login_query = login_query.filter(
-                    Login.username == username_or_token)
-            recent_logins = login_query.order_by(
-                Login.attempt_date.desc()).limit(admin_role.login_max_attempts)
-            if recent_logins.count() >= admin_role.login_max_attempts:
-                if sum(list(map(
-                        lambda x: 1 if not x.success else 0, recent_logins
-                ))) >= admin_role.login_max_attempts:
-                    if ((recent_logins[0].attempt_date -
-                         recent_logins[-1].attempt_date).total_seconds() <=
-                            admin_role.login_timeframe):
-                        banned_window = recent_logins[0].attempt_date + \
-                                        timedelta(
-                                            seconds=admin_role.login_ban_time)
-                        ban_win = banned_window.replace(tzinfo=None)
-                        if ban_win > datetime.now():
-                            return True
-        return False
+        admin_role = role_registry.get('SUPER_ADMIN')
+        if not admin_role or not admin_role.login_lockout_policy:
+            return False
+
+        # rebuild the failure counters from the recent login history once
+        if not login_failures.is_loaded('administrator'):
+            since = datetime.now() - timedelta(
+                seconds=admin_role.login_timeframe + admin_role.login_ban_time)
+            login_failures.load('administrator', (
+                (login.username, login.ip_address, login.success,
+                 login.attempt_date)
+                for login in Login.query.filter(
+                    Login.api == Login.API_ADMIN,
+                    Login.attempt_date >= since).order_by(
+                        Login.attempt_date.asc())))
+
+        ip_address = None
+        if admin_role.login_ban_by_ip:
+            ip_address = request.environ.get('HTTP_X_REAL_IP',
+                                             request.remote_addr)
+        return login_failures.is_locked(
+            'administrator', username_or_token[0:40], ip_address,
+            admin_role.login_max_attempts, admin_role.login_timeframe,
+            admin_role.login_ban_time)
+
+    @staticmethod
+    def record_login(login_record):
+        """Saves a login attempt, in the background if the write-behind
+        writer is enabled, and updates the login failure counters with it.
+
+        :param login_record: The attempt to log
+        :type login_record: Login
+        """
+
+        if login_writer.enabled:
+            login_writer.add(login_record)
+        else:
+            db.session.add(login_record)
+            db.session.commit()
+        login_failures.record(
+            'administrator', login_record.username, login_record.ip_address,
+            login_record.success, login_record.attempt_date)
@@ -7,17 +7,21 @@ which is part of this source code package.
 # pylint: disable=no-member,too-few-public-methods
 
 import hashlib
+import math
 from datetime import datetime
 
 # from main import app
-import bcrypt
+from sqlalchemy import event
 from sqlalchemy.ext.hybrid import hybrid_property
 from itsdangerous import (TimedJSONWebSignatureSerializer
                           as Serializer, BadSignature, SignatureExpired)
 
+from lib.auth import AuthSnapshot
 from lib.sqlalchemy.base_model import BaseModel
 from lib.sqlalchemy.pgp_string import PGPString
-from init_dep import db
+from lib.sqlalchemy.search import trigram_index
+from modules.roles.registry import role_registry
+from init_dep import db, hasher, token_cache
 from config import Config
 
 
@@ -85,8 +89,8 @@ class Administrator(db.Model, BaseModel):
     """Model for Administrator"""
 
     __tablename__ = 'administrators'
+    __table_args__ = (trigram_index('administrators', 'username'),)
 
-    HASH_ROUNDS = Config.AUTH_HASH_ROUNDS
     AUTH_SECRET_KEY = Config.AUTH_SECRET_KEY
     CRYPT_SYM_SECRET_KEY = Config.CRYPT_SYM_SECRET_KEY
     CRYPT_DIGEST_SALT = Config.CRYPT_DIGEST_SALT
@@ -129,12 +133,17 @@ class Administrator(db.Model, BaseModel):
         db.TIMESTAMP(timezone=True),
         server_default=db.func.current_timestamp(),
         nullable=False)
+    version = db.Column(
+        'version',
+        db.Integer,
+        default=1,
+        server_default='1',
+        nullable=False)
 
     # relationships
     roles = db.relationship(
         'Role',
         secondary=roles,
-        lazy='subquery',
         order_by="Role.priority",
         backref=db.backref('administrators', lazy=True))
     password_history = db.relationship(
@@ -165,11 +174,7 @@ class Administrator(db.Model, BaseModel):
         :type password: str
         """
 
-        self._password = str(
-            bcrypt.hashpw(
-                bytes(password, 'utf-8'),
-                bcrypt.gensalt(self.HASH_ROUNDS)),
-            'utf8')
+        self._password = hasher.hashpw(password)
         self.password_changed_at = datetime.now()
 
     @hybrid_property
@@ -209,12 +214,42 @@ class Administrator(db.Model, BaseModel):
         :rtype: bool
         """
 
-        return bcrypt.checkpw(
-            password.encode('utf-8'), self._password.encode('utf-8'))
+        return hasher.checkpw(password, self._password)
+
+    def rehash_password(self, password):
+        """Rehashes the password if its hash was created with a cost other than
+        the current policy. Unlike setting `password` this does not count as
+        a password change.
+
+        :param password: Administrator's plaintext password, already checked
+        :type password: str
+        :return: True if rehashed, False otherwise
+        :rtype: bool
+        """
+
+        if not hasher.needs_rehash(self._password):
+            return False
+        self._password = hasher.hashpw(password)
+        return True
+
+    def set_password_hash(self, hashed):
+        """Sets `password` property from a hash already created with the
+        hasher, i.e.: hashed in a batch with `hasher.hashpw_many()`.
+
+        :param hashed: Administrator's Bcrypt password hash
+        :type hashed: str
+        """
+
+        self._password = hashed
+        self.password_changed_at = datetime.now()
 
     def generate_auth_token(self, expiration=1800):
         """Creates a new authentication token.
 
+        The token is self-contained: its signed claims carry the role names,
+        password expiration and version counter needed to authorize requests
+        without loading the account, only its current version.
+
         :param expiration: Length of time in seconds that token is valid
         :type expiration: int
         :return: Authentication token
@@ -222,26 +257,117 @@ class Administrator(db.Model, BaseModel):
         """
 
         ser = Serializer(self.AUTH_SECRET_KEY, expires_in=expiration)
-        return ser.dumps({'id': self.id, 'type': 'administrator'})
+        return ser.dumps(AuthSnapshot.from_user(
+            self, 'administrator').to_claims(role_registry.generation()))
+
+    @staticmethod
+    def current_version(administrator_id):
+        """Reads the version of an administrator from the database, with a
+        single-column lookup by primary key.
+
+        :param administrator_id: The administrator's ID
+        :type administrator_id: int
+        :return: The administrator's version, None if it does not exist
+        :rtype: int | None
+        """
+
+        return Administrator.query.with_entities(Administrator.version).filter(
+            Administrator.id == administrator_id).scalar()
 
     @staticmethod
     def verify_auth_token(token):
         """Verifies authentication token is valid and current.
 
+        The account snapshot is built from the token's claims if their
+        version is still the account's version in the database, which any
+        process or deployment writing the account's password, status or
+        roles, or deleting it, changes, and their role policies are still
+        current (see `RoleRegistry.generation()`, reloaded at least every
+        `ROLES_REGISTRY_TTL`); otherwise, or if the token predates claims or
+        this process has since written the account or its roles, the account
+        is loaded. Verified tokens are cached along with their
+        snapshot until the token expires, the cache entry's TTL
+        (`AUTH_TOKEN_CACHE_TTL`, the staleness accepted for writes made by
+        other processes) runs out or the account is written by this process,
+        whichever comes first.
+
         :param token: Authentication token
         :type token: str
-        :return: The user associated with token if valid, None otherwise
-        :rtype: User | None
+        :return: Snapshot of the token's administrator if valid, None
+            otherwise
+        :rtype: AuthSnapshot | None
         """
 
+        snapshot = token_cache.get(token)
+        if snapshot is not None:
+            return snapshot if snapshot.type == 'administrator' else None
+
         ser = Serializer(Administrator.AUTH_SECRET_KEY)
         try:
-            data = ser.loads(token)
+            data, header = ser.loads(token, return_header=True)
         except SignatureExpired:
             return None  # valid token, but expired
         except BadSignature:
             return None  # invalid token
         if 'type' in data and data['type'] == 'administrator':
-            admin = Administrator.query.get(data['id'])
-            return admin
+            if token_cache.is_current(data, header['iat']) and \
+                    data.get('rgen') == role_registry.generation() and \
+                    Administrator.current_version(data['id']) == data['ver']:
+                snapshot = AuthSnapshot.from_claims(data)
+            else:
+                admin = Administrator.query.get(data['id'])
+                if admin is None:
+                    return None
+                snapshot = AuthSnapshot.from_user(admin, 'administrator')
+            token_cache.set(token, snapshot, header['exp'])
+            return snapshot
         return None
+
+
+@event.listens_for(Administrator, 'before_update')
+def increment_version(mapper, connection, target):
+    """Increments an administrator's version when its password, status or roles
+    change, marking the claims of previously issued tokens as stale.
+
+    :param mapper: The Administrator mapper
+    :param connection: The database connection
+    :param target: The administrator being written
+    :type target: Administrator
+    """
+    # pylint: disable=unused-argument
+
+    # a rehash on login replaces the hash but keeps the password, so
+    # password changes are detected through `password_changed_at`
+    state = db.inspect(target)
+    if any(state.attrs[attr].history.has_changes()
+           for attr in ('password_changed_at', 'status', 'roles')):
+        target.version = (target.version or 1) + 1
+
+
+@event.listens_for(Administrator, 'after_update')
+def invalidate_auth_tokens(mapper, connection, target):
+    """Drops cached authentication tokens when an administrator is written.
+
+    :param mapper: The Administrator mapper
+    :param connection: The database connection
+    :param target: The administrator being written
+    :type target: Administrator
+    """
+    # pylint: disable=unused-argument
+
+    token_cache.invalidate('administrator', target.id, target.version)
+
+
+@event.listens_for(Administrator, 'after_delete')
+def revoke_auth_tokens(mapper, connection, target):
+    """Drops cached authentication tokens and marks the claims of its issued
+    tokens as stale when an administrator is deleted.
+
+    :param mapper: The Administrator mapper
+    :param connection: The database connection
+    :param target: The administrator being deleted
+    :type target: Administrator
+    """
+    # pylint: disable=unused-argument
+
+    token_cache.invalidate('administrator', target.id, math.inf)
@@ -13,14 +13,29 @@ from marshmallow import ValidationError
 
 from init_dep import db
 
-from lib.routes.pager import Pager
+from lib.routes.bulk import Bulk
+from lib.routes.conditional import Conditional
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.schema.compiler import dump
+from lib.schema.factory import get_schema
 from lib.schema.validate import unique, unique_email, exists
+from lib.sqlalchemy.loading import LoadingProfile
 from modules.roles.model import Role
-from .model import Administrator
+from .model import Administrator, roles as administrator_roles_table
 from .schema_admin import AdministratorAdminSchema
 
 
+# relationships dumped with AdministratorAdminSchema
+administrator_loading = LoadingProfile(Administrator, selectin=('roles',))
+
+# relationships deleted along with administrators
+administrator_delete_loading = LoadingProfile(
+    Administrator, selectin=('roles', 'password_history'))
+
+
+@Conditional(Administrator, administrator_roles_table, Role)
+@administrator_loading
 def get_administrators(page=1, limit=10):
     """Retrieves a list of administrators
     :param page: Page number
@@ -32,7 +47,7 @@ def get_administrators(page=1, limit=10):
     """
 
     # initialize query
-    query = Query.make(
+    listing = Listing(
         Administrator,
         Administrator.id.asc(),
         {
@@ -52,39 +67,37 @@ def get_administrators(page=1, limit=10):
 
     # filter query based on URL parameters
     if request.args.get('role', '').isnumeric():
-        query = query.filter(Administrator.roles.any(
+        listing.filter(Administrator.roles.any(
             Role.id == int(request.args.get('role'))))
     if request.args.get('username', None) is not None:
-        query = query.filter(
-            Administrator.username.ilike(
-                '%' + request.args.get('username') + '%'))
+        listing.filter(Query.search(
+            Administrator.username, request.args.get('username'),
+            request.args.get('match', None)))
     if request.args.get('email', None) is not None:
         temp_user = Administrator(email=request.args.get('email'))
-        query = query.filter(
+        listing.filter(
             Administrator.email_digest == temp_user.email_digest)
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(AdministratorAdminSchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'administrators': AdministratorAdminSchema(
-                many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'administrators': dump(get_schema(
+                AdministratorAdminSchema, many=True, only=only), results),
         }
 
         # add pagination URIs and return
-        output.update(
-            Pager.get_uris('admin_administrators.get_administrators', page,
-                           limit, output['total'], request.args))
+        output.update(listing.get_pagination(
+            'admin_administrators.get_administrators'))
         return jsonify(output), 200
 
     return '', 204
 
 
+@administrator_loading
 def post_administrator():
     """Creates a new administrator
     :returns: JSON string of the new administrator's data; status code
@@ -103,7 +116,7 @@ def post_administrator():
 
     # validate data
     try:
-        data = AdministratorAdminSchema().load(request.json)
+        data = get_schema(AdministratorAdminSchema).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -129,9 +142,13 @@ def post_administrator():
 
     # response
     return jsonify(
-        {'administrator': AdministratorAdminSchema().dump(admin)}), 201
+        {'administrator': get_schema(
+            AdministratorAdminSchema).dump(admin)}), 201
 
 
+@Conditional(Administrator, administrator_roles_table.c.admin_id,
+             Role, id='administrator_id')
+@administrator_loading
 def get_administrator(administrator_id=None):
     """Retrieves an existing administrator
     :param administrator_id: ID of administrator
@@ -148,9 +165,11 @@ def get_administrator(administrator_id=None):
 
     # response
     return jsonify(
-        {'administrator': AdministratorAdminSchema().dump(administrator)}), 200
+        {'administrator': get_schema(
+            AdministratorAdminSchema).dump(administrator)}), 200
 
 
+@administrator_loading
 def put_administrator(administrator_id):
     """Updates an existing administrator
     :param administrator_id: ID of administrator
@@ -178,10 +197,10 @@ def put_administrator(administrator_id):
     # validate data
     try:
         if request.json.get('password', None):
-            data = AdministratorAdminSchema().load(request.json)
+            data = get_schema(AdministratorAdminSchema).load(request.json)
         else:
-            data = AdministratorAdminSchema(
-                exclude=('password',)).load(request.json)
+            data = get_schema(AdministratorAdminSchema,
+                              exclude=('password',)).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -211,7 +230,8 @@ def put_administrator(administrator_id):
 
     # response
     return jsonify(
-        {'administrator': AdministratorAdminSchema().dump(administrator)}), 200
+        {'administrator': get_schema(
+            AdministratorAdminSchema).dump(administrator)}), 200
 
 
 def delete_administrator(administrator_id):
@@ -233,3 +253,118 @@ def delete_administrator(administrator_id):
 
     # response
     return '', 204
+
+
+@administrator_loading
+def post_administrators_bulk():
+    """Creates a batch of new administrators, see `Bulk`.
+
+    :returns: JSON string of the results for each administrator; status code
+    :rtype: (str, int)
+    """
+
+    bulk = Bulk(Administrator, AdministratorAdminSchema, 'administrator')
+    items, errors = bulk.items(request.json, 'administrators')
+    if errors:
+        return jsonify({"error": errors}), 400
+
+    # validate data
+    data, roles = bulk.load(items)
+
+    # save administrators
+    administrators = []
+    for item, administrator_roles in zip(data, roles):
+        if item is None:
+            administrators.append(None)
+            continue
+
+        administrator = Administrator(
+            username=item['username'].lower().strip(),
+            email=item['email'].lower().strip(),
+            first_name=item['first_name'],
+            last_name=item['last_name'],
+            joined_at=item['joined_at'],
+            status=item['status'],
+            status_changed_at=datetime.now())
+        administrator.roles.extend(administrator_roles)
+
+        db.session.add(administrator)
+        administrators.append(administrator)
+
+    Bulk.hash_passwords(administrators, data)
+    db.session.commit()
+
+    # response
+    bulk.written(administrators, 201)
+    return jsonify(bulk.response()), 200
+
+
+@administrator_loading
+def put_administrators_bulk():
+    """Updates a batch of existing administrators, see `Bulk`.
+
+    :returns: JSON string of the results for each administrator; status code
+    :rtype: (str, int)
+    """
+
+    bulk = Bulk(Administrator, AdministratorAdminSchema, 'administrator')
+    items, errors = bulk.items(request.json, 'administrators')
+    if errors:
+        return jsonify({"error": errors}), 400
+
+    # get administrators and validate data
+    administrators = bulk.fetch([
+        item.get('id', None) if isinstance(item, dict) else None
+        for item in items])
+    data, roles = bulk.load(items, administrators)
+    administrators = [administrator if item is not None else None
+                      for administrator, item in zip(administrators, data)]
+
+    # save administrators
+    for administrator, item, administrator_roles in zip(
+            administrators, data, roles):
+        if item is None:
+            continue
+
+        administrator.username = item['username'].lower().strip()
+        administrator.email = item['email'].lower().strip()
+        administrator.first_name = item['first_name']
+        administrator.last_name = item['last_name']
+        administrator.joined_at = item['joined_at']
+        administrator.roles[:] = administrator_roles
+
+        if administrator.status != item['status']:
+            administrator.status = item['status']
+            administrator.status_changed_at = datetime.now()
+
+    Bulk.hash_passwords(administrators, data)
+    db.session.commit()
+
+    # response
+    bulk.written(administrators, 200)
+    return jsonify(bulk.response()), 200
+
+
+@administrator_delete_loading
+def delete_administrators_bulk():
+    """Deletes a batch of existing administrators, see `Bulk`.
+
+    :returns: JSON string of the results for each administrator; status code
+    :rtype: (str, int)
+    """
+
+    bulk = Bulk(Administrator, AdministratorAdminSchema, 'administrator')
+    ids, errors = bulk.items(request.json, 'ids')
+    if errors:
+        return jsonify({"error": errors}), 400
+
+    # delete administrators
+    administrators = bulk.fetch(ids)
+    for administrator in administrators:
+        if administrator is not None:
+            db.session.delete(administrator)
+    db.session.commit()
+
+    # response
+    bulk.written(administrators, 204)
+    return jsonify(bulk.response()), 200
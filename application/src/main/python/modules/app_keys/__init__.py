@@ -11,6 +11,7 @@ from flask import Blueprint
 from lib.auth import auth_basic, permission_super_admin, \
     check_password_expiration
 from modules.app_keys.middleware import require_appkey
+from .cache import app_key_cache
 from .routes_admin import get_app_keys, post_app_keys, get_app_key, \
     put_app_key, delete_app_key
 
@@ -21,6 +22,7 @@ def register(app):
     :param app: Flask application
     :type app: Flask
     """
+    app_key_cache.init_app(app)
     if app.config.get('APP_TYPE') == 'admin':
         admin_routes(app)
 
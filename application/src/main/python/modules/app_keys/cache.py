@@ -0,0 +1,148 @@
+"""
+In-memory cache of enabled application keys.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy.orm.exc import NoResultFound
+
+from lib.cache import TTLCache
+from lib.cache.bloom import BloomFilter
+from lib.cache.version_stamp import VersionStamp
+from .model import AppKey
+
+
+class AppKeyCache:
+    """Process-wide set of recently validated, enabled application keys.
+
+    Keys expire after `ttl` seconds. Recently rejected keys are remembered
+    too, and, if enabled, a Bloom filter of all enabled keys rejects most
+    unknown keys without querying the database; keys it lets through are
+    still checked against the database.
+
+    Writes to application keys bump a version stamp shared by all the
+    processes on the host, which every lookup compares to the version its
+    process last saw to drop the cache. Hits are counted per key.
+
+    The stamp does not reach other hosts: a key revoked or created there is
+    only seen once the cached entries expire. With the Bloom filter enabled,
+    which serves the public API at high rates, the filter and both caches
+    expire after `APP_KEY_BLOOM_TTL` seconds at most.
+    """
+
+    def __init__(self):
+        """Initialize a disabled cache, see `init_app()`."""
+
+        self.keys = TTLCache(0, 0)
+        self.rejected = TTLCache(0, 0)
+        self.stamp = VersionStamp()
+        self.hits = Counter()
+        self.bloom_enabled = False
+        self.bloom_ttl = 10
+        self._bloom = None
+        self._bloom_built_at = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the cache for a Flask application.
+
+        :param app: The Flask application instance
+        :type app: Flask
+        """
+
+        self.bloom_enabled = app.config.get('APP_KEY_BLOOM_ENABLED', False)
+        self.bloom_ttl = app.config.get('APP_KEY_BLOOM_TTL', 10)
+        ttl = app.config.get('APP_KEY_CACHE_TTL', 300)
+        negative_ttl = app.config.get('APP_KEY_NEGATIVE_CACHE_TTL', 60)
+        if self.bloom_enabled:
+            ttl = min(ttl, self.bloom_ttl)
+            negative_ttl = min(negative_ttl, self.bloom_ttl)
+        self.keys = TTLCache(app.config.get('APP_KEY_CACHE_SIZE', 1000), ttl)
+        self.rejected = TTLCache(
+            app.config.get('APP_KEY_NEGATIVE_CACHE_SIZE', 10000),
+            negative_ttl)
+        self._bloom = None
+        self.stamp = VersionStamp(
+            app.config.get('APP_KEY_CACHE_STAMP_PATH') or os.path.join(
+                tempfile.gettempdir(), 'api_app_keys.stamp'))
+        self._version = None
+        with self._lock:
+            self.hits = Counter()
+
+    def is_valid(self, key):
+        """Checks if an application key exists and is enabled.
+
+        :param key: The application key
+        :type key: str
+        :return: True if valid, False otherwise
+        :rtype: bool
+        """
+
+        version = self.stamp.get()
+        if version != self._version:
+            self._clear()
+            self._version = version
+
+        if self.keys.get(key) is None:
+            if self.rejected.get(key) is not None:
+                return False
+            if self.bloom_enabled and key not in self._get_bloom():
+                self.rejected.set(key, True)
+                return False
+            try:
+                AppKey.query.filter(
+                    AppKey.key == key,
+                    AppKey.status == AppKey.STATUS_ENABLED).one()
+            except NoResultFound:
+                self.rejected.set(key, True)
+                return False
+            self.keys.set(key, True)
+
+        with self._lock:
+            self.hits[key] += 1
+        return True
+
+    def invalidate(self):
+        """Drops the cache in all processes, after application keys were
+        written."""
+
+        self._clear()
+        self.stamp.bump()
+
+    def _clear(self):
+        """Drops cached keys, rejected keys and the Bloom filter."""
+
+        self.keys.clear()
+        self.rejected.clear()
+        self._bloom = None
+
+    def _get_bloom(self):
+        """Gets the Bloom filter of all enabled keys, (re)building it if
+        missing or older than `bloom_ttl` seconds.
+
+        :return: The Bloom filter
+        :rtype: BloomFilter
+        """
+
+        bloom = self._bloom
+        if (bloom is None or
+                time.monotonic() - self._bloom_built_at > self.bloom_ttl):
+            keys = [row.key for row in AppKey.query.filter(
+                AppKey.status == AppKey.STATUS_ENABLED).with_entities(
+                    AppKey.key)]
+            bloom = BloomFilter(len(keys))
+            for key in keys:
+                bloom.add(key)
+            self._bloom, self._bloom_built_at = bloom, time.monotonic()
+        return bloom
+
+
+app_key_cache = AppKeyCache()
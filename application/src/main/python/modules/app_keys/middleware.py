@@ -8,9 +8,8 @@ which is part of this source code package.
 from functools import wraps
 
 from flask import request, abort
-from sqlalchemy.orm.exc import NoResultFound
 
-from .model import AppKey
+from .cache import app_key_cache
 
 
 def require_appkey(view_function):
@@ -29,11 +28,7 @@ def require_appkey(view_function):
         """Internal decorator function"""
 
         if request.args.get('app_key'):
-            try:
-                AppKey.query.filter(
-                    AppKey.key == request.args.get('app_key'),
-                    AppKey.status == AppKey.STATUS_ENABLED).one()
-            except NoResultFound:
+            if not app_key_cache.is_valid(request.args.get('app_key')):
                 abort(401, "Bad application key")
             return view_function(*args, **kwargs)
         abort(401, "Missing application key")
@@ -12,13 +12,17 @@ from flask import jsonify, abort, request
 from marshmallow import ValidationError
 
 from init_dep import db
-from lib.routes.pager import Pager
+from lib.routes.conditional import Conditional
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.schema.factory import get_schema
 from lib.schema.validate import unique
+from .cache import app_key_cache
 from .model import AppKey
 from .schema_admin import AppKeyAdminSchema
 
 
+@Conditional(AppKey)
 def get_app_keys(page=1, limit=10):
     """Retrieves a list of application keys
 
@@ -31,7 +35,7 @@ def get_app_keys(page=1, limit=10):
     """
 
     # initialize query
-    query = Query.make(
+    listing = Listing(
         AppKey,
         AppKey.id.asc(),
         {
@@ -49,28 +53,26 @@ def get_app_keys(page=1, limit=10):
 
     # filter query based on URL parameters
     if request.args.get('application', None) is not None:
-        query = query.filter(
+        listing.filter(
             AppKey.application.ilike(
                 '%' + request.args.get('application') + '%'))
     if request.args.get('key', None) is not None:
-        query = query.filter(
+        listing.filter(
             AppKey.key.ilike('%' + request.args.get('key') + '%'))
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(AppKeyAdminSchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'app_keys': AppKeyAdminSchema(many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'app_keys': get_schema(
+                AppKeyAdminSchema, many=True, only=only).dump(results),
         }
 
         # add pagination URIs and return
-        output.update(Pager.get_uris('admin_app_keys.get_app_keys', page,
-                                     limit, output['total'], request.args))
+        output.update(listing.get_pagination('admin_app_keys.get_app_keys'))
         return jsonify(output), 200
 
     return '', 204
@@ -91,7 +93,7 @@ def post_app_keys():
 
     # validate data
     try:
-        data = AppKeyAdminSchema().load(request.json)
+        data = get_schema(AppKeyAdminSchema).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -106,11 +108,14 @@ def post_app_keys():
                      status_changed_at=datetime.now())
     db.session.add(app_key)
     db.session.commit()
+    app_key_cache.invalidate()
 
     # response
-    return jsonify({'app_key': AppKeyAdminSchema().dump(app_key)}), 201
+    return jsonify({'app_key': get_schema(
+        AppKeyAdminSchema).dump(app_key)}), 201
 
 
+@Conditional(AppKey, id='app_key_id')
 def get_app_key(app_key_id=None):
     """Retrieves an existing application key
 
@@ -127,7 +132,8 @@ def get_app_key(app_key_id=None):
         abort(404)
 
     # response
-    return jsonify({'app_key': AppKeyAdminSchema().dump(app_key)}), 200
+    return jsonify({'app_key': get_schema(
+        AppKeyAdminSchema).dump(app_key)}), 200
 
 
 def put_app_key(app_key_id):
@@ -150,7 +156,7 @@ def put_app_key(app_key_id):
 
     # validate data
     try:
-        data = AppKeyAdminSchema().load(request.json)
+        data = get_schema(AppKeyAdminSchema).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -165,9 +171,11 @@ def put_app_key(app_key_id):
         app_key.status = data['status']
         app_key.status_changed_at = datetime.now()
     db.session.commit()
+    app_key_cache.invalidate()
 
     # response
-    return jsonify({'app_key': AppKeyAdminSchema().dump(app_key)}), 200
+    return jsonify({'app_key': get_schema(
+        AppKeyAdminSchema).dump(app_key)}), 200
 
 
 def delete_app_key(app_key_id):
@@ -194,6 +202,7 @@ def delete_app_key(app_key_id):
         app_key.status_changed_at = datetime.now()
 
     db.session.commit()
+    app_key_cache.invalidate()
 
     # response
     return '', 204
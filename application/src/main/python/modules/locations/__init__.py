@@ -11,9 +11,11 @@ from flask import Blueprint
 from lib.auth import auth_basic, permission_super_admin, \
     check_password_expiration
 from modules.app_keys.middleware import require_appkey
+from .index import location_index
 from .routes_public import \
     get_countries as public_get_countries, \
     get_regions as public_get_regions
+from .routes_public import rendered
 from .routes_admin import \
     get_countries as admin_get_countries, \
     get_regions as admin_get_regions
@@ -25,6 +27,8 @@ def register(app):
     :param app: Flask application
     :type app: Flask
     """
+    location_index.init_app(app)
+    rendered.init_app(app)
     if app.config.get('APP_TYPE') == 'admin':
         admin_routes(app)
     else:
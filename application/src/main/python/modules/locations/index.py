@@ -0,0 +1,307 @@
+"""
+In-memory index of the enabled countries and regions.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+
+from init_dep import db
+from lib.cache.version_stamp import VersionStamp
+from lib.routes.memory import MemoryListing
+from .model import Country, Region
+
+
+class CountryRecord:
+    """Immutable snapshot of an enabled country"""
+
+    __slots__ = ('id', 'name', 'code_2', 'code_3')
+
+    def __init__(self, **kwargs):
+        """Initialize snapshot, one keyword argument per attribute."""
+
+        for attr in self.__slots__:
+            setattr(self, attr, kwargs.get(attr))
+
+
+class RegionRecord:
+    """Immutable snapshot of an enabled region"""
+
+    __slots__ = ('id', 'name', 'code_2', 'country_code')
+
+    def __init__(self, **kwargs):
+        """Initialize snapshot, one keyword argument per attribute."""
+
+        for attr in self.__slots__:
+            setattr(self, attr, kwargs.get(attr))
+
+
+class LocationIndex:
+    """Process-wide index of the enabled countries, sorted by each of their
+    public orders, and of the enabled regions, grouped by the two character
+    code of their country and sorted by each of their public orders. It is
+    loaded on first use with one query per model; the database sorts the
+    records, so that the index follows its collation.
+
+    Writes to countries and regions bump a version stamp shared by all the
+    processes on the host, which every lookup compares to the version its
+    process last saw to drop the index. The index is also reloaded every
+    `ttl` seconds to pick up changes made on other hosts.
+    """
+
+    # public orders: attribute and direction by `order_by` option
+    COUNTRY_ORDERS = {
+        'id.asc': ('id', False),
+        'id.desc': ('id', True),
+        'name.asc': ('name', False),
+        'name.desc': ('name', True),
+        'code_2.asc': ('code_2', False),
+        'code_2.desc': ('code_2', True),
+        'code_3.asc': ('code_3', False),
+        'code_3.desc': ('code_3', True),
+    }
+    REGION_ORDERS = {
+        'id.asc': ('id', False),
+        'id.desc': ('id', True),
+        'name.asc': ('name', False),
+        'name.desc': ('name', True),
+        'code_2.asc': ('code_2', False),
+        'code_2.desc': ('code_2', True),
+    }
+    DEFAULT_ORDER = 'name.asc'
+
+    def __init__(self):
+        """Initialize a disabled index, see `init_app()`."""
+
+        self.enabled = False
+        self.stamp = VersionStamp()
+        self.ttl = 30
+        self._countries = None
+        self._regions = None
+        self._loaded_at = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the index for a Flask application.
+
+        :param app: The Flask application instance
+        :type app: Flask
+        """
+
+        self.enabled = app.config.get('LOCATIONS_INDEX_ENABLED', False)
+        self.stamp = VersionStamp(
+            app.config.get('LOCATIONS_INDEX_STAMP_PATH') or os.path.join(
+                tempfile.gettempdir(), 'api_locations.stamp'))
+        self.ttl = app.config.get('LOCATIONS_INDEX_TTL', 30)
+        self._countries = None
+        self._regions = None
+        self._version = None
+
+    def countries(self, request_args):
+        """Creates the listing of enabled countries for a request.
+
+        :param request_args: The Flask Request.args object
+        :type request_args: ImmutableMultiDict
+        :return: The listing, None if it cannot be served from memory
+        :rtype: MemoryListing | None
+        """
+
+        if not self.enabled:
+            return None
+        return self._listing(
+            self._get()[0], self.COUNTRY_ORDERS, request_args)
+
+    def regions(self, country_code, request_args):
+        """Creates the listing of enabled regions of a country for a request.
+
+        :param country_code: The two character code of the country
+        :type country_code: str
+        :param request_args: The Flask Request.args object
+        :type request_args: ImmutableMultiDict
+        :return: The listing, None if it cannot be served from memory
+        :rtype: MemoryListing | None
+        """
+
+        if not self.enabled:
+            return None
+        return self._listing(
+            self._get()[1].get(country_code, {}), self.REGION_ORDERS,
+            request_args)
+
+    def load(self):
+        """(Re)loads the index from the database.
+
+        :return: Countries by order; regions by country code and order
+        :rtype: (dict, dict)
+        """
+
+        with self._lock:
+            countries = self._sorted(
+                [Country.id, Country.name, Country.code_2, Country.code_3],
+                Country, self.COUNTRY_ORDERS, CountryRecord)
+            regions = self._sorted(
+                [Region.id, Region.name, Region.code_2,
+                 Country.code_2.label('country_code')],
+                Region, self.REGION_ORDERS, RegionRecord,
+                group='country_code')
+            self._countries, self._regions = countries, regions
+            self._loaded_at = time.monotonic()
+        return countries, regions
+
+    def invalidate(self):
+        """Drops the index in all processes, after countries or regions were
+        written."""
+
+        self._countries = None
+        self.stamp.bump()
+
+    def _get(self):
+        """Gets the index, (re)loading it if dropped or expired.
+
+        :return: Countries by order; regions by country code and order
+        :rtype: (dict, dict)
+        """
+
+        version = self.stamp.get()
+        if version != self._version:
+            self._countries = None
+            self._version = version
+
+        countries, regions = self._countries, self._regions
+        if (countries is None or
+                time.monotonic() - self._loaded_at > self.ttl):
+            countries, regions = self.load()
+        return countries, regions
+
+    def _listing(self, sorted_records, orders, request_args):
+        """Creates a listing of records sorted by each order.
+
+        :param sorted_records: The records by order
+        :type sorted_records: dict
+        :param orders: The public orders
+        :type orders: dict
+        :param request_args: The Flask Request.args object
+        :type request_args: ImmutableMultiDict
+        :return: The listing, None if it cannot be served from memory
+        :rtype: MemoryListing | None
+        """
+
+        order_by = request_args.get('order_by', None)
+        if order_by not in orders:
+            order_by = None
+        option = order_by or self.DEFAULT_ORDER
+        listing = MemoryListing(
+            sorted_records.get(option, ()), order_by, orders[option][0],
+            request_args)
+        return listing if listing.is_resolved else None
+
+    @staticmethod
+    def _sorted(columns, model, orders, record_class, group=None):
+        """Queries the enabled records of a model, ranked by the database in
+        each order.
+
+        Records are ranked by the ordering attribute and then by ID;
+        descending orders are the reverse of ascending ones, with NULL values
+        first as in PostgreSQL.
+
+        :param columns: The columns of the records
+        :type columns: list
+        :param model: SQLAlchemy database model
+        :type model: flask_sqlalchemy.Model
+        :param orders: The public orders
+        :type orders: dict
+        :param record_class: The snapshot class of the records
+        :type record_class: type
+        :param group: Attribute to group the records by, None for no groups
+        :type group: str | None
+        :return: Records by order; by group and order if grouped
+        :rtype: dict
+        """
+
+        attributes = sorted({attribute for attribute, _ in orders.values()})
+        ranks = [func.row_number().over(order_by=(
+            getattr(model, attribute).asc(), model.id.asc())).label(
+                'rank_' + attribute) for attribute in attributes]
+
+        query = db.session.query(*columns, *ranks).filter(
+            model.status == model.STATUS_ENABLED)
+        if model is Region:
+            query = query.join(Region.country)
+
+        groups = {}
+        for row in query:
+            record = record_class(**{attr: getattr(row, attr)
+                                     for attr in record_class.__slots__})
+            groups.setdefault(getattr(row, group) if group else None, []) \
+                .append((record, row))
+
+        output = {}
+        for key, rows in groups.items():
+            by_order = {}
+            for attribute in attributes:
+                ranked = tuple(record for record, _ in sorted(
+                    rows, key=lambda item, a=attribute: getattr(
+                        item[1], 'rank_' + a)))
+                for option, (name, descending) in orders.items():
+                    if name == attribute:
+                        by_order[option] = (tuple(reversed(ranked))
+                                            if descending else ranked)
+            output[key] = by_order
+
+        return output if group else output.get(None, {
+            option: () for option in orders})
+
+
+location_index = LocationIndex()
+
+
+@event.listens_for(Country, 'after_insert')
+@event.listens_for(Country, 'after_update')
+@event.listens_for(Country, 'after_delete')
+@event.listens_for(Region, 'after_insert')
+@event.listens_for(Region, 'after_update')
+@event.listens_for(Region, 'after_delete')
+def mark_locations_changed(mapper, connection, target):
+    """Flags the session writing a country or a region, so the index is
+    invalidated once the change is committed.
+
+    :param mapper: The Country or Region mapper
+    :param connection: The database connection
+    :param target: The country or region being written
+    :type target: Country | Region
+    """
+    # pylint: disable=unused-argument
+
+    object_session(target).info['locations_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_location_index(session):
+    """Invalidates the location index after a commit that wrote countries or
+    regions.
+
+    :param session: The committed session
+    :type session: Session
+    """
+
+    if session.info.pop('locations_changed', False):
+        location_index.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_locations_changed(session):
+    """Clears the flag set by `mark_locations_changed()` on rollback.
+
+    :param session: The rolled back session
+    :type session: Session
+    """
+
+    session.info.pop('locations_changed', None)
@@ -8,12 +8,20 @@ which is part of this source code package.
 
 from flask import jsonify, request
 
-from lib.routes.pager import Pager
+from lib.routes.conditional import Conditional
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.schema.factory import get_schema
+from lib.sqlalchemy.loading import LoadingProfile
 from .model import Country, Region
 from .schema_admin import CountryAdminSchema, RegionAdminSchema
 
 
+# relationships dumped with RegionAdminSchema
+region_loading = LoadingProfile(Region, joined=('country',))
+
+
+@Conditional(Country)
 def get_countries(page=1, limit=10):
     """Retrieves a list of countries.
 
@@ -26,7 +34,7 @@ def get_countries(page=1, limit=10):
     """
 
     # initialize query
-    query = Query.make(
+    listing = Listing(
         Country,
         Country.id.asc(),
         {
@@ -43,25 +51,25 @@ def get_countries(page=1, limit=10):
         Query.STATUS_FILTER_ADMIN)
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(CountryAdminSchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'countries': CountryAdminSchema(many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'countries': get_schema(
+                CountryAdminSchema, many=True, only=only).dump(results),
         }
 
         # add pagination URIs and return
-        output.update(Pager.get_uris('admin_locations.get_countries', page,
-                                     limit, output['total'], request.args))
+        output.update(listing.get_pagination('admin_locations.get_countries'))
         return jsonify(output), 200
 
     return '', 204
 
 
+@Conditional(Region, Country)
+@region_loading
 def get_regions(page=1, limit=10):
     """Retrieves a list of regions.
 
@@ -74,7 +82,7 @@ def get_regions(page=1, limit=10):
     """
 
     # initialize query
-    query = Query.make(
+    listing = Listing(
         Region,
         Region.id.asc(),
         {
@@ -90,24 +98,22 @@ def get_regions(page=1, limit=10):
 
     # filter query based on URL parameters
     if request.args.get('country_id', None) is not None:
-        query = query.filter(
+        listing.filter(
             Region.country_id == int(request.args.get('country_id')))
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(RegionAdminSchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'regions': RegionAdminSchema(many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'regions': get_schema(
+                RegionAdminSchema, many=True, only=only).dump(results),
         }
 
         # add pagination URIs and return
-        output.update(Pager.get_uris('admin_locations.get_regions', page,
-                                     limit, output['total'], request.args))
+        output.update(listing.get_pagination('admin_locations.get_regions'))
         return jsonify(output), 200
 
     return '', 204
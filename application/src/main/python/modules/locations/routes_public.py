@@ -7,12 +7,22 @@ which is part of this source code package.
 
 from flask import jsonify, request
 
-from lib.routes.pager import Pager
+from lib.routes.conditional import Conditional
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.routes.rendered import RenderedResponses
+from lib.schema.compiler import dump
+from lib.schema.factory import get_schema
+from .index import location_index
 from .model import Country, Region
 from .schema_public import CountrySchema, RegionSchema
 
+# rendered listings, dropped on writes to countries and regions
+rendered = RenderedResponses('locations', Country, Region)
 
+
+@rendered
+@Conditional(Country)
 def get_countries(page=1, limit=250):
     """Retrieves a list of countries.
 
@@ -24,43 +34,45 @@ def get_countries(page=1, limit=250):
     :rtype: (str, int)
     """
 
-    # initialize query
-    query = Query.make(
-        Country,
-        Country.name.asc(),
-        {
-            'id.asc': Country.id.asc(),
-            'id.desc': Country.id.desc(),
-            'name.asc': Country.name.asc(),
-            'name.desc': Country.name.desc(),
-            'code_2.asc': Country.code_2.asc(),
-            'code_2.desc': Country.code_2.desc(),
-            'code_3.asc': Country.code_3.asc(),
-            'code_3.desc': Country.code_3.desc(),
-        },
-        request.args,
-        Query.STATUS_FILTER_USER)
+    # initialize query, served from memory if possible
+    listing = location_index.countries(request.args)
+    if listing is None:
+        listing = Listing(
+            Country,
+            Country.name.asc(),
+            {
+                'id.asc': Country.id.asc(),
+                'id.desc': Country.id.desc(),
+                'name.asc': Country.name.asc(),
+                'name.desc': Country.name.desc(),
+                'code_2.asc': Country.code_2.asc(),
+                'code_2.desc': Country.code_2.desc(),
+                'code_3.asc': Country.code_3.asc(),
+                'code_3.desc': Country.code_3.desc(),
+            },
+            request.args,
+            Query.STATUS_FILTER_USER)
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(CountrySchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'countries': CountrySchema(many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'countries': dump(get_schema(
+                CountrySchema, many=True, only=only), results),
         }
 
         # add pagination URIs and return
-        output.update(Pager.get_uris('public_locations.get_countries', page,
-                                     limit, output['total'], request.args))
+        output.update(listing.get_pagination('public_locations.get_countries'))
         return jsonify(output), 200
 
     return '', 204
 
 
+@rendered
+@Conditional(Region, Country)
 def get_regions(country_code, page=1, limit=100):
     """Retrieves a list of regions (states).
 
@@ -74,40 +86,38 @@ def get_regions(country_code, page=1, limit=100):
     :rtype: (str, int)
     """
 
-    # initialize query
-    query = Query.make(
-        Region,
-        Region.name.asc(),
-        {
-            'id.asc': Region.id.asc(),
-            'id.desc': Region.id.desc(),
-            'name.asc': Region.name.asc(),
-            'name.desc': Region.name.desc(),
-            'code_2.asc': Region.code_2.asc(),
-            'code_2.desc': Region.code_2.desc(),
-        },
-        request.args,
-        Query.STATUS_FILTER_USER)
-
-    query = query.filter(Region.country.has(code_2=country_code))
+    # initialize query, served from memory if possible
+    listing = location_index.regions(country_code, request.args)
+    if listing is None:
+        listing = Listing(
+            Region,
+            Region.name.asc(),
+            {
+                'id.asc': Region.id.asc(),
+                'id.desc': Region.id.desc(),
+                'name.asc': Region.name.asc(),
+                'name.desc': Region.name.desc(),
+                'code_2.asc': Region.code_2.asc(),
+                'code_2.desc': Region.code_2.desc(),
+            },
+            request.args,
+            Query.STATUS_FILTER_USER)
+        listing.filter(Region.country.has(code_2=country_code))
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(RegionSchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'regions': RegionSchema(many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'regions': dump(get_schema(
+                RegionSchema, many=True, only=only), results),
         }
 
         # add pagination URIs and return
-        output.update(
-            Pager.get_uris('public_locations.get_regions', page, limit,
-                           output['total'], request.args,
-                           country_code=country_code))
+        output.update(listing.get_pagination(
+            'public_locations.get_regions', country_code=country_code))
         return jsonify(output), 200
 
     return '', 204
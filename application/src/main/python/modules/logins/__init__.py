@@ -11,7 +11,9 @@ from flask import Blueprint
 from lib.auth import auth_basic, permission_super_admin, \
     check_password_expiration
 from modules.app_keys.middleware import require_appkey
-from .routes_admin import get_logins
+from .model import login_writer
+from .partitions import login_partitions
+from .routes_admin import get_logins, export_logins
 
 
 def register(app):
@@ -20,6 +22,8 @@ def register(app):
     :param app: Flask application
     :type app: Flask
     """
+    login_writer.init_app(app)
+    login_partitions.init_app(app)
     if app.config.get('APP_TYPE') == 'admin':
         admin_routes(app)
 
@@ -42,4 +46,12 @@ def admin_routes(app):
         check_password_expiration(
             get_logins)))))))  # noqa
 
+    # GET /logins/export
+    admin.route('/logins/export', methods=['GET'])(
+        require_appkey(
+        auth_basic.login_required(
+        permission_super_admin.require(http_exception=403)(
+        check_password_expiration(
+            export_logins)))))  # noqa
+
     app.register_blueprint(admin)
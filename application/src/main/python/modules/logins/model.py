@@ -6,13 +6,31 @@ which is part of this source code package.
 """
 # pylint: disable=no-member,too-few-public-methods
 
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import INET
+from sqlalchemy.orm import validates
+
 from init_dep import db
+from lib.net import IPAddress
+from lib.sqlalchemy.batch_writer import BatchWriter
+from lib.sqlalchemy.search import trigram_index
 
 
 class Login(db.Model):
-    """Model for Login"""
+    """Model for Login
+
+    The table is partitioned by month of `attempt_date`, see
+    `LoginPartitions`. Its primary key includes `attempt_date`, as the
+    partitioning requires, but records are still identified by `id`.
+    """
 
     __tablename__ = 'logins'
+    __table_args__ = (trigram_index('logins', 'username'),
+                      trigram_index('logins', 'ip_address'),
+                      db.Index('ix_logins_ip_inet', 'ip_inet',
+                               postgresql_using='gist',
+                               postgresql_ops={'ip_inet': 'inet_ops'}),
+                      {'postgresql_partition_by': 'RANGE (attempt_date)'})
 
     API_ADMIN = 1
     API_PUBLIC = 2
@@ -21,7 +39,8 @@ class Login(db.Model):
     id = db.Column(
         'id',
         db.BigInteger,
-        primary_key=True)
+        primary_key=True,
+        autoincrement=True)
     user_id = db.Column(
         'user_id',
         db.Integer,
@@ -36,6 +55,10 @@ class Login(db.Model):
         'ip_address',
         db.String(50),
         index=True)
+    ip_inet = db.Column(
+        'ip_inet',
+        INET,
+        nullable=True)
     api = db.Column(
         'api',
         db.SmallInteger,
@@ -48,8 +71,11 @@ class Login(db.Model):
         'attempt_date',
         db.TIMESTAMP(timezone=True),
         server_default=db.func.current_timestamp(),
+        primary_key=True,
         nullable=False)
 
+    __mapper_args__ = {'primary_key': [id]}
+
     # timestamps
     created_at = db.Column(
         'created_at',
@@ -62,3 +88,32 @@ class Login(db.Model):
         server_default=db.func.current_timestamp(),
         onupdate=db.func.current_timestamp(),
         nullable=False)
+
+    @validates('ip_address')
+    def validate_ip_address(self, key, ip_address):
+        """Sets the `ip_inet` shadow column along with `ip_address`: the
+        canonical address, or None if `ip_address` is not an IP address.
+
+        :param key: The attribute name
+        :type key: str
+        :param ip_address: The client's IP address
+        :type ip_address: str
+        :return: The IP address
+        :rtype: str
+        """
+        # pylint: disable=unused-argument
+
+        self.ip_inet = IPAddress.normalize(ip_address)
+        return ip_address
+
+
+# attempts outside of the monthly partitions go to the default partition
+event.listen(
+    Login.__table__, 'after_create',
+    DDL('CREATE TABLE IF NOT EXISTS logins_default PARTITION OF logins '
+        'DEFAULT').execute_if(dialect='postgresql'))
+
+# write-behind writer for login attempts, see `BatchWriter`
+login_writer = BatchWriter(Login, ('user_id', 'username', 'ip_address',
+                                   'ip_inet', 'api', 'success',
+                                   'attempt_date'))
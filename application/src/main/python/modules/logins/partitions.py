@@ -0,0 +1,298 @@
+"""
+Maintenance of the monthly partitions of the logins table.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+
+from init_dep import db
+
+
+class LoginPartitions:
+    """Creates, archives and drops the monthly partitions of the logins
+    table, partitioned by range of `attempt_date`.
+
+    Partitions are created `ahead` months in advance; attempts outside of
+    them go to the default partition. With a retention of `retention`
+    months, partitions older than the current month and the `retention`
+    months before it are detached, archived to a gzipped CSV file in
+    `archive_dir`, and dropped, as are the expired attempts of the default
+    partition. A retention of 0 keeps all attempts.
+    """
+
+    TABLE = 'logins'
+    DEFAULT = 'logins_default'
+    NAME_PATTERN = re.compile(r'^logins_y(\d{4})m(\d{2})$')
+
+    def __init__(self):
+        """Initialize partitions without retention, see `init_app()`."""
+
+        self.ahead = 3
+        self.retention = 0
+        self.archive_dir = None
+
+    def init_app(self, app):
+        """Configure the partitions for a Flask application.
+
+        :param app: The Flask application instance
+        :type app: Flask
+        """
+
+        self.ahead = app.config.get('LOGINS_PARTITIONS_AHEAD', 3)
+        self.retention = app.config.get('LOGINS_RETENTION_MONTHS', 0)
+        self.archive_dir = app.config.get('LOGINS_ARCHIVE_DIR')
+
+    @staticmethod
+    def name(month):
+        """Creates the name of the partition of a month.
+
+        :param month: The first day of the month
+        :type month: date
+        :return: The partition's table name
+        :rtype: str
+        """
+
+        return 'logins_y{:04d}m{:02d}'.format(month.year, month.month)
+
+    @staticmethod
+    def month(name):
+        """Reads the month of a partition from its name.
+
+        :param name: The partition's table name
+        :type name: str
+        :return: The first day of the month, None if not a monthly partition
+        :rtype: date | None
+        """
+
+        match = LoginPartitions.NAME_PATTERN.match(name)
+        if match is None:
+            return None
+        return date(int(match.group(1)), int(match.group(2)), 1)
+
+    def plan(self, today, existing):
+        """Determines the partitions to create and to archive.
+
+        :param today: The current date
+        :type today: date
+        :param existing: Names of the existing monthly partitions
+        :type existing: iterable
+        :return: Months to create, months to archive, and the start of the
+            retained attempts (None without retention)
+        :rtype: (list, list, date | None)
+        """
+
+        current = date(today.year, today.month, 1)
+        months = {self.month(name) for name in existing} - {None}
+
+        create = [_add_months(current, i) for i in range(self.ahead + 1)
+                  if _add_months(current, i) not in months]
+
+        cutoff = None
+        archive = []
+        if self.retention:
+            cutoff = _add_months(current, -self.retention)
+            archive = sorted(month for month in months if month < cutoff)
+
+        return create, archive, cutoff
+
+    def maintain(self, today=None):
+        """Creates the upcoming partitions and enforces the retention.
+
+        :param today: The current date, defaults to today (UTC)
+        :type today: date
+        :return: Names of the created partitions and of the archive files
+        :rtype: (list, list)
+        :raises ValueError: If a retention is set without an archive
+            directory
+        """
+
+        if self.retention and not self.archive_dir:
+            raise ValueError('LOGINS_ARCHIVE_DIR is required for a retention')
+
+        today = today or datetime.now(timezone.utc).date()
+        attached = self._partitions(attached=True)
+        create, archive, cutoff = self.plan(
+            today, attached | self._partitions(attached=False))
+
+        created = []
+        for month in create:
+            self.create(month)
+            created.append(self.name(month))
+
+        archived = []
+        for month in archive:
+            archived.append(self.archive(month, self.name(month) in attached))
+        if cutoff is not None:
+            path = self.archive_default(cutoff)
+            if path is not None:
+                archived.append(path)
+
+        return created, archived
+
+    def partition_default(self):
+        """Creates the partitions of the months of the attempts in the
+        default partition, moving them out of it (i.e.: once a table created
+        before the partitioning is converted).
+
+        :return: Names of the created partitions
+        :rtype: list
+        """
+
+        existing = {self.month(name) for name in (
+            self._partitions(attached=True) |
+            self._partitions(attached=False))}
+        months = sorted(row[0].date() for row in db.session.execute(text(
+            "SELECT DISTINCT date_trunc('month', attempt_date AT TIME ZONE "
+            "'UTC') FROM {}".format(self.DEFAULT))))
+
+        created = []
+        for month in months:
+            if month not in existing:
+                self.create(month)
+                created.append(self.name(month))
+        return created
+
+    def create(self, month):
+        """Creates the partition of a month, moving its attempts out of the
+        default partition.
+
+        :param month: The first day of the month
+        :type month: date
+        """
+
+        name = self.name(month)
+        start, end = _bound(month), _bound(_add_months(month, 1))
+        db.session.execute(text(
+            'CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING '
+            'CONSTRAINTS)'.format(name, self.TABLE)))
+        db.session.execute(text(
+            'WITH moved AS (DELETE FROM {} WHERE attempt_date >= :start AND '
+            'attempt_date < :end RETURNING *) '
+            'INSERT INTO {} SELECT * FROM moved'.format(self.DEFAULT, name)),
+            {'start': start, 'end': end})
+        db.session.execute(text(
+            "ALTER TABLE {} ATTACH PARTITION {} FOR VALUES FROM ('{}') TO "
+            "('{}')".format(self.TABLE, name, start, end)))
+        db.session.commit()
+
+    def archive(self, month, attached=True):
+        """Detaches the partition of a month, writes its attempts to an
+        archive file, and drops it.
+
+        The partition is detached in its own transaction, so that writes to
+        the table are not blocked while archiving. A detached partition that
+        could not be archived is archived by the next run.
+
+        :param month: The first day of the month
+        :type month: date
+        :param attached: False if the partition is already detached
+        :type attached: bool
+        :return: Path of the archive file
+        :rtype: str
+        """
+
+        name = self.name(month)
+        if attached:
+            db.session.execute(text(
+                'ALTER TABLE {} DETACH PARTITION {}'.format(self.TABLE, name)))
+            db.session.commit()
+
+        path = self._copy('SELECT * FROM {}'.format(name), name)
+        db.session.execute(text('DROP TABLE {}'.format(name)))
+        db.session.commit()
+        return path
+
+    def archive_default(self, cutoff):
+        """Writes the attempts of the default partition older than the
+        retention to an archive file, and deletes them.
+
+        :param cutoff: The start of the retained attempts
+        :type cutoff: date
+        :return: Path of the archive file, None if no attempts expired
+        :rtype: str | None
+        """
+
+        start = _bound(cutoff)
+        expired = db.session.execute(text(
+            'SELECT count(*) FROM {} WHERE attempt_date < :start'.format(
+                self.DEFAULT)), {'start': start}).scalar()
+        if not expired:
+            return None
+
+        path = self._copy(
+            "SELECT * FROM {} WHERE attempt_date < '{}'".format(
+                self.DEFAULT, start),
+            '{}_before_{}'.format(self.DEFAULT, cutoff.strftime('%Y%m%d')))
+        db.session.execute(text(
+            'DELETE FROM {} WHERE attempt_date < :start'.format(self.DEFAULT)),
+            {'start': start})
+        db.session.commit()
+        return path
+
+    def _copy(self, select, name):
+        """Writes the rows of a query to a gzipped CSV file, with a header.
+
+        :param select: The query
+        :type select: str
+        :param name: The file name, without extension
+        :type name: str
+        :return: Path of the file
+        :rtype: str
+        """
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, name + '.csv.gz')
+        partial = path + '.partial'
+        cursor = db.session.connection().connection.cursor()
+        try:
+            with gzip.open(partial, 'wb') as archive:
+                cursor.copy_expert(
+                    'COPY ({}) TO STDOUT WITH CSV HEADER'.format(select),
+                    archive)
+        finally:
+            cursor.close()
+
+        # the attempts are dropped next, the file must be on disk first
+        with open(partial, 'rb') as archive:
+            os.fsync(archive.fileno())
+        os.replace(partial, path)
+        return path
+
+    def _partitions(self, attached):
+        """Lists the monthly partitions, attached to the table or not.
+
+        :param attached: True for attached partitions, False for detached
+        :type attached: bool
+        :return: Names of the partitions
+        :rtype: set
+        """
+
+        names = {row[0] for row in db.session.execute(text(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'JOIN pg_class p ON p.oid = i.inhparent '
+            'WHERE p.relname = :table'), {'table': self.TABLE})}
+        if not attached:
+            names = {row[0] for row in db.session.execute(text(
+                "SELECT tablename FROM pg_tables WHERE tablename LIKE "
+                "'logins\\_y%'"))} - names
+        return {name for name in names if self.month(name) is not None}
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    return '{} 00:00:00+00'.format(month.isoformat())
+
+
+login_partitions = LoginPartitions()
@@ -5,10 +5,18 @@ This file is subject to the terms and conditions defined in file 'LICENSE',
 which is part of this source code package.
 """
 
-from flask import jsonify, request
+from datetime import datetime
 
-from lib.routes.pager import Pager
+from flask import abort, jsonify, request
+from sqlalchemy import cast
+from sqlalchemy.dialects.postgresql import INET
+
+from lib.net import IPAddress
+from lib.routes.export import Export
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.schema.compiler import dump
+from lib.schema.factory import get_schema
 from .model import Login
 from .schema_admin import LoginAdminSchema
 
@@ -24,8 +32,50 @@ def get_logins(page=1, limit=25):
     :rtype: (str, int)
     """
 
+    # initialize filtered query
+    listing = _logins_listing()
+
+    # retrieve and return results
+    only = listing.select_fields(LoginAdminSchema)
+    results = listing.fetch(page, limit)
+    if len(results) > 0:
+
+        # prep initial output
+        output = {
+            'logins': dump(get_schema(
+                LoginAdminSchema, many=True, only=only), results),
+        }
+
+        # add pagination URIs and return
+        output.update(listing.get_pagination('admin_logins.get_logins'))
+        return jsonify(output), 200
+
+    return '', 204
+
+
+def export_logins():
+    """Exports all the logins matching the filters of `get_logins()`,
+    see `Export`.
+
+    :returns: Streamed response of the logins
+    :rtype: flask.Response
+    """
+
+    listing = _logins_listing()
+    only = listing.select_fields(LoginAdminSchema)
+    return Export(listing.query, get_schema(LoginAdminSchema, only=only),
+                  request.args).response('logins')
+
+
+def _logins_listing():
+    """Creates the listing of logins, filtered by the URL parameters.
+
+    :return: The listing
+    :rtype: Listing
+    """
+
     # initialize query
-    query = Query.make(
+    listing = Listing(
         Login,
         Login.id.asc(),
         {
@@ -39,36 +89,52 @@ def get_logins(page=1, limit=25):
 
     # filter query based on URL parameters
     if request.args.get('user_id', None) is not None:
-        query = query.filter(
+        listing.filter(
             Login.user_id == request.args.get('user_id'))
     if request.args.get('username', None) is not None:
-        query = query.filter(
-            Login.username.ilike('%' + request.args.get('username') + '%'))
+        listing.filter(Query.search(
+            Login.username, request.args.get('username'),
+            request.args.get('match', None)))
     if request.args.get('ip_address', None) is not None:
-        query = query.filter(
-            Login.ip_address.ilike('%' + request.args.get('ip_address') + '%'))
+        listing.filter(Query.search(
+            Login.ip_address, request.args.get('ip_address'),
+            request.args.get('match', None)))
+    if request.args.get('ip_network', None) is not None:
+        try:
+            network = IPAddress.network(request.args.get('ip_network'))
+        except ValueError:
+            abort(400)
+        listing.filter(Login.ip_inet.op('<<=')(cast(network, INET)))
+    # bounding attempt dates limits the query to the partitions in range
+    if request.args.get('since', None) is not None:
+        listing.filter(Login.attempt_date >= _parse_datetime(
+            request.args.get('since')))
+    if request.args.get('until', None) is not None:
+        listing.filter(Login.attempt_date < _parse_datetime(
+            request.args.get('until')))
     if request.args.get('api', None) is not None:
-        query = query.filter(
+        listing.filter(
             Login.api.in_(request.args.get('api').split(',')))
     if request.args.get('success', None) is not None:
-        query = query.filter(
+        listing.filter(
             Login.success.in_(request.args.get('success').split(',')))
 
-    # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
-    if len(results) > 0:
+    return listing
 
-        # prep initial output
-        output = {
-            'logins': LoginAdminSchema(many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
-        }
 
-        # add pagination URIs and return
-        output.update(Pager.get_uris('admin_logins.get_logins', page, limit,
-                                     output['total'], request.args))
-        return jsonify(output), 200
+def _parse_datetime(value):
+    """Reads an ISO 8601 date or date and time from a URL parameter, UTC
+    may be given as `Z` (not read by `fromisoformat()` before Python 3.11).
 
-    return '', 204
+    :param value: The parameter's value
+    :type value: str
+    :return: The date and time
+    :rtype: datetime
+    """
+
+    if value[-1:] in ('Z', 'z'):
+        value = value[:-1] + '+00:00'
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        abort(400)
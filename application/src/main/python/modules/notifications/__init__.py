@@ -11,7 +11,7 @@ from flask import Blueprint
 from lib.auth import auth_basic, permission_super_admin, \
     check_password_expiration
 from modules.app_keys.middleware import require_appkey
-from .routes_admin import get_notifications
+from .routes_admin import get_notifications, export_notifications
 
 
 def register(app):
@@ -42,4 +42,12 @@ def admin_routes(app):
         check_password_expiration(
             get_notifications)))))))  # noqa
 
+    # GET /notifications/export
+    admin.route('/notifications/export', methods=['GET'])(
+        require_appkey(
+        auth_basic.login_required(
+        permission_super_admin.require(http_exception=403)(
+        check_password_expiration(
+            export_notifications)))))  # noqa
+
     app.register_blueprint(admin)
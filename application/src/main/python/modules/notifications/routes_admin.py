@@ -7,12 +7,20 @@ which is part of this source code package.
 
 from flask import jsonify, request
 
-from lib.routes.pager import Pager
+from lib.routes.export import Export
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.schema.factory import get_schema
+from lib.sqlalchemy.loading import LoadingProfile
 from .model import Notification
 from .schema_admin import NotificationAdminSchema
 
 
+# relationships dumped with NotificationAdminSchema
+notification_loading = LoadingProfile(Notification, joined=('user',))
+
+
+@notification_loading
 def get_notifications(page=1, limit=10):
     """Retrieves a list of notifications.
 
@@ -24,8 +32,53 @@ def get_notifications(page=1, limit=10):
     :rtype: (str, int)
     """
 
+    # initialize filtered query
+    listing = _notifications_listing()
+
+    # retrieve and return results
+    only = listing.select_fields(NotificationAdminSchema)
+    results = listing.fetch(page, limit)
+    if len(results) > 0:
+
+        # prep initial output
+        output = {
+            'notifications': get_schema(
+                NotificationAdminSchema, many=True, only=only).dump(results),
+        }
+
+        # add pagination URIs and return
+        output.update(listing.get_pagination(
+            'admin_notifications.get_notifications'))
+        return jsonify(output), 200
+
+    return '', 204
+
+
+@notification_loading
+def export_notifications():
+    """Exports all the notifications matching the filters of
+    `get_notifications()`, see `Export`.
+
+    :returns: Streamed response of the notifications
+    :rtype: flask.Response
+    """
+
+    listing = _notifications_listing()
+    only = listing.select_fields(NotificationAdminSchema)
+    return Export(listing.query,
+                  get_schema(NotificationAdminSchema, only=only),
+                  request.args).response('notifications')
+
+
+def _notifications_listing():
+    """Creates the listing of notifications, filtered by the URL parameters.
+
+    :return: The listing
+    :rtype: Listing
+    """
+
     # initialize query
-    query = Query.make(
+    listing = Listing(
         Notification,
         Notification.id.asc(),
         {
@@ -39,28 +92,10 @@ def get_notifications(page=1, limit=10):
 
     # filter query based on URL parameters
     if request.args.get('user_id', None) is not None:
-        query = query.filter(
+        listing.filter(
             Notification.user_id == request.args.get('user_id'))
     if request.args.get('channel', None) is not None:
-        query = query.filter(
+        listing.filter(
             Notification.channel == request.args.get('channel'))
 
-    # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
-    if len(results) > 0:
-
-        # prep initial output
-        output = {
-            'notifications': NotificationAdminSchema(many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
-        }
-
-        # add pagination URIs and return
-        output.update(
-            Pager.get_uris('admin_notifications.get_notifications', page,
-                           limit, output['total'], request.args))
-        return jsonify(output), 200
-
-    return '', 204
+    return listing
@@ -7,12 +7,19 @@ which is part of this source code package.
 
 from flask import jsonify, request
 
-from lib.routes.pager import Pager
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.schema.factory import get_schema
+from lib.sqlalchemy.loading import LoadingProfile
 from .model import PasswordReset
 from .schema_admin import PasswordResetAdminSchema
 
 
+# relationships dumped with PasswordResetAdminSchema
+password_reset_loading = LoadingProfile(PasswordReset, joined=('user',))
+
+
+@password_reset_loading
 def get_password_resets(page=1, limit=10):
     """Retrieves a list of password resets.
 
@@ -25,7 +32,7 @@ def get_password_resets(page=1, limit=10):
     """
 
     # initialize query
-    query = Query.make(
+    listing = Listing(
         PasswordReset,
         PasswordReset.id.asc(),
         {
@@ -39,26 +46,23 @@ def get_password_resets(page=1, limit=10):
 
     # filter query based on URL parameters
     if request.args.get('user_id', None) is not None:
-        query = query.filter(
+        listing.filter(
             PasswordReset.user_id == request.args.get('user_id'))
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(PasswordResetAdminSchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'password_resets': PasswordResetAdminSchema(
-                many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'password_resets': get_schema(
+                PasswordResetAdminSchema, many=True, only=only).dump(results),
         }
 
         # add pagination URIs and return
-        output.update(
-            Pager.get_uris('admin_password_resets.get_password_resets', page,
-                           limit, output['total'], request.args))
+        output.update(listing.get_pagination(
+            'admin_password_resets.get_password_resets'))
         return jsonify(output), 200
 
     return '', 204
@@ -11,6 +11,7 @@ from flask import Blueprint
 from lib.auth import auth_basic, permission_super_admin, \
     check_password_expiration
 from modules.app_keys.middleware import require_appkey
+from .registry import role_registry
 from .routes_admin import get_roles, post_roles, get_role, put_role, \
     delete_role
 
@@ -21,6 +22,7 @@ def register(app):
     :param app: Flask application
     :type app: Flask
     """
+    role_registry.init_app(app)
     if app.config.get('APP_TYPE') == 'admin':
         admin_routes(app)
 
@@ -6,13 +6,17 @@ which is part of this source code package.
 """
 # pylint: disable=no-member,too-few-public-methods
 
-from init_dep import db
+from sqlalchemy import event
+
+from init_dep import db, token_cache
+from lib.sqlalchemy.search import trigram_index
 
 
 class Role(db.Model):
     """Model for Role"""
 
     __tablename__ = 'roles'
+    __table_args__ = (trigram_index('roles', 'name'),)
 
     # columns
     id = db.Column(
@@ -77,3 +81,19 @@ class Role(db.Model):
         server_default=db.func.current_timestamp(),
         onupdate=db.func.current_timestamp(),
         nullable=False)
+
+
+@event.listens_for(Role, 'after_update')
+@event.listens_for(Role, 'after_delete')
+def invalidate_auth_tokens(mapper, connection, target):
+    """Drops all cached authentication tokens when a role is written, since
+    their snapshots carry role names and password policies.
+
+    :param mapper: The Role mapper
+    :param connection: The database connection
+    :param target: The role being written
+    :type target: Role
+    """
+    # pylint: disable=unused-argument
+
+    token_cache.clear()
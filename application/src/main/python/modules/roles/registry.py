@@ -0,0 +1,231 @@
+"""
+In-memory registry of role policies.
+
+This file is subject to the terms and conditions defined in file 'LICENSE',
+which is part of this source code package.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, \
+    object_session
+
+from init_dep import login_failures, token_cache
+from lib.cache.version_stamp import VersionStamp
+from .model import Role
+
+
+class RolePolicy:
+    """Immutable snapshot of a role and its policies"""
+
+    __slots__ = ('id', 'name', 'is_admin_role', 'priority',
+                 'login_lockout_policy', 'login_max_attempts',
+                 'login_timeframe', 'login_ban_time', 'login_ban_by_ip',
+                 'password_policy', 'password_reuse_history',
+                 'password_reset_days')
+
+    def __init__(self, **kwargs):
+        """Initialize snapshot, one keyword argument per role column."""
+
+        for attr in self.__slots__:
+            setattr(self, attr, kwargs.get(attr))
+
+    @staticmethod
+    def from_role(role):
+        """Creates a snapshot from a role record.
+
+        :param role: The role record
+        :type role: Role
+        :return: Snapshot of the role
+        :rtype: RolePolicy
+        """
+
+        return RolePolicy(**{attr: getattr(role, attr)
+                             for attr in RolePolicy.__slots__})
+
+    def to_role(self):
+        """Creates a detached role record from the snapshot, to be attached to
+        a session with `db.session.merge(role, load=False)` without querying
+        the database.
+
+        :return: The role record
+        :rtype: Role
+        """
+
+        role = Role(**{attr: getattr(self, attr) for attr in self.__slots__})
+        make_transient_to_detached(role)
+        return role
+
+
+class RoleRegistry:
+    """Process-wide registry of role policies, loaded on first use.
+
+    Writes to roles bump a version stamp shared by all the processes on the
+    host; every request compares the stamp to the version its process last
+    saw and drops the registry (and the cached authentication tokens) if it
+    changed. The stamp does not reach other hosts, including the separate
+    admin deployment, nor scripts run elsewhere: the registry is also
+    reloaded every `ttl` seconds, which bounds how long they see stale
+    policies.
+
+    The claims of authentication tokens (role names, password expiration)
+    derive from the policies: they carry the policies' generation, and are
+    only trusted while it is current, see `generation()`.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry, see `init_app()`."""
+
+        self.stamp = VersionStamp()
+        self.ttl = 10
+        self._policies = None
+        self._loaded_at = 0
+        self._generation = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the registry for a Flask application.
+
+        :param app: The Flask application instance
+        :type app: Flask
+        """
+
+        self.stamp = VersionStamp(
+            app.config.get('ROLES_REGISTRY_STAMP_PATH') or os.path.join(
+                tempfile.gettempdir(), 'api_roles.stamp'))
+        self.ttl = app.config.get('ROLES_REGISTRY_TTL', 10)
+        self._policies = None
+        self._generation = None
+        self._version = None
+        app.before_request(self.check)
+
+    def check(self):
+        """Drops the registry and cached authentication tokens if roles
+        changed since this process last checked."""
+
+        version = self.stamp.get()
+        if version != self._version:
+            if self._version is not None:
+                self._policies = None
+                token_cache.clear()
+            self._version = version
+
+    def get(self, name):
+        """Gets the policy of a role.
+
+        :param name: The role's name
+        :type name: str
+        :return: The role's policy, None if not found
+        :rtype: RolePolicy | None
+        """
+
+        policies = self._policies
+        if policies is None or time.monotonic() - self._loaded_at > self.ttl:
+            policies = self.load()
+        return policies.get(name)
+
+    def generation(self):
+        """Gets the generation of the role policies: a digest of all of them,
+        which is the same on every host for the same policies.
+
+        :return: The generation
+        :rtype: str
+        """
+
+        if self._policies is None or \
+                time.monotonic() - self._loaded_at > self.ttl:
+            self.load()
+        return self._generation
+
+    def load(self):
+        """(Re)loads all role policies from the database.
+
+        Lockout policies the failure counters cannot enforce, i.e.: of more
+        attempts than the `AUTH_LOCKOUT_HISTORY` they keep, set before it was
+        lowered, are reported and brought in range; the admin API rejects
+        them.
+
+        Cached authentication tokens are dropped if the generation of the
+        policies changed, however it was changed.
+
+        :return: Policies by role name
+        :rtype: dict
+        """
+
+        with self._lock:
+            policies = {role.name: RolePolicy.from_role(role)
+                        for role in Role.query.all()}
+            for policy in policies.values():
+                attempts = min(max(policy.login_max_attempts or 0, 1),
+                               login_failures.history)
+                if policy.login_lockout_policy and \
+                        attempts != policy.login_max_attempts:
+                    current_app.logger.error(
+                        "Role %s locks accounts after %s failed logins, out "
+                        "of range for AUTH_LOCKOUT_HISTORY: using %d.",
+                        policy.name, policy.login_max_attempts, attempts)
+                    policy.login_max_attempts = attempts
+            generation = hashlib.sha256(repr(sorted(
+                tuple(getattr(policy, attr) for attr in RolePolicy.__slots__)
+                for policy in policies.values())).encode('utf-8')).hexdigest()
+            if self._generation not in (None, generation):
+                token_cache.clear()
+            self._generation = generation
+            self._policies, self._loaded_at = policies, time.monotonic()
+        return policies
+
+    def invalidate(self):
+        """Drops the registry in all processes, after roles were written."""
+
+        self._policies = None
+        self.stamp.bump()
+
+
+role_registry = RoleRegistry()
+
+
+@event.listens_for(Role, 'after_insert')
+@event.listens_for(Role, 'after_update')
+@event.listens_for(Role, 'after_delete')
+def mark_roles_changed(mapper, connection, target):
+    """Flags the session writing a role, so the registry is invalidated once
+    the change is committed.
+
+    :param mapper: The Role mapper
+    :param connection: The database connection
+    :param target: The role being written
+    :type target: Role
+    """
+    # pylint: disable=unused-argument
+
+    object_session(target).info['roles_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_role_registry(session):
+    """Invalidates the role registry after a commit that wrote roles.
+
+    :param session: The committed session
+    :type session: Session
+    """
+
+    if session.info.pop('roles_changed', False):
+        role_registry.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_roles_changed(session):
+    """Clears the flag set by `mark_roles_changed()` on rollback.
+
+    :param session: The rolled back session
+    :type session: Session
+    """
+
+    session.info.pop('roles_changed', None)
@@ -11,8 +11,10 @@ from marshmallow import ValidationError
 from sqlalchemy.orm.exc import NoResultFound
 
 from init_dep import db
-from lib.routes.pager import Pager
+from lib.routes.conditional import Conditional
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.schema.factory import get_schema
 from lib.schema.validate import unique
 from modules.users.model import User
 from modules.administrators.model import Administrator
@@ -20,6 +22,7 @@ from .model import Role
 from .schema_admin import RoleAdminSchema
 
 
+@Conditional(Role)
 def get_roles(page=1, limit=10, role_type=None):
     """Retrieves a list of roles.
 
@@ -34,7 +37,7 @@ def get_roles(page=1, limit=10, role_type=None):
     """
 
     # initialize query
-    query = Query.make(
+    listing = Listing(
         Role,
         Role.id.asc(),
         {
@@ -52,28 +55,27 @@ def get_roles(page=1, limit=10, role_type=None):
 
     # filter query based on URL parameters
     if role_type in ['admin', 'user']:
-        query = query.filter(
+        listing.filter(
             Role.is_admin_role == bool(role_type == 'admin'))
     if request.args.get('name', None) is not None:
-        query = query.filter(
-            Role.name.ilike('%' + request.args.get('name') + '%'))
+        listing.filter(Query.search(
+            Role.name, request.args.get('name'),
+            request.args.get('match', None)))
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(RoleAdminSchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'roles': RoleAdminSchema(many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'roles': get_schema(
+                RoleAdminSchema, many=True, only=only).dump(results),
         }
 
         # add pagination URIs and return
-        output.update(Pager.get_uris('admin_roles.get_roles', page, limit,
-                                     output['total'], request.args,
-                                     role_type=role_type))
+        output.update(listing.get_pagination(
+            'admin_roles.get_roles', role_type=role_type))
         return jsonify(output), 200
 
     return '', 204
@@ -93,7 +95,7 @@ def post_roles():
 
     # validate data
     try:
-        data = RoleAdminSchema().load(request.json)
+        data = get_schema(RoleAdminSchema).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -118,9 +120,10 @@ def post_roles():
     db.session.commit()
 
     # response
-    return jsonify({'role': RoleAdminSchema().dump(role)}), 201
+    return jsonify({'role': get_schema(RoleAdminSchema).dump(role)}), 201
 
 
+@Conditional(Role, id='role_id', name='name')
 def get_role(role_id=None, name=None):
     """Retrieves an existing role.
 
@@ -144,7 +147,7 @@ def get_role(role_id=None, name=None):
         abort(404)
 
     # response
-    return jsonify({'role': RoleAdminSchema().dump(role)}), 200
+    return jsonify({'role': get_schema(RoleAdminSchema).dump(role)}), 200
 
 
 def put_role(role_id):
@@ -169,7 +172,7 @@ def put_role(role_id):
 
     # validate data
     try:
-        data = RoleAdminSchema().load(request.json)
+        data = get_schema(RoleAdminSchema).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -192,7 +195,7 @@ def put_role(role_id):
     db.session.commit()
 
     # response
-    return jsonify({'role': RoleAdminSchema().dump(role)}), 200
+    return jsonify({'role': get_schema(RoleAdminSchema).dump(role)}), 200
 
 
 def delete_role(role_id):
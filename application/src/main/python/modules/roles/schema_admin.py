@@ -6,13 +6,29 @@ which is part of this source code package.
 """
 # pylint: disable=no-member,too-few-public-methods
 
-from marshmallow import fields, validate
+from flask import current_app
+from marshmallow import ValidationError, fields, validate
 
 from init_dep import ma
 from lib.datetime import Formats
 from .model import Role
 
 
+def validate_login_max_attempts(value):
+    """Validates that a lockout fits the failure counters, which keep the
+    last `AUTH_LOCKOUT_HISTORY` failures of an account.
+
+    :param value: Number of failed attempts that locks an account
+    :type value: int
+    :raises ValidationError: If out of range
+    """
+
+    history = current_app.config.get('AUTH_LOCKOUT_HISTORY', 16)
+    if not 1 <= value <= history:
+        raise ValidationError(
+            "Value must be between 1 and {}.".format(history))
+
+
 class RoleAdminSchema(ma.Schema):
     """Admin schema for Role model"""
 
@@ -38,7 +54,9 @@ class RoleAdminSchema(ma.Schema):
     is_admin_role = fields.Boolean(required=True)
     priority = fields.Integer(required=True)
     login_lockout_policy = fields.Boolean(required=True)
-    login_max_attempts = fields.Integer(required=True)
+    login_max_attempts = fields.Integer(
+        required=True,
+        validate=validate_login_max_attempts)
     login_timeframe = fields.Integer(required=True)
     login_ban_time = fields.Integer(required=True)
     login_ban_by_ip = fields.Boolean(required=True)
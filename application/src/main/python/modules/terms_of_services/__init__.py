@@ -12,6 +12,7 @@ from lib.auth import auth_basic, permission_super_admin, \
     check_password_expiration
 from modules.app_keys.middleware import require_appkey
 from .routes_public import get_terms_of_service as public_get_terms_of_service
+from .routes_public import rendered
 from .routes_admin import get_terms_of_services, post_terms_of_services,\
     get_terms_of_service, put_terms_of_service, delete_terms_of_service
 
@@ -22,6 +23,7 @@ def register(app):
     :param app: Flask application
     :type app: Flask
     """
+    rendered.init_app(app)
     if app.config.get('APP_TYPE') == 'admin':
         admin_routes(app)
     else:
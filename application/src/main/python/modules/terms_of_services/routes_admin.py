@@ -12,12 +12,15 @@ from flask import jsonify, abort, request
 from marshmallow import ValidationError
 
 from init_dep import db
-from lib.routes.pager import Pager
+from lib.routes.conditional import Conditional
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.schema.factory import get_schema
 from .model import TermsOfService
 from .schema_admin import TermsOfServiceAdminSchema
 
 
+@Conditional(TermsOfService)
 def get_terms_of_services(page=1, limit=10):
     """Retrieves a list of terms of service.
 
@@ -30,7 +33,7 @@ def get_terms_of_services(page=1, limit=10):
     """
 
     # initialize query
-    query = Query.make(
+    listing = Listing(
         TermsOfService,
         TermsOfService.id.asc(),
         {
@@ -49,22 +52,19 @@ def get_terms_of_services(page=1, limit=10):
         Query.STATUS_FILTER_ADMIN)
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(TermsOfServiceAdminSchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'terms_of_services': TermsOfServiceAdminSchema(
-                many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'terms_of_services': get_schema(
+                TermsOfServiceAdminSchema, many=True, only=only).dump(results),
         }
 
         # add pagination URIs and return
-        output.update(
-            Pager.get_uris('admin_terms_of_services.get_terms_of_services',
-                           page, limit, output['total'], request.args))
+        output.update(listing.get_pagination(
+            'admin_terms_of_services.get_terms_of_services'))
         return jsonify(output), 200
 
     return '', 204
@@ -79,7 +79,7 @@ def post_terms_of_services():
 
     # validate data
     try:
-        data = TermsOfServiceAdminSchema().load(request.json)
+        data = get_schema(TermsOfServiceAdminSchema).load(request.json)
     except ValidationError as err:
         return jsonify({"error": err.messages}), 400
 
@@ -95,9 +95,11 @@ def post_terms_of_services():
 
     # response
     return jsonify(
-        {'terms_of_service': TermsOfServiceAdminSchema().dump(tos)}), 201
+        {'terms_of_service': get_schema(
+            TermsOfServiceAdminSchema).dump(tos)}), 201
 
 
+@Conditional(TermsOfService, id='terms_of_service_id')
 def get_terms_of_service(terms_of_service_id=None):
     """Retrieves an existing terms of service.
 
@@ -115,7 +117,8 @@ def get_terms_of_service(terms_of_service_id=None):
 
     # response
     return jsonify(
-        {'terms_of_service': TermsOfServiceAdminSchema().dump(tos)}), 200
+        {'terms_of_service': get_schema(
+            TermsOfServiceAdminSchema).dump(tos)}), 200
 
 
 def put_terms_of_service(terms_of_service_id):
@@ -134,7 +137,7 @@ def put_terms_of_service(terms_of_service_id):
 
     # validate data
     try:
-        data = TermsOfServiceAdminSchema().load(request.json)
+        data = get_schema(TermsOfServiceAdminSchema).load(request.json)
     except ValidationError as err:
         return jsonify({"error": err.messages}), 400
 
@@ -149,7 +152,8 @@ def put_terms_of_service(terms_of_service_id):
 
     # response
     return jsonify(
-        {'terms_of_service': TermsOfServiceAdminSchema().dump(tos)}), 200
+        {'terms_of_service': get_schema(
+            TermsOfServiceAdminSchema).dump(tos)}), 200
 
 
 def delete_terms_of_service(terms_of_service_id):
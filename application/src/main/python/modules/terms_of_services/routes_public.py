@@ -8,10 +8,18 @@ which is part of this source code package.
 
 from flask import jsonify
 
+from lib.routes.conditional import Conditional
+from lib.routes.rendered import RenderedResponses
+from lib.schema.factory import get_schema
 from .model import TermsOfService
 from .schema_public import TermsOfServiceSchema
 
+# rendered terms of service, dropped on writes to terms of services
+rendered = RenderedResponses('terms_of_services', TermsOfService)
 
+
+@rendered
+@Conditional(TermsOfService)
 def get_terms_of_service():
     """Retrieves the most recent Terms of Service.
 
@@ -31,7 +39,7 @@ def get_terms_of_service():
         terms_of_service_query.order_by(order_by).limit(1))
     if len(terms_of_services) > 0:
         return jsonify(
-            {'terms_of_service': TermsOfServiceSchema().dump(
+            {'terms_of_service': get_schema(TermsOfServiceSchema).dump(
                 terms_of_services[0])}), 200
 
     return '', 204
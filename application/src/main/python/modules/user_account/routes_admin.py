@@ -8,15 +8,15 @@ which is part of this source code package.
 
 import re
 from datetime import datetime
-import bcrypt
 
 from flask import jsonify, request, g
 from marshmallow import ValidationError
 
-from init_dep import db
+from init_dep import db, hasher
 from modules.administrators.model import Administrator, \
     AdministratorPasswordHistory
 from modules.administrators.schema_admin import AdministratorAdminSchema
+from lib.schema.factory import get_schema
 from lib.schema.validate import unique, unique_email
 from .schema_admin import UserAccountAdminSchema
 
@@ -32,7 +32,8 @@ def get_account():
     user = g.user
 
     # response
-    return jsonify({'user_account': UserAccountAdminSchema().dump(user)}), 200
+    return jsonify({'user_account': get_schema(
+        UserAccountAdminSchema).dump(user)}), 200
 
 
 def put_account():
@@ -54,7 +55,7 @@ def put_account():
 
     # validate data
     try:
-        data = UserAccountAdminSchema().load(request.json)
+        data = get_schema(UserAccountAdminSchema).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -71,7 +72,8 @@ def put_account():
     db.session.commit()
 
     # response
-    return jsonify({'user_account': UserAccountAdminSchema().dump(user)}), 200
+    return jsonify({'user_account': get_schema(
+        UserAccountAdminSchema).dump(user)}), 200
 
 
 def put_password():
@@ -130,12 +132,9 @@ def put_password():
             filter(AdministratorPasswordHistory.administrator_id == user.id).\
             order_by(AdministratorPasswordHistory.set_date.desc()).\
             limit(user.roles[0].password_reuse_history)
-        for record in prev_passwords:
-            print("TEST ", record.password)
-            if bcrypt.checkpw(request.json.get('password1').encode('utf-8'),
-                              record.password.encode('utf-8')):
-                errors['password1'] = ["This password has recently been used."]
-                break
+        if hasher.checkpw_any(request.json.get('password1'),
+                              [record.password for record in prev_passwords]):
+            errors['password1'] = ["This password has recently been used."]
 
     if errors:
         return jsonify({"error": errors}), 400
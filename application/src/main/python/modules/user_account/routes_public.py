@@ -11,17 +11,18 @@ from datetime import datetime, timedelta
 import time
 import os
 import hashlib
-import bcrypt
 
 from flask import jsonify, request, g, current_app
 from marshmallow import ValidationError
 
-from init_dep import db
+from init_dep import db, hasher
+from lib.schema.factory import get_schema
 from lib.schema.validate import unique, unique_email, exists
 from lib.random import String as RandomString
 from modules.users.model import User, UserTermsOfService, UserPasswordHistory
 from modules.user_profiles.model import UserProfile
 from modules.roles.model import Role
+from modules.roles.registry import role_registry
 from modules.terms_of_services.model import TermsOfService
 from modules.password_resets.model import PasswordReset
 from modules.notifications.notify import Notify
@@ -55,8 +56,8 @@ def post_user_account_step1():
 
     # validate data
     try:
-        data = UserAccountSchema(
-            exclude=('first_name', 'last_name',)).load(request.json)
+        data = get_schema(UserAccountSchema, exclude=(
+            'first_name', 'last_name',)).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -72,9 +73,9 @@ def post_user_account_step1():
                 status=User.STATUS_ENABLED,
                 status_changed_at=datetime.now())
 
-    user_role = Role.query.filter(Role.name == 'USER').first()
+    user_role = role_registry.get('USER')
     if user_role:
-        user.roles.append(user_role)
+        user.roles.append(db.session.merge(user_role.to_role(), load=False))
 
     db.session.add(user)
 
@@ -109,7 +110,7 @@ def post_user_account_step1():
 
     # response
     return jsonify(
-        {'user_account': UserAccountSchema().dump(output)}), 201
+        {'user_account': get_schema(UserAccountSchema).dump(output)}), 201
 
 
 def post_user_account_step2():
@@ -124,8 +125,8 @@ def post_user_account_step2():
 
     # validate data
     try:
-        data = UserAccountSchema(
-            exclude=('username', 'email', 'password', 'password2', 'tos_id',)
+        data = get_schema(UserAccountSchema, exclude=(
+            'username', 'email', 'password', 'password2', 'tos_id',)
         ).load(request.json)
     except ValidationError as err:
         return jsonify({"error": err.messages}), 400
@@ -163,7 +164,7 @@ def post_user_account_step2():
 
     # response
     return jsonify(
-        {'user_account': UserAccountSchema().dump(output)}), 201
+        {'user_account': get_schema(UserAccountSchema).dump(output)}), 201
 
 
 def get_user_account():
@@ -190,7 +191,7 @@ def get_user_account():
 
     # response
     return jsonify(
-        {'user_account': UserAccountSchema().dump(output)}), 200
+        {'user_account': get_schema(UserAccountSchema).dump(output)}), 200
 
 
 def put_user_account():
@@ -217,8 +218,8 @@ def put_user_account():
 
     # validate data
     try:
-        data = UserAccountSchema(
-            exclude=('password', 'password2', 'tos_id',)).load(request.json)
+        data = get_schema(UserAccountSchema, exclude=(
+            'password', 'password2', 'tos_id',)).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -262,7 +263,7 @@ def put_user_account():
 
     # response
     return jsonify(
-        {'user_account': UserAccountSchema().dump(output)}), 200
+        {'user_account': get_schema(UserAccountSchema).dump(output)}), 200
 
 
 def delete_user_account():
@@ -346,11 +347,9 @@ def put_password():
             filter(UserPasswordHistory.user_id == user.id).\
             order_by(UserPasswordHistory.set_date.desc()).\
             limit(user.roles[0].password_reuse_history)
-        for record in prev_passwords:
-            if bcrypt.checkpw(request.json.get('password1').encode('utf-8'),
-                              record.password.encode('utf-8')):
-                errors['password1'] = ["This password has recently been used."]
-                break
+        if hasher.checkpw_any(request.json.get('password1'),
+                              [record.password for record in prev_passwords]):
+            errors['password1'] = ["This password has recently been used."]
 
     if errors:
         return jsonify({"error": errors}), 400
@@ -12,14 +12,17 @@ from flask import jsonify, abort, request
 from marshmallow import ValidationError
 
 from init_dep import db
-from lib.routes.pager import Pager
+from lib.routes.conditional import Conditional
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.schema.factory import get_schema
 from lib.schema.validate import exists
 from modules.users.model import User
 from .model import UserProfile
 from .schema_admin import UserProfileAdminSchema
 
 
+@Conditional(UserProfile)
 def get_user_profiles(page=1, limit=10):
     """Retrieves a list of user profiles.
 
@@ -32,7 +35,7 @@ def get_user_profiles(page=1, limit=10):
     """
 
     # initialize query
-    query = Query.make(
+    listing = Listing(
         UserProfile,
         UserProfile.id.asc(),
         {
@@ -47,21 +50,19 @@ def get_user_profiles(page=1, limit=10):
         Query.STATUS_FILTER_ADMIN)
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(UserProfileAdminSchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'user_profiles': UserProfileAdminSchema(many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'user_profiles': get_schema(
+                UserProfileAdminSchema, many=True, only=only).dump(results),
         }
 
         # add pagination URIs and return
-        output.update(
-            Pager.get_uris('admin_user_profiles.get_user_profiles', page,
-                           limit, output['total'], request.args))
+        output.update(listing.get_pagination(
+            'admin_user_profiles.get_user_profiles'))
         return jsonify(output), 200
 
     return '', 204
@@ -80,7 +81,7 @@ def post_user_profiles():
 
     # validate data
     try:
-        data = UserProfileAdminSchema().load(request.json)
+        data = get_schema(UserProfileAdminSchema).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -101,9 +102,11 @@ def post_user_profiles():
 
     # response
     return jsonify(
-        {'user_profile': UserProfileAdminSchema().dump(user_profile)}), 201
+        {'user_profile': get_schema(
+            UserProfileAdminSchema).dump(user_profile)}), 201
 
 
+@Conditional(UserProfile, id='user_profile_id')
 def get_user_profile(user_profile_id=None):
     """Retrieves an existing user profile.
 
@@ -121,7 +124,8 @@ def get_user_profile(user_profile_id=None):
 
     # response
     return jsonify(
-        {'user_profile': UserProfileAdminSchema().dump(user_profile)}), 200
+        {'user_profile': get_schema(
+            UserProfileAdminSchema).dump(user_profile)}), 200
 
 
 def put_user_profile(user_profile_id):
@@ -144,7 +148,7 @@ def put_user_profile(user_profile_id):
 
     # validate data
     try:
-        data = UserProfileAdminSchema().load(request.json)
+        data = get_schema(UserProfileAdminSchema).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -164,7 +168,8 @@ def put_user_profile(user_profile_id):
 
     # response
     return jsonify(
-        {'user_profile': UserProfileAdminSchema().dump(user_profile)}), 200
+        {'user_profile': get_schema(
+            UserProfileAdminSchema).dump(user_profile)}), 200
 
 
 def delete_user_profile(user_profile_id):
@@ -13,7 +13,9 @@ from lib.auth import auth_basic, permission_super_admin, permission_user, \
     check_password_expiration
 from modules.app_keys.middleware import require_appkey
 from .routes_auth import get_auth_token, get_auth_token_check
-from .routes_admin import get_users, post_user, get_user, put_user, delete_user
+from .routes_admin import get_users, post_user, get_user, put_user, \
+    delete_user, post_users_bulk, put_users_bulk, delete_users_bulk, \
+    export_users
 from .authentication import Authentication
 
 
@@ -82,6 +84,14 @@ def admin_routes(app):
         check_password_expiration(
             get_users)))))))  # noqa
 
+    # GET /users/export
+    admin.route('/users/export', methods=['GET'])(
+        require_appkey(
+        auth_basic.login_required(
+        permission_super_admin.require(http_exception=403)(
+        check_password_expiration(
+            export_users)))))  # noqa
+
     # POST /users
     admin.route('/users', methods=['POST'])(
         require_appkey(
@@ -115,4 +125,28 @@ def admin_routes(app):
         check_password_expiration(
             delete_user)))))  # noqa
 
+    # POST /users/bulk
+    admin.route('/users/bulk', methods=['POST'])(
+        require_appkey(
+        auth_basic.login_required(
+        permission_super_admin.require(http_exception=403)(
+        check_password_expiration(
+            post_users_bulk)))))  # noqa
+
+    # PUT /users/bulk
+    admin.route('/users/bulk', methods=['PUT'])(
+        require_appkey(
+        auth_basic.login_required(
+        permission_super_admin.require(http_exception=403)(
+        check_password_expiration(
+            put_users_bulk)))))  # noqa
+
+    # DELETE /users/bulk
+    admin.route('/users/bulk', methods=['DELETE'])(
+        require_appkey(
+        auth_basic.login_required(
+        permission_super_admin.require(http_exception=403)(
+        check_password_expiration(
+            delete_users_bulk)))))  # noqa
+
     app.register_blueprint(admin)
@@ -7,17 +7,21 @@ which is part of this source code package.
 # pylint: disable=no-member,too-few-public-methods
 
 import hashlib
+import math
 from datetime import datetime
-import bcrypt
 
+from sqlalchemy import event
 from sqlalchemy.ext.hybrid import hybrid_property
 from itsdangerous import (TimedJSONWebSignatureSerializer
                           as Serializer, BadSignature, SignatureExpired)
+from lib.auth import AuthSnapshot
 from lib.sqlalchemy.base_model import BaseModel
 from lib.sqlalchemy.pgp_string import PGPString
+from lib.sqlalchemy.search import trigram_index
 from modules.password_resets.model import PasswordReset
 from modules.notifications.model import Notification
-from init_dep import db
+from modules.roles.registry import role_registry
+from init_dep import db, hasher, token_cache
 from config import Config
 
 
@@ -135,8 +139,8 @@ class User(db.Model, BaseModel):
     """Model for User"""
 
     __tablename__ = 'users'
+    __table_args__ = (trigram_index('users', 'username'),)
 
-    HASH_ROUNDS = Config.AUTH_HASH_ROUNDS
     AUTH_SECRET_KEY = Config.AUTH_SECRET_KEY
     CRYPT_SYM_SECRET_KEY = Config.CRYPT_SYM_SECRET_KEY
     CRYPT_DIGEST_SALT = Config.CRYPT_DIGEST_SALT
@@ -170,17 +174,21 @@ class User(db.Model, BaseModel):
         'is_verified',
         db.Boolean,
         nullable=False)
+    version = db.Column(
+        'version',
+        db.Integer,
+        default=1,
+        server_default='1',
+        nullable=False)
 
     # relationships
     roles = db.relationship(
         'Role',
         secondary=roles,
-        lazy='subquery',
         order_by="Role.priority",
         backref=db.backref('users', lazy=True))
     terms_of_services = db.relationship(
         'UserTermsOfService',
-        lazy='subquery',
         cascade="all,delete-orphan",
         back_populates='user',
         order_by=UserTermsOfService.accept_date.desc())
@@ -227,11 +235,7 @@ class User(db.Model, BaseModel):
         :type password: str
         """
 
-        self._password = str(
-            bcrypt.hashpw(
-                bytes(password, 'utf-8'),
-                bcrypt.gensalt(self.HASH_ROUNDS)),
-            'utf8')
+        self._password = hasher.hashpw(password)
         self.password_changed_at = datetime.now()
 
     @hybrid_property
@@ -294,12 +298,42 @@ class User(db.Model, BaseModel):
         :rtype: bool
         """
 
-        return bcrypt.checkpw(
-            password.encode('utf-8'), self._password.encode('utf-8'))
+        return hasher.checkpw(password, self._password)
+
+    def rehash_password(self, password):
+        """Rehashes the password if its hash was created with a cost other than
+        the current policy. Unlike setting `password` this does not count as
+        a password change.
+
+        :param password: User's plaintext password, already checked
+        :type password: str
+        :return: True if rehashed, False otherwise
+        :rtype: bool
+        """
+
+        if not hasher.needs_rehash(self._password):
+            return False
+        self._password = hasher.hashpw(password)
+        return True
+
+    def set_password_hash(self, hashed):
+        """Sets `password` property from a hash already created with the
+        hasher, i.e.: hashed in a batch with `hasher.hashpw_many()`.
+
+        :param hashed: User's Bcrypt password hash
+        :type hashed: str
+        """
+
+        self._password = hashed
+        self.password_changed_at = datetime.now()
 
     def generate_auth_token(self, expiration=1800):
         """Creates a new authentication token.
 
+        The token is self-contained: its signed claims carry the role names,
+        password expiration and version counter needed to authorize requests
+        without loading the account, only its current version.
+
         :param expiration: Length of time in seconds that token is valid
         :type expiration: int
         :return: Authentication token
@@ -307,26 +341,116 @@ class User(db.Model, BaseModel):
         """
 
         ser = Serializer(self.AUTH_SECRET_KEY, expires_in=expiration)
-        return ser.dumps({'id': self.id, 'type': 'user'})
+        return ser.dumps(AuthSnapshot.from_user(self, 'user').to_claims(
+            role_registry.generation()))
+
+    @staticmethod
+    def current_version(user_id):
+        """Reads the version of a user from the database, with a
+        single-column lookup by primary key.
+
+        :param user_id: The user's ID
+        :type user_id: int
+        :return: The user's version, None if it does not exist
+        :rtype: int | None
+        """
+
+        return User.query.with_entities(User.version).filter(
+            User.id == user_id).scalar()
 
     @staticmethod
     def verify_auth_token(token):
         """Verifies authentication token is valid and current.
 
+        The account snapshot is built from the token's claims if their
+        version is still the account's version in the database, which any
+        process or deployment writing the account's password, status or
+        roles, or deleting it, changes, and their role policies are still
+        current (see `RoleRegistry.generation()`, reloaded at least every
+        `ROLES_REGISTRY_TTL`); otherwise, or if the token predates claims or
+        this process has since written the account or its roles, the account
+        is loaded. Verified tokens are cached along with their
+        snapshot until the token expires, the cache entry's TTL
+        (`AUTH_TOKEN_CACHE_TTL`, the staleness accepted for writes made by
+        other processes) runs out or the account is written by this process,
+        whichever comes first.
+
         :param token: Authentication token
         :type token: str
-        :return: The user associated with token if valid, None otherwise
-        :rtype: User | None
+        :return: Snapshot of the token's user if valid, None otherwise
+        :rtype: AuthSnapshot | None
         """
 
+        snapshot = token_cache.get(token)
+        if snapshot is not None:
+            return snapshot if snapshot.type == 'user' else None
+
         ser = Serializer(User.AUTH_SECRET_KEY)
         try:
-            data = ser.loads(token)
+            data, header = ser.loads(token, return_header=True)
         except SignatureExpired:
             return None  # valid token, but expired
         except BadSignature:
             return None  # invalid token
         if 'type' in data and data['type'] == 'user':
-            user = User.query.get(data['id'])
-            return user
+            if token_cache.is_current(data, header['iat']) and \
+                    data.get('rgen') == role_registry.generation() and \
+                    User.current_version(data['id']) == data['ver']:
+                snapshot = AuthSnapshot.from_claims(data)
+            else:
+                user = User.query.get(data['id'])
+                if user is None:
+                    return None
+                snapshot = AuthSnapshot.from_user(user, 'user')
+            token_cache.set(token, snapshot, header['exp'])
+            return snapshot
         return None
+
+
+@event.listens_for(User, 'before_update')
+def increment_version(mapper, connection, target):
+    """Increments a user's version when its password, status or roles
+    change, marking the claims of previously issued tokens as stale.
+
+    :param mapper: The User mapper
+    :param connection: The database connection
+    :param target: The user being written
+    :type target: User
+    """
+    # pylint: disable=unused-argument
+
+    # a rehash on login replaces the hash but keeps the password, so
+    # password changes are detected through `password_changed_at`
+    state = db.inspect(target)
+    if any(state.attrs[attr].history.has_changes()
+           for attr in ('password_changed_at', 'status', 'roles')):
+        target.version = (target.version or 1) + 1
+
+
+@event.listens_for(User, 'after_update')
+def invalidate_auth_tokens(mapper, connection, target):
+    """Drops cached authentication tokens when a user is written.
+
+    :param mapper: The User mapper
+    :param connection: The database connection
+    :param target: The user being written
+    :type target: User
+    """
+    # pylint: disable=unused-argument
+
+    token_cache.invalidate('user', target.id, target.version)
+
+
+@event.listens_for(User, 'after_delete')
+def revoke_auth_tokens(mapper, connection, target):
+    """Drops cached authentication tokens and marks the claims of its issued
+    tokens as stale when a user is deleted.
+
+    :param mapper: The User mapper
+    :param connection: The database connection
+    :param target: The user being deleted
+    :type target: User
+    """
+    # pylint: disable=unused-argument
+
+    token_cache.invalidate('user', target.id, math.inf)
@@ -13,15 +13,40 @@ from marshmallow import ValidationError
 from sqlalchemy.orm.exc import NoResultFound
 
 from init_dep import db
-from lib.routes.pager import Pager
+from lib.routes.bulk import Bulk
+from lib.routes.conditional import Conditional
+from lib.routes.export import Export
+from lib.routes.listing import Listing
 from lib.routes.query import Query
+from lib.schema.compiler import dump
+from lib.schema.factory import get_schema
 from lib.schema.validate import unique, unique_email, exists
+from lib.sqlalchemy.loading import LoadingProfile
 from modules.roles.model import Role
+from modules.terms_of_services.model import TermsOfService
 from modules.user_profiles.model import UserProfile
-from .model import User
+from .model import User, UserTermsOfService, roles as user_roles_table
 from .schema_admin import UserAdminSchema
 
 
+# relationships dumped with UserAdminSchema
+user_loading = LoadingProfile(
+    User,
+    selectin=('roles', 'terms_of_services',
+              'terms_of_services.terms_of_service'),
+    joined=('profile',))
+
+# relationships deleted along with users
+user_delete_loading = LoadingProfile(
+    User,
+    selectin=('roles', 'terms_of_services', 'password_resets',
+              'notifications', 'password_history'),
+    joined=('profile',))
+
+
+@Conditional(User, UserProfile, UserTermsOfService, TermsOfService,
+             user_roles_table, Role)
+@user_loading
 def get_users(page=1, limit=10):
     """Retrieves a list of users.
 
@@ -33,55 +58,28 @@ def get_users(page=1, limit=10):
     :rtype: (str, int)
     """
 
-    # initialize query
-    query = Query.make(
-        User,
-        User.id.asc(),
-        {
-            'id.asc': User.id.asc(),
-            'id.desc': User.id.desc(),
-            'username.asc': User.username.asc(),
-            'username.desc': User.username.desc(),
-            'created_at.asc': User.created_at.asc(),
-            'created_at.desc': User.created_at.desc(),
-            'updated_at.asc': User.updated_at.asc(),
-            'updated_at.desc': User.updated_at.desc(),
-        },
-        request.args,
-        Query.STATUS_FILTER_ADMIN)
-
-    # filter query based on URL parameters
-    if request.args.get('role', '').isnumeric():
-        query = query.filter(
-            User.roles.any(Role.id == int(request.args.get('role'))))
-    if request.args.get('username', None) is not None:
-        query = query.filter(
-            User.username.ilike('%' + request.args.get('username') + '%'))
-    if request.args.get('email', None) is not None:
-        temp_user = User(email=request.args.get('email'))
-        query = query.filter(
-            User.email_digest == temp_user.email_digest)
+    # initialize filtered query
+    listing = _users_listing()
 
     # retrieve and return results
-    results = list(query.limit(limit).offset((page - 1) * limit))
+    only = listing.select_fields(UserAdminSchema)
+    results = listing.fetch(page, limit)
     if len(results) > 0:
 
         # prep initial output
         output = {
-            'users': UserAdminSchema(many=True).dump(results),
-            'page': page,
-            'limit': limit,
-            'total': query.count()
+            'users': dump(get_schema(
+                UserAdminSchema, many=True, only=only), results),
         }
 
         # add pagination URIs and return
-        output.update(Pager.get_uris('admin_users.get_users', page, limit,
-                                     output['total'], request.args))
+        output.update(listing.get_pagination('admin_users.get_users'))
         return jsonify(output), 200
 
     return '', 204
 
 
+@user_loading
 def post_user():
     """Creates a new user.
 
@@ -101,7 +99,7 @@ def post_user():
 
     # validate data
     try:
-        data = UserAdminSchema().load(request.json)
+        data = get_schema(UserAdminSchema).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -135,9 +133,13 @@ def post_user():
     db.session.commit()
 
     # response
-    return jsonify({'user': UserAdminSchema().dump(user)}), 201
+    return jsonify({'user': get_schema(UserAdminSchema).dump(user)}), 201
 
 
+@Conditional(User, UserProfile.user_id, UserTermsOfService.user_id,
+             TermsOfService, user_roles_table.c.user_id, Role, id='user_id',
+             username='username')
+@user_loading
 def get_user(user_id=None, username=None):
     """Retrieves an existing user.
 
@@ -161,9 +163,10 @@ def get_user(user_id=None, username=None):
         abort(404)
 
     # response
-    return jsonify({'user': UserAdminSchema().dump(user)}), 200
+    return jsonify({'user': get_schema(UserAdminSchema).dump(user)}), 200
 
 
+@user_loading
 def put_user(user_id):
     """Updates an existing user.
 
@@ -191,9 +194,10 @@ def put_user(user_id):
     # validate data
     try:
         if request.json.get('password', None):
-            data = UserAdminSchema().load(request.json)
+            data = get_schema(UserAdminSchema).load(request.json)
         else:
-            data = UserAdminSchema(exclude=('password',)).load(request.json)
+            data = get_schema(
+                UserAdminSchema, exclude=('password',)).load(request.json)
     except ValidationError as err:
         errors = dict(list(errors.items()) + list(err.messages.items()))
 
@@ -241,7 +245,7 @@ def put_user(user_id):
     db.session.commit()
 
     # response
-    return jsonify({'user': UserAdminSchema().dump(user)}), 200
+    return jsonify({'user': get_schema(UserAdminSchema).dump(user)}), 200
 
 
 def delete_user(user_id):
@@ -264,3 +268,191 @@ def delete_user(user_id):
 
     # response
     return '', 204
+
+
+@user_loading
+def post_users_bulk():
+    """Creates a batch of new users, see `Bulk`.
+
+    :returns: JSON string of the results for each user; status code
+    :rtype: (str, int)
+    """
+
+    bulk = Bulk(User, UserAdminSchema, 'user')
+    items, errors = bulk.items(request.json, 'users')
+    if errors:
+        return jsonify({"error": errors}), 400
+
+    # validate data
+    data, roles = bulk.load(items)
+
+    # save users
+    users = []
+    for item, user_roles in zip(data, roles):
+        if item is None:
+            users.append(None)
+            continue
+
+        user = User(username=item['username'].lower().strip(),
+                    email=item['email'].lower().strip(),
+                    is_verified=item['is_verified'],
+                    status=item['status'],
+                    status_changed_at=datetime.now())
+        user.roles.extend(user_roles)
+
+        if 'profile' in item:
+            db.session.add(UserProfile(
+                user=user,
+                first_name=item['profile']['first_name'].strip(),
+                last_name=item['profile']['last_name'].strip(),
+                joined_at=item['profile']['joined_at'],
+                status=item['status'],
+                status_changed_at=datetime.now()))
+
+        db.session.add(user)
+        users.append(user)
+
+    Bulk.hash_passwords(users, data)
+    db.session.commit()
+
+    # response
+    bulk.written(users, 201)
+    return jsonify(bulk.response()), 200
+
+
+@user_loading
+def put_users_bulk():
+    """Updates a batch of existing users, see `Bulk`.
+
+    :returns: JSON string of the results for each user; status code
+    :rtype: (str, int)
+    """
+
+    bulk = Bulk(User, UserAdminSchema, 'user')
+    items, errors = bulk.items(request.json, 'users')
+    if errors:
+        return jsonify({"error": errors}), 400
+
+    # get users and validate data
+    users = bulk.fetch([item.get('id', None) if isinstance(item, dict)
+                        else None for item in items])
+    data, roles = bulk.load(items, users)
+    users = [user if item is not None else None
+             for user, item in zip(users, data)]
+
+    # save users
+    for user, item, user_roles in zip(users, data, roles):
+        if item is None:
+            continue
+
+        user.username = item['username'].lower().strip()
+        user.email = item['email'].lower().strip()
+        user.is_verified = item['is_verified']
+        user.roles[:] = user_roles
+
+        if user.status != item['status']:
+            user.status = item['status']
+            user.status_changed_at = datetime.now()
+
+        if 'profile' in item:
+            if user.profile:
+                user.profile.first_name = item['profile']['first_name'].strip()
+                user.profile.last_name = item['profile']['last_name'].strip()
+                user.profile.joined_at = item['profile']['joined_at']
+                if user.profile.status != item['status']:
+                    user.profile.status = item['status']
+                    user.profile.status_changed_at = datetime.now()
+            else:
+                user.profile = UserProfile(
+                    first_name=item['profile']['first_name'].strip(),
+                    last_name=item['profile']['last_name'].strip(),
+                    joined_at=item['profile']['joined_at'],
+                    status=item['status'],
+                    status_changed_at=datetime.now())
+
+    Bulk.hash_passwords(users, data)
+    db.session.commit()
+
+    # response
+    bulk.written(users, 200)
+    return jsonify(bulk.response()), 200
+
+
+@user_delete_loading
+def delete_users_bulk():
+    """Deletes a batch of existing users, see `Bulk`.
+
+    :returns: JSON string of the results for each user; status code
+    :rtype: (str, int)
+    """
+
+    bulk = Bulk(User, UserAdminSchema, 'user')
+    ids, errors = bulk.items(request.json, 'ids')
+    if errors:
+        return jsonify({"error": errors}), 400
+
+    # delete users
+    users = bulk.fetch(ids)
+    for user in users:
+        if user is not None:
+            db.session.delete(user)
+    db.session.commit()
+
+    # response
+    bulk.written(users, 204)
+    return jsonify(bulk.response()), 200
+
+
+@user_loading
+def export_users():
+    """Exports all the users matching the filters of `get_users()`,
+    see `Export`.
+
+    :returns: Streamed response of the users
+    :rtype: flask.Response
+    """
+
+    listing = _users_listing()
+    only = listing.select_fields(UserAdminSchema)
+    return Export(listing.query, get_schema(UserAdminSchema, only=only),
+                  request.args).response('users')
+
+
+def _users_listing():
+    """Creates the listing of users, filtered by the URL parameters.
+
+    :return: The listing
+    :rtype: Listing
+    """
+
+    # initialize query
+    listing = Listing(
+        User,
+        User.id.asc(),
+        {
+            'id.asc': User.id.asc(),
+            'id.desc': User.id.desc(),
+            'username.asc': User.username.asc(),
+            'username.desc': User.username.desc(),
+            'created_at.asc': User.created_at.asc(),
+            'created_at.desc': User.created_at.desc(),
+            'updated_at.asc': User.updated_at.asc(),
+            'updated_at.desc': User.updated_at.desc(),
+        },
+        request.args,
+        Query.STATUS_FILTER_ADMIN)
+
+    # filter query based on URL parameters
+    if request.args.get('role', '').isnumeric():
+        listing.filter(
+            User.roles.any(Role.id == int(request.args.get('role'))))
+    if request.args.get('username', None) is not None:
+        listing.filter(Query.search(
+            User.username, request.args.get('username').lower(),
+            request.args.get('match', None)))
+    if request.args.get('email', None) is not None:
+        temp_user = User(email=request.args.get('email'))
+        listing.filter(
+            User.email_digest == temp_user.email_digest)
+
+    return listing
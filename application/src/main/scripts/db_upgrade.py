@@ -0,0 +1,149 @@
+import os
+import sys
+
+# include application directory in import path
+SCRIPT_DIR = os.path.dirname(
+    os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, '../python')))
+
+# application imports
+from sqlalchemy import text
+
+from app import create_app
+from config import Config
+from init_dep import db
+
+# schema changes of existing databases, in order; each statement can be run
+# again safely (new databases get them through `db.create_all()`)
+UPGRADES = (
+
+    # account versions, carried by the claims of authentication tokens
+    "ALTER TABLE users "
+    "ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE administrators "
+    "ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+)
+
+# trigram indexes of searched columns, as (table, column); the pg_trgm
+# extension is added by scripts/upgrade_db.sh, as a superuser
+TRIGRAM_INDEXES = (
+    ('users', 'username'),
+    ('administrators', 'username'),
+    ('roles', 'name'),
+    ('logins', 'username'),
+    ('logins', 'ip_address'),
+)
+
+
+def autocommit(statement, **params):
+    """Runs a statement in a transaction of its own, which concurrent index
+    builds require.
+
+    :param statement: The SQL statement
+    :type statement: str
+    :return: The rows returned, if any
+    :rtype: list
+    """
+
+    print(statement)
+    with db.engine.connect().execution_options(
+            isolation_level='AUTOCOMMIT') as connection:
+        result = connection.execute(text(statement), params)
+        return result.fetchall() if result.returns_rows else []
+
+
+def index_state(name):
+    """Reads whether an index exists and is valid.
+
+    :param name: The index's name
+    :type name: str
+    :return: True if valid, False if invalid, None if it does not exist
+    :rtype: bool | None
+    """
+
+    return db.session.execute(text(
+        'SELECT i.indisvalid FROM pg_index i '
+        'JOIN pg_class c ON c.oid = i.indexrelid '
+        'WHERE c.relname = :name'), {'name': name}).scalar()
+
+
+def create_index_concurrently(name, table, definition):
+    """Builds an index without blocking writes to its table. An invalid index
+    left behind by an interrupted build is dropped and built again.
+
+    :param name: The index's name
+    :type name: str
+    :param table: The table's name
+    :type table: str
+    :param definition: The index method and columns, e.g. `USING gin (...)`
+    :type definition: str
+    """
+
+    state = index_state(name)
+    db.session.rollback()
+    if state:
+        return
+    if state is False:
+        autocommit('DROP INDEX CONCURRENTLY {}'.format(name))
+    autocommit('CREATE INDEX CONCURRENTLY {} ON {} {}'.format(
+        name, table, definition))
+
+
+def create_partitioned_index(name, table, definition):
+    """Builds an index of a partitioned table, which cannot be indexed
+    concurrently, without blocking writes: the index is created on the table
+    only, then the index of each partition is built concurrently and attached
+    to it; the table's index is valid once all partitions are attached.
+
+    :param name: The index's name
+    :type name: str
+    :param table: The partitioned table's name
+    :type table: str
+    :param definition: The index method and columns, e.g. `USING gin (...)`
+    :type definition: str
+    """
+
+    autocommit('CREATE INDEX IF NOT EXISTS {} ON ONLY {} {}'.format(
+        name, table, definition))
+    partitions = [row[0] for row in db.session.execute(text(
+        'SELECT c.relname FROM pg_inherits i '
+        'JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = CAST(:table AS regclass) '
+        'AND NOT EXISTS (SELECT 1 FROM pg_inherits ii '
+        'JOIN pg_index x ON x.indexrelid = ii.inhrelid '
+        'WHERE ii.inhparent = CAST(:name AS regclass) '
+        'AND x.indrelid = c.oid) ORDER BY c.relname'),
+        {'table': table, 'name': name})]
+    db.session.rollback()
+    for partition in partitions:
+        partition_index = name.replace(table, partition, 1)
+        create_index_concurrently(partition_index, partition, definition)
+        autocommit('ALTER INDEX {} ATTACH PARTITION {}'.format(
+            name, partition_index))
+
+
+# init app
+app = create_app(Config)
+
+with app.app_context():
+
+    # apply the upgrades in one transaction
+    for statement in UPGRADES:
+        print(statement)
+        db.session.execute(statement)
+    db.session.commit()
+
+    # build the indexes one at a time, without blocking writes
+    for table_name, column_name in TRIGRAM_INDEXES:
+        index_name = 'ix_{}_{}_trgm'.format(table_name, column_name)
+        index_definition = 'USING gin ({} gin_trgm_ops)'.format(column_name)
+        partitioned = db.session.execute(text(
+            "SELECT relkind = 'p' FROM pg_class "
+            "WHERE oid = CAST(:table AS regclass)"),
+            {'table': table_name}).scalar()
+        db.session.rollback()
+        if partitioned:
+            create_partitioned_index(index_name, table_name, index_definition)
+        else:
+            create_index_concurrently(
+                index_name, table_name, index_definition)
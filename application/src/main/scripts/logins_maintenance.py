@@ -0,0 +1,23 @@
+import os
+import sys
+
+# include application directory in import path
+SCRIPT_DIR = os.path.dirname(
+    os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, '../python')))
+
+# application imports
+from app import create_app
+from config import Config
+from modules.logins.partitions import login_partitions
+
+# init app
+app = create_app(Config)
+
+# create upcoming partitions of the logins table and enforce the retention
+with app.app_context():
+    created, archived = login_partitions.maintain()
+    for name in created:
+        print('Created partition {}'.format(name))
+    for path in archived:
+        print('Archived {}'.format(path))
@@ -0,0 +1,113 @@
+import os
+import sys
+
+# include application directory in import path
+SCRIPT_DIR = os.path.dirname(
+    os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, '../python')))
+
+# application imports
+from sqlalchemy import text
+
+from app import create_app
+from config import Config
+from init_dep import db
+from lib.net import IPAddress
+from modules.logins.model import Login
+from modules.logins.partitions import login_partitions
+
+# number of distinct IP addresses backfilled per transaction
+BATCH_SIZE = 1000
+
+
+def add_ip_inet():
+    """Adds the `ip_inet` shadow column of the logins table, fills it from
+    `ip_address` and indexes it for network filters. Can be run again
+    safely."""
+
+    db.session.execute(text(
+        'ALTER TABLE logins ADD COLUMN IF NOT EXISTS ip_inet INET'))
+    db.session.commit()
+
+    # canonical addresses are set in Python, as the model does; values that
+    # are not IP addresses are left null
+    addresses = [row[0] for row in db.session.execute(text(
+        'SELECT DISTINCT ip_address FROM logins '
+        'WHERE ip_inet IS NULL AND ip_address IS NOT NULL'))]
+    backfilled = 0
+    for start in range(0, len(addresses), BATCH_SIZE):
+        for address in addresses[start:start + BATCH_SIZE]:
+            ip_inet = IPAddress.normalize(address)
+            if ip_inet is not None:
+                db.session.execute(text(
+                    'UPDATE logins SET ip_inet = :ip_inet '
+                    'WHERE ip_address = :address AND ip_inet IS NULL'),
+                    {'ip_inet': ip_inet, 'address': address})
+                backfilled += 1
+        db.session.commit()
+    print('Backfilled ip_inet of {} IP addresses'.format(backfilled))
+
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_logins_ip_inet ON logins '
+        'USING gist (ip_inet inet_ops)'))
+    db.session.commit()
+
+
+def partition_logins():
+    """Converts a logins table created before the partitioning to the table
+    partitioned by month, see `LoginPartitions`. Skipped once the table is
+    partitioned.
+
+    The attempts are copied in one transaction, during which no login can
+    be recorded; they are then moved to their monthly partitions, one
+    transaction per month.
+    """
+
+    partitioned = db.session.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE relname = 'logins' AND "
+        "relnamespace = 'public'::regnamespace")).scalar()
+    if not partitioned:
+        old = 'logins_unpartitioned'
+
+        # free the names of the table, its key, sequence and indexes
+        db.session.execute(text('ALTER TABLE logins RENAME TO {}'.format(old)))
+        db.session.execute(text(
+            'ALTER TABLE {0} RENAME CONSTRAINT logins_pkey TO {0}_pkey'.format(
+                old)))
+        db.session.execute(text(
+            'ALTER SEQUENCE logins_id_seq RENAME TO {}_id_seq'.format(old)))
+        indexes = db.session.execute(text(
+            'SELECT indexname FROM pg_indexes WHERE tablename = :table AND '
+            'indexname <> :key'), {'table': old, 'key': old + '_pkey'})
+        for name in [row[0] for row in indexes]:
+            db.session.execute(text('DROP INDEX {}'.format(name)))
+
+        # the new table, with its default partition, receives the attempts
+        Login.__table__.create(db.session.connection())
+        columns = ', '.join(Login.__table__.c.keys())
+        db.session.execute(text(
+            'INSERT INTO logins ({0}) SELECT {0} FROM {1}'.format(
+                columns, old)))
+        db.session.execute(text(
+            "SELECT setval(pg_get_serial_sequence('logins', 'id'), max(id)) "
+            "FROM {} HAVING max(id) IS NOT NULL".format(old)))
+        db.session.execute(text('DROP TABLE {}'.format(old)))
+        db.session.commit()
+        print('Partitioned logins table')
+
+    for name in login_partitions.partition_default():
+        print('Created partition {}'.format(name))
+    created, archived = login_partitions.maintain()
+    for name in created:
+        print('Created partition {}'.format(name))
+    for path in archived:
+        print('Archived {}'.format(path))
+
+
+# init app
+app = create_app(Config)
+
+# upgrade the logins table of an existing database
+with app.app_context():
+    add_ip_inet()
+    partition_logins()
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import g
+from werkzeug.exceptions import Forbidden, Unauthorized
+
+from app import create_app
+from config import Config
+from lib.auth import AuthSnapshot, check_password_expiration
+from modules.roles.model import Role
+from modules.users.model import User
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+    return app
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_auth_snapshot_from_user():
+    role = Role()
+    role.name = 'USER'
+    role.password_reset_days = 30
+
+    user = User()
+    user.id = 2
+    user.username = 'user2'
+    user.password_changed_at = datetime(2019, 1, 1)
+    user.roles = [role]
+
+    snapshot = AuthSnapshot.from_user(user, 'user')
+
+    assert snapshot.id == 2
+    assert snapshot.type == 'user'
+    assert snapshot.username == 'user2'
+    assert snapshot.roles == ('USER',)
+    assert snapshot.password_expires_at == datetime(2019, 1, 31)
+    assert snapshot.is_password_expired()
+
+
+@pytest.mark.unit
+def test_auth_snapshot_password_not_expired():
+    snapshot = AuthSnapshot(2, 'user', 'user2', ['USER'],
+                            datetime.now() + timedelta(days=1))
+    assert not snapshot.is_password_expired()
+
+    snapshot = AuthSnapshot(2, 'user', 'user2', [], None)
+    assert not snapshot.is_password_expired()
+
+
+@pytest.mark.unit
+def test_auth_globals_lazy_user(app):
+    user = User()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return user
+
+    with app.app_context():
+        assert not hasattr(g, 'user')
+
+        g.user_loader = loader
+        assert loads == []
+        assert g.user is user
+        assert g.user is user
+        assert loads == [1]
+
+
+@pytest.mark.unit
+def test_auth_globals_lazy_user_missing(app):
+    with app.app_context():
+        g.user_loader = lambda: None
+        with pytest.raises(Unauthorized):
+            g.user
+
+
+@pytest.mark.unit
+def test_check_password_expiration(app):
+
+    @check_password_expiration
+    def view():
+        return True
+
+    with app.app_context():
+        g.auth = AuthSnapshot(2, 'user', 'user2', ['USER'],
+                              datetime.now() + timedelta(days=1))
+        assert view() is True
+
+        g.auth = AuthSnapshot(2, 'user', 'user2', ['USER'],
+                              datetime.now() - timedelta(days=1))
+        with pytest.raises(Forbidden):
+            view()
+
+
+@pytest.mark.unit
+def test_auth_snapshot_claims():
+    snapshot = AuthSnapshot(2, 'user', 'user2', ['USER'],
+                            datetime(2030, 1, 1, 12, 30), 4)
+
+    claims = snapshot.to_claims('gen1')
+    assert claims == {'id': 2, 'type': 'user', 'username': 'user2',
+                      'roles': ['USER'], 'pwd_exp': claims['pwd_exp'],
+                      'ver': 4, 'rgen': 'gen1'}
+
+    snapshot2 = AuthSnapshot.from_claims(claims)
+    assert snapshot2.id == 2
+    assert snapshot2.type == 'user'
+    assert snapshot2.username == 'user2'
+    assert snapshot2.roles == ('USER',)
+    assert snapshot2.password_expires_at == datetime(2030, 1, 1, 12, 30)
+    assert snapshot2.version == 4
@@ -0,0 +1,159 @@
+from concurrent import futures
+
+import pytest
+from werkzeug.exceptions import ServiceUnavailable
+
+from app import create_app
+from config import Config
+from lib.auth.hashing import PasswordHasher
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+    return app
+
+
+@pytest.fixture
+def hasher(app):
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+    yield hasher
+    hasher.shutdown()
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_hasher_inline(hasher):
+    assert not hasher.enabled
+    hashed = hasher.hashpw('testPass1', 4)
+    assert hashed.startswith('$2b$04$')
+    assert hasher.checkpw('testPass1', hashed)
+    assert not hasher.checkpw('testPass2', hashed)
+
+
+@pytest.mark.unit
+def test_hasher_pool(app, hasher):
+    app.config['AUTH_HASH_POOL_ENABLED'] = True
+    app.config['AUTH_HASH_POOL_WORKERS'] = 1
+    hasher.init_app(app)
+    assert hasher.enabled
+    assert hasher.queue_size == 2
+
+    hashed = hasher.hashpw('testPass1', 4)
+    assert hasher.checkpw('testPass1', hashed)
+    assert not hasher.checkpw('testPass2', hashed)
+
+
+@pytest.mark.unit
+def test_hasher_pool_replace(app, hasher, mocker):
+    app.config['AUTH_HASH_POOL_ENABLED'] = True
+    app.config['AUTH_HASH_POOL_WORKERS'] = 1
+    hasher.init_app(app)
+
+    # workers are not forked from the threaded application process
+    executor = hasher._get_executor()
+    assert executor._mp_context.get_start_method() == 'forkserver'
+    assert hasher._get_executor() is executor
+
+    # a replaced pool is stopped
+    shutdown_spy = mocker.spy(executor, 'shutdown')
+    assert isinstance(hasher._get_executor(futures.ThreadPoolExecutor),
+                      futures.ThreadPoolExecutor)
+    shutdown_spy.assert_called_once_with(wait=False)
+
+
+@pytest.mark.unit
+def test_hasher_pool_full(app, hasher):
+    app.config['AUTH_HASH_POOL_ENABLED'] = True
+    app.config['AUTH_HASH_POOL_QUEUE_SIZE'] = 1
+    app.config['AUTH_HASH_POOL_RETRY_AFTER'] = 5
+    hasher.init_app(app)
+
+    # occupy the only slot
+    assert hasher._slots.acquire(blocking=False)
+
+    with pytest.raises(ServiceUnavailable) as error:
+        hasher.checkpw('testPass1', '$2b$04$invalid')
+    assert dict(error.value.get_headers())['Retry-After'] == '5'
+
+
+@pytest.mark.unit
+def test_hasher_rounds(app, hasher):
+    assert hasher.rounds == app.config['AUTH_HASH_ROUNDS']
+    hashed = hasher.hashpw('testPass1')
+    assert hasher.get_rounds(hashed) == hasher.rounds
+    assert not hasher.needs_rehash(hashed)
+    assert hasher.needs_rehash(hasher.hashpw('testPass1', hasher.rounds + 1))
+    assert hasher.get_rounds('plaintext') is None
+    assert hasher.needs_rehash('plaintext')
+
+
+@pytest.mark.unit
+def test_hasher_calibrate(app, hasher):
+    assert PasswordHasher.calibrate(0, 4) == 4
+    assert PasswordHasher.calibrate(0, 6) == 6
+    assert PasswordHasher.calibrate(10 ** 9, 4, 6) == 6
+
+    app.config['AUTH_HASH_TARGET_MS'] = 1
+    app.config['AUTH_HASH_MIN_ROUNDS'] = 5
+    hasher.init_app(app)
+    assert hasher.rounds == 5
+
+
+@pytest.mark.unit
+def test_hasher_hashpw_many(hasher):
+    hashes = hasher.hashpw_many(['testPass%d' % i for i in range(1, 6)], 4)
+
+    assert len(hashes) == 5
+    for i, hashed in enumerate(hashes, 1):
+        assert hashed.startswith('$2b$04$')
+        assert hasher.checkpw('testPass%d' % i, hashed)
+    assert hasher.hashpw_many([]) == []
+
+
+@pytest.mark.unit
+def test_hasher_hashpw_many_pool(app, hasher):
+    app.config['AUTH_HASH_POOL_ENABLED'] = True
+    app.config['AUTH_HASH_POOL_WORKERS'] = 2
+    hasher.init_app(app)
+
+    hashes = hasher.hashpw_many(['testPass1', 'testPass2', 'testPass3'], 4)
+    assert [hasher.checkpw('testPass%d' % i, hashed)
+            for i, hashed in enumerate(hashes, 1)] == [True] * 3
+
+
+@pytest.mark.unit
+def test_hasher_checkpw_any(hasher):
+    hashes = [hasher.hashpw('testPass%d' % i) for i in range(1, 6)]
+
+    assert hasher.checkpw_any('testPass1', hashes)
+    assert hasher.checkpw_any('testPass5', hashes)
+    assert not hasher.checkpw_any('testPass6', hashes)
+    assert not hasher.checkpw_any('testPass1', [])
+
+
+@pytest.mark.unit
+def test_hasher_checkpw_any_pool(app, hasher):
+    app.config['AUTH_HASH_POOL_ENABLED'] = True
+    app.config['AUTH_HASH_POOL_WORKERS'] = 2
+    hasher.init_app(app)
+    hashes = [hasher.hashpw('testPass%d' % i) for i in range(1, 4)]
+
+    assert hasher.checkpw_any('testPass3', hashes)
+    assert not hasher.checkpw_any('testPass4', hashes)
+
+
+@pytest.mark.unit
+def test_hasher_checkpw_any_timeout(hasher):
+    hashes = [hasher.hashpw('testPass1', 12)] * 2
+
+    with pytest.raises(ServiceUnavailable) as error:
+        hasher.checkpw_any('testPass2', hashes, timeout=0.001)
+    assert error.value.description == \
+        "Password history check timed out, please try again later."
+    assert dict(error.value.get_headers())['Retry-After'] == str(
+        hasher.retry_after)
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from config import Config
+from lib.auth.login_failures import LoginFailures, MemoryBackend, \
+    SharedMemoryBackend
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+    return app
+
+
+@pytest.fixture(params=['memory', 'shared'])
+def login_failures(app, request, tmp_path):
+    app.config['AUTH_LOCKOUT_BACKEND'] = request.param
+    app.config['AUTH_LOCKOUT_SHARED_PATH'] = str(tmp_path / 'failures')
+    app.config['AUTH_LOCKOUT_SLOTS'] = 64
+    app.config['AUTH_LOCKOUT_HISTORY'] = 4
+    login_failures = LoginFailures()
+    login_failures.init_app(app)
+    login_failures.load('user', [])
+    return login_failures
+
+
+def fail(login_failures, count, start, ip_address='1.1.1.1', step=1):
+    for i in range(count):
+        login_failures.record('user', 'user1', ip_address, False,
+                              start + i * step)
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_login_failures_backend(app, tmp_path):
+    assert isinstance(LoginFailures().backend, MemoryBackend)
+
+    app.config['AUTH_LOCKOUT_BACKEND'] = 'shared'
+    app.config['AUTH_LOCKOUT_SHARED_PATH'] = str(tmp_path / 'failures')
+    login_failures = LoginFailures()
+    login_failures.init_app(app)
+    assert isinstance(login_failures.backend, SharedMemoryBackend)
+
+
+@pytest.mark.unit
+def test_login_failures_locked(login_failures):
+    now = 1000000.0
+    fail(login_failures, 2, now - 10)
+    assert not login_failures.is_locked('user', 'user1', None, 3, 60, 300,
+                                        now)
+
+    fail(login_failures, 1, now - 8)
+    assert login_failures.is_locked('user', 'user1', None, 3, 60, 300, now)
+    assert not login_failures.is_locked('user', 'user2', None, 3, 60, 300,
+                                        now)
+    assert not login_failures.is_locked('administrator', 'user1', None, 3,
+                                        60, 300, now)
+
+    # ban expired
+    assert not login_failures.is_locked('user', 'user1', None, 3, 60, 300,
+                                        now + 300)
+
+
+@pytest.mark.unit
+def test_login_failures_timeframe(login_failures):
+    now = 1000000.0
+    fail(login_failures, 3, now - 100, step=40)
+    assert not login_failures.is_locked('user', 'user1', None, 3, 60, 300,
+                                        now)
+    assert login_failures.is_locked('user', 'user1', None, 2, 60, 300, now)
+
+
+@pytest.mark.unit
+def test_login_failures_success_resets(login_failures):
+    now = 1000000.0
+    fail(login_failures, 3, now - 10)
+    login_failures.record('user', 'user1', '1.1.1.1', True, now - 5)
+    assert not login_failures.is_locked('user', 'user1', None, 3, 60, 300,
+                                        now)
+
+    fail(login_failures, 3, now - 4)
+    assert login_failures.is_locked('user', 'user1', None, 3, 60, 300, now)
+
+
+@pytest.mark.unit
+def test_login_failures_by_ip(login_failures):
+    now = 1000000.0
+    fail(login_failures, 2, now - 10, '1.1.1.1')
+    fail(login_failures, 2, now - 5, '2.2.2.2')
+    assert login_failures.is_locked('user', 'user1', None, 3, 60, 300, now)
+    assert not login_failures.is_locked('user', 'user1', '1.1.1.1', 3, 60,
+                                        300, now)
+
+    fail(login_failures, 1, now - 1, '2.2.2.2')
+    assert login_failures.is_locked('user', 'user1', '2.2.2.2', 3, 60, 300,
+                                    now)
+
+
+@pytest.mark.unit
+def test_login_failures_by_ip_normalized(login_failures):
+    now = 1000000.0
+    fail(login_failures, 2, now - 10, '::ffff:2.2.2.2')
+    fail(login_failures, 1, now - 5, '2.2.2.2')
+    assert login_failures.is_locked('user', 'user1', '::FFFF:2.2.2.2', 3, 60,
+                                    300, now)
+
+
+@pytest.mark.unit
+def test_login_failures_duplicates_and_history(login_failures):
+    now = 1000000.0
+    fail(login_failures, 2, now - 10)
+    fail(login_failures, 2, now - 10)
+    assert not login_failures.is_locked('user', 'user1', None, 3, 60, 300,
+                                        now)
+
+    # attempts beyond the history size are capped to it
+    fail(login_failures, 10, now - 20)
+    assert login_failures.backend.get('user\0user1') == [
+        now - 12, now - 11, now - 10, now - 9]
+    assert login_failures.history == 4
+    assert login_failures.is_locked('user', 'user1', None, 4, 60, 300, now)
+
+    # policies the history cannot enforce
+    with pytest.raises(ValueError):
+        login_failures.is_locked('user', 'user1', None, 10, 60, 300, now)
+    with pytest.raises(ValueError):
+        login_failures.is_locked('user', 'user1', None, 0, 60, 300, now)
+
+
+@pytest.mark.unit
+def test_login_failures_load(login_failures):
+    now = datetime.now()
+    attempts = [('user2', '1.1.1.1', False, now - timedelta(seconds=i))
+                for i in range(3, 0, -1)]
+
+    assert not login_failures.is_loaded('administrator')
+    login_failures.record('administrator', 'user2', '1.1.1.1', False)
+    assert not login_failures.is_locked('administrator', 'user2', None, 3,
+                                        60, 300)
+
+    login_failures.load('administrator', attempts)
+    assert login_failures.is_loaded('administrator')
+    assert login_failures.is_locked('administrator', 'user2', None, 3, 60,
+                                    300)
+
+    # only rebuilt once
+    login_failures.load('administrator', [
+        ('user2', '1.1.1.1', True, now)])
+    assert login_failures.is_locked('administrator', 'user2', None, 3, 60,
+                                    300)
+
+
+@pytest.mark.unit
+def test_login_failures_shared(tmp_path):
+    path = str(tmp_path / 'failures')
+    backend1 = SharedMemoryBackend(8, 4, path)
+    backend2 = SharedMemoryBackend(8, 4, path)
+
+    backend1.set_loaded('user')
+    backend1.add('user\0user1', 1.0)
+    backend2.add('user\0user1', 2.0)
+    assert backend2.is_loaded('user')
+    assert not backend2.is_loaded('administrator')
+    assert backend1.get('user\0user1') == [1.0, 2.0]
+
+    # when full, the window with the oldest failure is reused
+    for i in range(8):
+        backend1.add('user\0other%d' % i, 10.0 + i)
+    assert backend2.get('user\0user1') == []
+    assert len(backend2.get('user\0other7')) == 1
+
+    backend2.clear('user\0other7')
+    assert backend1.get('user\0other7') == []
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from app import create_app
+from config import Config
+from lib.auth import AuthSnapshot
+from lib.auth.token_cache import TokenCache
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+    return app
+
+
+@pytest.fixture
+def token_cache(app):
+    cache = TokenCache()
+    cache.init_app(app)
+    return cache
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_token_cache_get_set(token_cache):
+    snapshot = AuthSnapshot(1, 'user', 'user1', ['USER'], None)
+    token_cache.set('token1', snapshot, time.time() + 3600)
+
+    assert token_cache.get('token1') is snapshot
+    assert token_cache.get(b'token1') is snapshot
+    assert token_cache.get('token2') is None
+    assert token_cache.get(None) is None
+
+
+@pytest.mark.unit
+def test_token_cache_expired_token(token_cache):
+    snapshot = AuthSnapshot(1, 'user', 'user1', ['USER'], None)
+    token_cache.set('token1', snapshot, time.time() - 1)
+
+    assert token_cache.get('token1') is None
+
+
+@pytest.mark.unit
+def test_token_cache_invalidate(token_cache):
+    snapshot1 = AuthSnapshot(1, 'user', 'user1', ['USER'], None)
+    snapshot2 = AuthSnapshot(1, 'administrator', 'admin1', ['SUPER_ADMIN'],
+                             None)
+    token_cache.set('token1', snapshot1, time.time() + 3600)
+    token_cache.set('token2', snapshot2, time.time() + 3600)
+
+    token_cache.invalidate('user', 1)
+
+    assert token_cache.get('token1') is None
+    assert token_cache.get('token2') is snapshot2
+
+    # new tokens are cached after invalidation
+    token_cache.set('token1', snapshot1, time.time() + 3600)
+    assert token_cache.get('token1') is snapshot1
+
+
+@pytest.mark.unit
+def test_token_cache_clear(token_cache):
+    snapshot = AuthSnapshot(1, 'user', 'user1', ['USER'], None)
+    token_cache.set('token1', snapshot, time.time() + 3600)
+    token_cache.clear()
+
+    assert token_cache.get('token1') is None
+
+
+@pytest.mark.unit
+def test_token_cache_is_current(token_cache):
+    claims = {'id': 1, 'type': 'user', 'ver': 2}
+    issued_at = time.time()
+
+    assert token_cache.is_current(claims, issued_at)
+    assert not token_cache.is_current({'id': 1, 'type': 'user'}, issued_at)
+
+    token_cache.invalidate('user', 1, 2)
+    assert token_cache.is_current(claims, issued_at)
+
+    token_cache.invalidate('user', 1, 3)
+    assert not token_cache.is_current(claims, issued_at)
+    assert token_cache.is_current({'id': 2, 'type': 'user', 'ver': 1},
+                                  issued_at)
+
+    token_cache.clear()
+    assert not token_cache.is_current({'id': 2, 'type': 'user', 'ver': 1},
+                                      issued_at - 1)
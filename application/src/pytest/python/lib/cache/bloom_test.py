@@ -0,0 +1,24 @@
+import pytest
+
+from lib.cache.bloom import BloomFilter
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_bloom_filter():
+    bloom = BloomFilter(100)
+    keys = ['key%d' % i for i in range(100)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum('other%d' % i in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+@pytest.mark.unit
+def test_bloom_filter_empty():
+    bloom = BloomFilter(0)
+    assert 'key' not in bloom
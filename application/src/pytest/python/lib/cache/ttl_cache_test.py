@@ -0,0 +1,71 @@
+import pytest
+
+from lib.cache import TTLCache
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_ttl_cache_get_set():
+    cache = TTLCache(10, 60)
+    cache.set('a', 1)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('b', 2) == 2
+    assert 'a' in cache
+    assert len(cache) == 1
+
+
+@pytest.mark.unit
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(2, 60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+
+@pytest.mark.unit
+def test_ttl_cache_expiration(mocker):
+    time_mock = mocker.patch('lib.cache.time.monotonic')
+    time_mock.return_value = 100
+
+    cache = TTLCache(10, 60)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=10)
+    cache.set('c', 3, ttl=600)
+
+    time_mock.return_value = 120
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+    time_mock.return_value = 161
+    assert cache.get('a') is None
+    assert cache.get('c') is None
+
+
+@pytest.mark.unit
+def test_ttl_cache_pop_clear():
+    cache = TTLCache(10, 60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    assert cache.pop('a') == 1
+    assert cache.get('a') is None
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+@pytest.mark.unit
+def test_ttl_cache_disabled():
+    cache = TTLCache(0, 60)
+    cache.set('a', 1)
+
+    assert cache.get('a') is None
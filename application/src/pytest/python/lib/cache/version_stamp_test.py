@@ -0,0 +1,27 @@
+import pytest
+
+from lib.cache.version_stamp import VersionStamp
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_version_stamp_local():
+    stamp = VersionStamp()
+    assert stamp.get() == 0
+    assert stamp.bump() == 1
+    assert stamp.get() == 1
+
+
+@pytest.mark.unit
+def test_version_stamp_shared(tmp_path):
+    path = str(tmp_path / 'stamp')
+    stamp1 = VersionStamp(path)
+    stamp2 = VersionStamp(path)
+
+    assert stamp1.get() == 0
+    assert stamp2.bump() == 1
+    assert stamp1.get() == 1
+    assert stamp1.bump() == 2
+    assert stamp2.get() == 2
@@ -1,11 +1,11 @@
 import pytest
 from werkzeug.exceptions import BadRequest, Unauthorized, Forbidden, \
-    NotFound, MethodNotAllowed, InternalServerError
+    NotFound, MethodNotAllowed, InternalServerError, ServiceUnavailable
 
 from app import create_app
 from config import Config
 from lib.errors.handlers import error_400, error_401, error_403, error_404, \
-    error_405, error_500
+    error_405, error_500, error_503
 
 
 @pytest.fixture
@@ -81,6 +81,20 @@ def test_error_500(app):
         assert result == 500
 
 
+@pytest.mark.unit
+def test_error_503(app):
+    with app.app_context():
+        result = error_503(ServiceUnavailable(retry_after=5))
+        assert 'error' in result.json
+        assert result.json['error'] == "Service unavailable"
+        assert result.headers['Retry-After'] == '5'
+        assert result == 503
+
+        result = error_503(ServiceUnavailable("Server busy."))
+        assert result.json['error'] == "Server busy."
+        assert 'Retry-After' not in result.headers
+
+
 # INTEGRATION TESTS
 
 
@@ -0,0 +1,36 @@
+import pytest
+
+from lib.net import IPAddress
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_ip_address_normalize():
+    assert IPAddress.normalize('203.0.113.5') == '203.0.113.5'
+    assert IPAddress.normalize(' 2001:DB8:0:0::1 ') == '2001:db8::1'
+    assert IPAddress.normalize('::ffff:203.0.113.5') == '203.0.113.5'
+
+
+@pytest.mark.unit
+def test_ip_address_normalize_invalid():
+    assert IPAddress.normalize('203.0.113') is None
+    assert IPAddress.normalize('') is None
+    assert IPAddress.normalize(None) is None
+
+
+@pytest.mark.unit
+def test_ip_address_network():
+    assert IPAddress.network('203.0.113.0/24') == '203.0.113.0/24'
+    assert IPAddress.network('203.0.113.7/24') == '203.0.113.0/24'
+    assert IPAddress.network('203.0.113.7') == '203.0.113.7/32'
+    assert IPAddress.network('2001:db8::/32') == '2001:db8::/32'
+
+
+@pytest.mark.unit
+def test_ip_address_network_invalid():
+    with pytest.raises(ValueError):
+        IPAddress.network('203.0.113.0/33')
+    with pytest.raises(ValueError):
+        IPAddress.network('localhost')
@@ -0,0 +1,256 @@
+from datetime import datetime, timezone
+
+import pytest
+from flask import jsonify
+
+from app import create_app
+from config import Config
+from init_dep import db
+from lib.routes.conditional import Conditional
+from modules.locations.model import Country, Region
+from modules.roles.model import Role
+from modules.users.model import User, roles
+from modules.user_profiles.model import UserProfile
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+    return app
+
+
+UPDATED_AT = datetime(2020, 3, 4, 5, 6, 7, 890000, tzinfo=timezone.utc)
+PROFILE_UPDATED_AT = datetime(2020, 3, 5, 1, 2, 3, tzinfo=timezone.utc)
+
+
+def make_view(mocker, response=None):
+    view = mocker.MagicMock(
+        return_value=response or (jsonify({'user': {'id': 1}}), 200))
+    view.__name__ = 'view'
+    return view
+
+
+def mock_record(mocker, row):
+    query_mock = mocker.patch('lib.routes.conditional.db.session.query')
+    query_mock.return_value.filter.return_value.first.return_value = row
+    return query_mock
+
+
+def mock_listing(mocker, row):
+    query_mock = mocker.patch('lib.routes.conditional.db.session.query')
+    query_mock.return_value.one.return_value = row
+    return query_mock
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_conditional_record(app, mocker):
+    app.config['CONDITIONAL_GET_ENABLED'] = True
+    query_mock = mock_record(
+        mocker, (1, UPDATED_AT, PROFILE_UPDATED_AT, 1))
+    view = make_view(mocker)
+
+    with app.test_request_context('/users/1'):
+        wrapped = Conditional(User, UserProfile.user_id, id='user_id',
+                              username='username')(view)
+        response = wrapped(user_id=1)
+
+    assert response.status_code == 200
+    assert response.headers['ETag'].startswith('W/"')
+    assert response.headers['Last-Modified'] == \
+        'Thu, 05 Mar 2020 01:02:03 GMT'
+    assert response.json == {'user': {'id': 1}}
+    view.assert_called_once_with(user_id=1)
+    assert len(query_mock.call_args[0]) == 4
+
+
+@pytest.mark.unit
+def test_conditional_record_if_none_match(app, mocker):
+    app.config['CONDITIONAL_GET_ENABLED'] = True
+    mock_record(mocker, (1, UPDATED_AT))
+    view = make_view(mocker)
+    wrapped = Conditional(User, id='user_id', username='username')(view)
+
+    with app.test_request_context('/users/1'):
+        etag = wrapped(user_id=1).headers['ETag']
+
+    with app.test_request_context('/users/1',
+                                  headers={'If-None-Match': etag}):
+        response = wrapped(user_id=1)
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.get_data() == b''
+    assert view.call_count == 1
+
+    # a different representation of the same record
+    with app.test_request_context('/users/1?fields=id',
+                                  headers={'If-None-Match': etag}):
+        response = wrapped(user_id=1)
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert view.call_count == 2
+
+
+@pytest.mark.unit
+def test_conditional_record_if_modified_since(app, mocker):
+    app.config['CONDITIONAL_GET_ENABLED'] = True
+    mock_record(mocker, (1, UPDATED_AT))
+    view = make_view(mocker)
+    wrapped = Conditional(User, id='user_id', username='username')(view)
+
+    with app.test_request_context('/users/user1', headers={
+            'If-Modified-Since': 'Wed, 04 Mar 2020 05:06:07 GMT'}):
+        response = wrapped(username='user1')
+
+    assert response.status_code == 304
+    assert response.headers['Last-Modified'] == \
+        'Wed, 04 Mar 2020 05:06:07 GMT'
+    view.assert_not_called()
+
+    with app.test_request_context('/users/user1', headers={
+            'If-Modified-Since': 'Wed, 04 Mar 2020 05:06:06 GMT'}):
+        response = wrapped(username='user1')
+
+    assert response.status_code == 200
+    view.assert_called_once_with(username='user1')
+
+    # If-Modified-Since is ignored when If-None-Match is sent
+    with app.test_request_context('/users/user1', headers={
+            'If-None-Match': 'W/"other"',
+            'If-Modified-Since': 'Wed, 04 Mar 2020 05:06:07 GMT'}):
+        response = wrapped(username='user1')
+
+    assert response.status_code == 200
+
+
+@pytest.mark.unit
+def test_conditional_record_not_found(app, mocker):
+    app.config['CONDITIONAL_GET_ENABLED'] = True
+    mock_record(mocker, None)
+    view = make_view(mocker, ('', 404))
+
+    with app.test_request_context('/users/250'):
+        result = Conditional(User, id='user_id')(view)(user_id=250)
+
+    assert result == ('', 404)
+    view.assert_called_once_with(user_id=250)
+
+
+@pytest.mark.unit
+def test_conditional_listing(app, mocker):
+    app.config['CONDITIONAL_GET_ENABLED'] = True
+    query_mock = mock_listing(mocker, (UPDATED_AT, 4, UPDATED_AT, 2))
+    view = make_view(mocker)
+    wrapped = Conditional(Region, Country)(view)
+
+    with app.test_request_context('/regions/US'):
+        response = wrapped(country_code='US')
+    etag = response.headers['ETag']
+
+    assert response.status_code == 200
+    assert 'Last-Modified' not in response.headers
+    assert len(query_mock.call_args[0]) == 4
+
+    with app.test_request_context('/regions/US',
+                                  headers={'If-None-Match': etag}):
+        response = wrapped(country_code='US')
+
+    assert response.status_code == 304
+    assert view.call_count == 1
+
+    # a deleted region
+    mock_listing(mocker, (UPDATED_AT, 3, UPDATED_AT, 2))
+    with app.test_request_context('/regions/US',
+                                  headers={'If-None-Match': etag}):
+        response = wrapped(country_code='US')
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert view.call_count == 2
+
+
+@pytest.mark.unit
+def test_conditional_related_state(app, mocker):
+    app.config['CONDITIONAL_GET_ENABLED'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    view = make_view(mocker)
+    listing = Conditional(User, roles, Role)(view)
+    record = Conditional(User, roles.c.user_id, Role, id='user_id')(view)
+
+    def etags():
+        with app.test_request_context('/users'):
+            listing_etag = listing().headers['ETag']
+        with app.test_request_context('/users/1'):
+            return listing_etag, record(user_id=1).headers['ETag']
+
+    with app.app_context():
+        for table in ('users', 'roles'):
+            db.session.execute(
+                'CREATE TABLE {} (id INTEGER PRIMARY KEY, '
+                'updated_at TIMESTAMP)'.format(table))
+            db.session.execute(
+                "INSERT INTO {} (id, updated_at) VALUES "
+                "(1, '2020-03-04 05:06:07'), "
+                "(2, '2020-03-04 05:06:07')".format(table))
+        db.session.execute(
+            'CREATE TABLE user_roles (user_id INTEGER, role_id INTEGER)')
+        db.session.execute(
+            'INSERT INTO user_roles (user_id, role_id) VALUES (1, 1)')
+
+        states = [etags()]
+
+        # a renamed role
+        db.session.execute(
+            "UPDATE roles SET updated_at = '2020-03-05 01:02:03' "
+            "WHERE id = 1")
+        states.append(etags())
+
+        # a reassigned role, no user column changed
+        db.session.execute('UPDATE user_roles SET role_id = 2')
+        states.append(etags())
+
+        # swapped assignments, same count and sums of keys
+        db.session.execute(
+            'INSERT INTO user_roles (user_id, role_id) VALUES (2, 3)')
+        with app.test_request_context('/users'):
+            swapped = [listing().headers['ETag']]
+        db.session.execute('UPDATE user_roles SET role_id = 5 - role_id')
+        with app.test_request_context('/users'):
+            swapped.append(listing().headers['ETag'])
+
+        db.session.remove()
+
+    assert len({listing_etag for listing_etag, _ in states}) == 3
+    assert len({record_etag for _, record_etag in states}) == 3
+    assert swapped[0] != swapped[1]
+
+
+@pytest.mark.unit
+def test_conditional_no_content(app, mocker):
+    app.config['CONDITIONAL_GET_ENABLED'] = True
+    mock_listing(mocker, (None, 0))
+    view = make_view(mocker, ('', 204))
+
+    with app.test_request_context('/countries'):
+        response = Conditional(Country)(view)()
+
+    assert response.status_code == 204
+    assert 'ETag' not in response.headers
+
+
+@pytest.mark.unit
+def test_conditional_disabled(app, mocker):
+    app.config['CONDITIONAL_GET_ENABLED'] = False
+    query_mock = mocker.patch('lib.routes.conditional.db.session.query')
+    view = make_view(mocker, ('', 204))
+
+    with app.test_request_context('/countries'):
+        result = Conditional(Country)(view)()
+
+    assert result == ('', 204)
+    query_mock.assert_not_called()
@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app import create_app
+from config import Config
+from init_dep import listing_counter
+from lib.routes.counter import Explain, ListingCounter
+from modules.logins.model import Login
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+    return app
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_listing_counter_init_app(app, monkeypatch):
+    assert listing_counter.default == ListingCounter.COUNT_EXACT
+    assert listing_counter.cache.ttl == 30
+
+    monkeypatch.setattr(Config, 'LISTING_COUNT_STRATEGY', 'estimate')
+    create_app(Config)
+    assert listing_counter.default == ListingCounter.COUNT_ESTIMATE
+
+    monkeypatch.setattr(Config, 'LISTING_COUNT_STRATEGY', 'foo')
+    with pytest.raises(ValueError):
+        create_app(Config)
+
+
+@pytest.mark.unit
+def test_listing_counter_count_exact(app, mocker):
+    query = mocker.MagicMock()
+    query.count.return_value = 10
+
+    assert listing_counter.count(query, ListingCounter.COUNT_EXACT) == 10
+    query.count.assert_called_once_with()
+
+
+@pytest.mark.unit
+def test_listing_counter_count_none(app, mocker):
+    query = mocker.MagicMock()
+
+    assert listing_counter.count(query, ListingCounter.COUNT_NONE) is None
+    query.count.assert_not_called()
+
+
+@pytest.mark.unit
+def test_listing_counter_count_estimate(app, mocker):
+    execute_mock = mocker.patch('sqlalchemy.orm.Session.execute')
+    execute_mock.return_value.scalar.return_value = [
+        {'Plan': {'Node Type': 'Seq Scan', 'Plan Rows': 1234}}]
+    count_mock = mocker.patch('flask_sqlalchemy.BaseQuery.count')
+
+    with app.app_context():
+        query = Login.query.filter(Login.success.is_(False)).order_by(
+            Login.id.asc())
+        assert listing_counter.count(
+            query, ListingCounter.COUNT_ESTIMATE) == 1234
+
+        explain = execute_mock.call_args[0][0]
+        assert isinstance(explain, Explain)
+        sql = str(explain.compile(dialect=postgresql.dialect()))
+        assert sql.startswith('EXPLAIN (FORMAT JSON) SELECT logins.id')
+        assert 'WHERE logins.success IS false' in sql
+        assert 'ORDER BY' not in sql
+        count_mock.assert_not_called()
+
+
+@pytest.mark.unit
+def test_listing_counter_count_cached(app, mocker):
+    bind_mock = mocker.patch('sqlalchemy.orm.Session.get_bind')
+    bind_mock.return_value.dialect = postgresql.dialect()
+    count_mock = mocker.patch('flask_sqlalchemy.BaseQuery.count')
+    count_mock.return_value = 10
+
+    with app.app_context():
+
+        def count(username, order):
+            return listing_counter.count(
+                Login.query.filter(Login.username.ilike(username)).order_by(
+                    order), ListingCounter.COUNT_CACHED)
+
+        # miss
+        assert count('%a%', Login.id.asc()) == 10
+        assert count_mock.call_count == 1
+
+        # hit, ordering does not matter
+        count_mock.return_value = 20
+        assert count('%a%', Login.id.desc()) == 10
+        assert count_mock.call_count == 1
+
+        # other filter values
+        assert count('%b%', Login.id.asc()) == 20
+        assert count_mock.call_count == 2
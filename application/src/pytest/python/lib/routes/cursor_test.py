@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from lib.routes.cursor import Cursor
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_cursor_encode_decode():
+    cursor = Cursor.encode('username.asc', 'user1', 5)
+
+    assert isinstance(cursor, str)
+    assert '=' not in cursor
+    assert Cursor.decode(cursor) == ('username.asc', 'user1', 5)
+    assert Cursor.decode(Cursor.encode(None, 5, 5)) == (None, 5, 5)
+
+
+@pytest.mark.unit
+def test_cursor_encode_decode_datetime():
+    value = datetime(2019, 1, 2, 3, 4, 5, 678, tzinfo=timezone.utc)
+    cursor = Cursor.encode('attempt_date.desc', value, 9)
+
+    assert Cursor.decode(cursor, datetime) == ('attempt_date.desc', value, 9)
+    assert Cursor.decode(cursor) == (
+        'attempt_date.desc', value.isoformat(), 9)
+
+
+@pytest.mark.unit
+def test_cursor_decode_invalid():
+    for cursor in ('', 'abc', '!!!!', Cursor.encode(None, 1, 'x'),
+                   Cursor.encode(5, 1, 1)):
+        with pytest.raises(ValueError):
+            Cursor.decode(cursor)
+
+    with pytest.raises(ValueError):
+        Cursor.decode(Cursor.encode(None, 'x', 1), datetime)
+    with pytest.raises(ValueError):
+        Cursor.decode(Cursor.encode(None, 1, 1), datetime)
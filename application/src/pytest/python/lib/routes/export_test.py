@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from werkzeug.datastructures import ImmutableMultiDict
+from werkzeug.exceptions import BadRequest
+
+from app import create_app
+from config import Config
+from lib.routes.export import Export
+from modules.logins.model import Login
+from modules.logins.schema_admin import LoginAdminSchema
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+    return app
+
+
+def make_query(mocker, records):
+    query = mocker.MagicMock()
+    query.execution_options.return_value \
+        .yield_per.return_value \
+        .__iter__.return_value = records
+    return query
+
+
+def make_logins(count):
+    logins = []
+    for i in range(1, count + 1):
+        login = Login(id=i, username='user%d' % i, ip_address='1.1.1.1',
+                      api=Login.API_PUBLIC, success=True)
+        logins.append(login)
+    return logins
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_export_ndjson(app, mocker):
+    expunge_mock = mocker.patch('lib.routes.export.db.session.expunge')
+    logins = make_logins(3)
+    query = make_query(mocker, logins)
+
+    with app.test_request_context():
+        app.config['EXPORT_YIELD_PER'] = 2
+        export = Export(query, LoginAdminSchema(only=('id', 'username')),
+                        ImmutableMultiDict())
+        response = export.response('logins')
+        chunks = list(response.response)
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Disposition'] == \
+        'attachment; filename=logins.ndjson'
+    assert len(chunks) == 2
+    assert [json.loads(line) for line in ''.join(chunks).splitlines()] == [
+        {'id': 1, 'username': 'user1'},
+        {'id': 2, 'username': 'user2'},
+        {'id': 3, 'username': 'user3'}]
+    query.execution_options.assert_called_once_with(stream_results=True)
+    query.execution_options.return_value.yield_per.assert_called_once_with(2)
+    assert expunge_mock.call_count == 3
+
+
+@pytest.mark.unit
+def test_export_csv(app, mocker):
+    mocker.patch('lib.routes.export.db.session.expunge')
+    query = make_query(mocker, make_logins(2))
+
+    with app.test_request_context():
+        export = Export(query, LoginAdminSchema(only=('id', 'username')),
+                        ImmutableMultiDict({'format': 'csv'}))
+        response = export.response('logins')
+        body = ''.join(response.response)
+
+    assert response.mimetype == 'text/csv'
+    assert body == 'id,username\n1,user1\n2,user2\n'
+
+
+@pytest.mark.unit
+def test_export_format_invalid(app, mocker):
+    with app.test_request_context():
+        with pytest.raises(BadRequest):
+            Export(mocker.MagicMock(), LoginAdminSchema(),
+                   ImmutableMultiDict({'format': 'xml'}))
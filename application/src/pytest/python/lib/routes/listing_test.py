@@ -0,0 +1,388 @@
+from datetime import datetime, timezone
+
+import pytest
+from flask import Blueprint, g
+from sqlalchemy.dialects import postgresql
+from werkzeug.datastructures import ImmutableMultiDict
+from werkzeug.exceptions import BadRequest
+
+from app import create_app
+from config import Config
+from lib.routes.cursor import Cursor
+from lib.routes.listing import Listing
+from lib.routes.query import Query
+from lib.sqlalchemy.loading import LoadingProfile
+from modules.logins.model import Login
+from modules.logins.schema_admin import LoginAdminSchema
+from modules.roles.model import Role
+from modules.users.model import User
+from modules.users.schema_admin import UserAdminSchema
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+
+    # mock a route
+    def mock_path(page=1, limit=10):
+        pass
+    public = Blueprint('listing_test', __name__)
+    public.route("/mock_path/<int:page>/<int:limit>",
+                 methods=['GET'])(mock_path)
+    app.register_blueprint(public)
+
+    return app
+
+
+def make_listing(args):
+    return Listing(
+        Login,
+        Login.id.asc(),
+        {
+            'id.asc': Login.id.asc(),
+            'id.desc': Login.id.desc(),
+            'attempt_date.asc': Login.attempt_date.asc(),
+            'attempt_date.desc': Login.attempt_date.desc(),
+        },
+        ImmutableMultiDict(args),
+        Query.STATUS_FILTER_NONE)
+
+
+def make_logins(ids):
+    return [Login(id=i, attempt_date=datetime(2019, 1, i, tzinfo=timezone.utc))
+            for i in ids]
+
+
+def compile_criterion(criterion):
+    return str(criterion.compile(dialect=postgresql.dialect()))
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_listing_page(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .order_by.return_value \
+        .filter.return_value \
+        .limit.return_value \
+        .offset.return_value \
+        .__iter__.return_value = make_logins(range(11, 21))
+    query_mock.return_value \
+        .order_by.return_value \
+        .filter.return_value \
+        .count.return_value = 25
+
+    with app.test_request_context():
+        listing = make_listing({})
+        assert not listing.is_cursor
+        listing.filter(Login.user_id == 1)
+        results = listing.fetch(2, 10)
+
+        assert [login.id for login in results] == list(range(11, 21))
+        query_mock.return_value.order_by.return_value.filter.return_value \
+            .limit.assert_called_once_with(10)
+        query_mock.return_value.order_by.return_value.filter.return_value \
+            .limit.return_value.offset.assert_called_once_with(10)
+        assert listing.get_pagination('listing_test.mock_path') == {
+            'page': 2,
+            'limit': 10,
+            'total': 25,
+            'previous_uri': 'http://localhost/mock_path/1/10',
+            'next_uri': 'http://localhost/mock_path/3/10',
+        }
+
+
+@pytest.mark.unit
+def test_listing_cursor_first_page(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    keyset_mock = query_mock.return_value \
+        .order_by.return_value \
+        .order_by.return_value \
+        .order_by.return_value
+    keyset_mock.limit.return_value \
+        .__iter__.return_value = make_logins(range(1, 12))
+    query_mock.return_value \
+        .order_by.return_value \
+        .count.return_value = 25
+
+    with app.test_request_context():
+        listing = make_listing({'after': ''})
+        assert listing.is_cursor
+        results = listing.fetch(1, 10)
+
+        assert [login.id for login in results] == list(range(1, 11))
+        query_mock.return_value.order_by.return_value \
+            .order_by.assert_called_once_with(None)
+        keyset_mock.limit.assert_called_once_with(11)
+        keyset_mock.filter.assert_not_called()
+        assert listing.previous_cursor is None
+        assert Cursor.decode(listing.next_cursor) == (None, 10, 10)
+        assert listing.get_pagination('listing_test.mock_path') == {
+            'limit': 10,
+            'total': 25,
+            'next_uri': 'http://localhost/mock_path/1/10?after=' +
+                        listing.next_cursor,
+        }
+
+
+@pytest.mark.unit
+def test_listing_cursor_after(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    keyset_mock = query_mock.return_value \
+        .order_by.return_value \
+        .order_by.return_value \
+        .order_by.return_value
+    keyset_mock.filter.return_value.limit.return_value \
+        .__iter__.return_value = make_logins([9, 8, 7])
+    cursor = Cursor.encode(
+        'attempt_date.desc', datetime(2019, 1, 10, tzinfo=timezone.utc), 10)
+
+    with app.test_request_context():
+        listing = make_listing(
+            {'order_by': 'attempt_date.desc', 'after': cursor})
+        results = listing.fetch(1, 5)
+
+        assert [login.id for login in results] == [9, 8, 7]
+        criterion = keyset_mock.filter.call_args[0][0]
+        assert compile_criterion(criterion) == \
+            '(logins.attempt_date, logins.id) < ' \
+            '(%(param_1)s, %(param_2)s)'
+        assert criterion.compile().params == {
+            'param_1': datetime(2019, 1, 10, tzinfo=timezone.utc),
+            'param_2': 10}
+        keyset_mock.filter.return_value.limit.assert_called_once_with(6)
+        assert Cursor.decode(listing.previous_cursor, datetime) == (
+            'attempt_date.desc', datetime(2019, 1, 9, tzinfo=timezone.utc), 9)
+        assert listing.next_cursor is None
+
+
+@pytest.mark.unit
+def test_listing_cursor_before(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    keyset_mock = query_mock.return_value \
+        .order_by.return_value \
+        .order_by.return_value \
+        .order_by.return_value
+    keyset_mock.filter.return_value.limit.return_value \
+        .__iter__.return_value = make_logins([20, 19, 18, 17])
+
+    with app.test_request_context():
+        listing = make_listing({'before': Cursor.encode(None, 21, 21)})
+        results = listing.fetch(1, 3)
+
+        # retrieved in reverse order, returned in listing order
+        query_mock.return_value.order_by.return_value.order_by \
+            .return_value.order_by.assert_called_once()
+        assert compile_criterion(
+            query_mock.return_value.order_by.return_value.order_by
+            .return_value.order_by.call_args[0][0]) == 'logins.id DESC'
+        assert compile_criterion(keyset_mock.filter.call_args[0][0]) == \
+            'logins.id < %(id_1)s'
+        assert [login.id for login in results] == [18, 19, 20]
+        assert Cursor.decode(listing.previous_cursor) == (None, 18, 18)
+        assert Cursor.decode(listing.next_cursor) == (None, 20, 20)
+
+
+@pytest.mark.unit
+def test_listing_cursor_invalid(app, mocker):
+    mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+
+    with app.test_request_context():
+
+        # malformed cursor
+        listing = make_listing({'after': 'abc'})
+        with pytest.raises(BadRequest):
+            listing.fetch(1, 10)
+
+        # cursor of another order
+        listing = make_listing({'order_by': 'id.desc',
+                                'after': Cursor.encode(None, 1, 1)})
+        with pytest.raises(BadRequest):
+            listing.fetch(1, 10)
+
+
+@pytest.mark.unit
+def test_listing_after_criterion(app):
+    with app.app_context():
+        listing = make_listing({})
+        column = Login.attempt_date
+        value = datetime(2019, 1, 1, tzinfo=timezone.utc)
+
+        assert compile_criterion(listing._after(
+            column, 'attempt_date', value, 5, False)) == \
+            '(logins.attempt_date, logins.id) > (%(param_1)s, %(param_2)s)'
+        assert compile_criterion(listing._after(
+            Login.user_id, 'user_id', 3, 5, False)) == \
+            '(logins.user_id, logins.id) > (%(param_1)s, %(param_2)s) ' \
+            'OR logins.user_id IS NULL'
+        assert compile_criterion(listing._after(
+            Login.user_id, 'user_id', None, 5, False)) == \
+            'logins.user_id IS NULL AND logins.id > %(id_1)s'
+        assert compile_criterion(listing._after(
+            Login.user_id, 'user_id', None, 5, True)) == \
+            'logins.user_id IS NOT NULL OR logins.id < %(id_1)s'
+        assert compile_criterion(listing._after(
+            Login.id, 'id', 5, 5, False)) == 'logins.id > %(id_1)s'
+
+
+@pytest.mark.unit
+def test_listing_count_strategy(app):
+    with app.test_request_context():
+        assert make_listing({}).count == 'exact'
+        assert make_listing({'count': 'none'}).count == 'none'
+        assert make_listing({'count': 'foo'}).count == 'exact'
+        assert Listing(
+            Login, Login.id.asc(), {}, ImmutableMultiDict({}),
+            Query.STATUS_FILTER_NONE, count='estimate').count == 'estimate'
+        assert Listing(
+            Login, Login.id.asc(), {}, ImmutableMultiDict({'count': 'cached'}),
+            Query.STATUS_FILTER_NONE, count='estimate').count == 'cached'
+
+
+@pytest.mark.unit
+def test_listing_page_count_none(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    page_mock = query_mock.return_value \
+        .order_by.return_value \
+        .limit.return_value \
+        .offset.return_value
+    page_mock.__iter__.return_value = make_logins(range(11, 22))
+
+    with app.test_request_context():
+        listing = make_listing({'count': 'none'})
+        results = listing.fetch(2, 10)
+
+        assert [login.id for login in results] == list(range(11, 21))
+        query_mock.return_value.order_by.return_value \
+            .limit.assert_called_once_with(11)
+        assert listing.get_pagination('listing_test.mock_path') == {
+            'page': 2,
+            'limit': 10,
+            'previous_uri': 'http://localhost/mock_path/1/10?count=none',
+            'next_uri': 'http://localhost/mock_path/3/10?count=none',
+        }
+        query_mock.return_value.order_by.return_value.count.assert_not_called()
+
+        # last page
+        page_mock.__iter__.return_value = make_logins(range(21, 26))
+        listing = make_listing({'count': 'none'})
+        listing.fetch(3, 10)
+        assert listing.get_pagination('listing_test.mock_path') == {
+            'page': 3,
+            'limit': 10,
+            'previous_uri': 'http://localhost/mock_path/2/10?count=none',
+        }
+
+
+@pytest.mark.unit
+def test_listing_page_count_window(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    window_mock = query_mock.return_value \
+        .order_by.return_value \
+        .add_columns
+    window_mock.return_value \
+        .limit.return_value \
+        .offset.return_value \
+        .__iter__.return_value = [
+            (login, 25) for login in make_logins(range(11, 21))]
+
+    with app.test_request_context():
+        listing = make_listing({'count': 'window'})
+        results = listing.fetch(2, 10)
+
+        assert [login.id for login in results] == list(range(11, 21))
+        assert compile_criterion(window_mock.call_args[0][0]) == \
+            'count(*) OVER ()'
+        assert listing.get_pagination('listing_test.mock_path') == {
+            'page': 2,
+            'limit': 10,
+            'total': 25,
+            'previous_uri': 'http://localhost/mock_path/1/10?count=window',
+            'next_uri': 'http://localhost/mock_path/3/10?count=window',
+        }
+        query_mock.return_value.order_by.return_value.count.assert_not_called()
+
+
+@pytest.mark.unit
+def test_listing_cursor_count_window(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .order_by.return_value \
+        .order_by.return_value \
+        .order_by.return_value \
+        .limit.return_value \
+        .__iter__.return_value = make_logins(range(1, 6))
+    query_mock.return_value \
+        .order_by.return_value \
+        .count.return_value = 5
+
+    with app.test_request_context():
+        listing = make_listing({'count': 'window', 'after': ''})
+        listing.fetch(1, 10)
+
+        # counted separately, the keyset page does not cover all records
+        assert listing.get_pagination('listing_test.mock_path') == {
+            'limit': 10,
+            'total': 5,
+        }
+        query_mock.return_value.order_by.return_value.add_columns \
+            .assert_not_called()
+
+
+@pytest.mark.unit
+def test_listing_select_fields(app):
+    with app.test_request_context():
+
+        # all fields
+        listing = make_listing({})
+        assert listing.select_fields(LoginAdminSchema) is None
+        assert 'logins.username' in compile_criterion(listing.query.statement)
+
+        # requested fields
+        listing = make_listing({'fields': 'username, success,username,'})
+        assert listing.select_fields(LoginAdminSchema) == (
+            'success', 'username')
+        sql = compile_criterion(listing.query.statement)
+        assert sql.startswith('SELECT logins.id, logins.username, ' +
+                              'logins.success \nFROM logins')
+
+        # ordering column is loaded for cursors
+        listing = make_listing({'fields': 'username',
+                                'order_by': 'attempt_date.desc'})
+        listing.select_fields(LoginAdminSchema)
+        sql = compile_criterion(listing.query.statement)
+        assert sql.startswith('SELECT logins.id, logins.username, ' +
+                              'logins.attempt_date \nFROM logins')
+
+        # unknown fields
+        listing = make_listing({'fields': 'username,foo'})
+        with pytest.raises(BadRequest):
+            listing.select_fields(LoginAdminSchema)
+
+
+@pytest.mark.unit
+def test_listing_select_fields_relationships(app):
+    with app.test_request_context():
+        listing = Listing(
+            User, User.id.asc(), {},
+            ImmutableMultiDict({'fields': 'uri,email,roles.name'}),
+            Query.STATUS_FILTER_NONE)
+
+        assert listing.select_fields(UserAdminSchema) == (
+            'email', 'roles.name', 'uri')
+        sql = compile_criterion(listing.query.statement)
+        assert sql.startswith('SELECT pgp_sym_decrypt(users.email, ')
+        assert sql.endswith('AS email, users.id \nFROM users '
+                            'ORDER BY users.id ASC')
+
+        # the loading profile is narrowed to the requested relationships
+        g.loading_profiles = (
+            LoadingProfile(User, selectin=('roles', 'terms_of_services'),
+                           joined=('profile',)),
+            LoadingProfile(Role, selectin=('users',)))
+        listing.select_fields(UserAdminSchema)
+        assert g.loading_profiles[0].paths == {'roles': 'selectin'}
+        assert g.loading_profiles[1].paths == {'users': 'selectin'}
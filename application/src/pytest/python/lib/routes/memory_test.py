@@ -0,0 +1,138 @@
+import pytest
+from flask import Blueprint
+from werkzeug.datastructures import ImmutableMultiDict
+from werkzeug.exceptions import BadRequest
+
+from app import create_app
+from config import Config
+from lib.routes.cursor import Cursor
+from lib.routes.memory import MemoryListing
+from modules.locations.index import CountryRecord
+from modules.locations.schema_public import CountrySchema
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+
+    # mock a route
+    def mock_path(page=1, limit=10):
+        pass
+    public = Blueprint('memory_test', __name__)
+    public.route("/mock_path/<int:page>/<int:limit>",
+                 methods=['GET'])(mock_path)
+    app.register_blueprint(public)
+
+    return app
+
+
+RECORDS = tuple(CountryRecord(id=i, name='Country {:02d}'.format(i),
+                              code_2='C{}'.format(i), code_3='CO{}'.format(i))
+                for i in range(1, 26))
+
+
+def make_listing(args, order_by=None):
+    return MemoryListing(RECORDS, order_by, 'name', ImmutableMultiDict(args))
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_memory_listing_page(app):
+    with app.test_request_context():
+        listing = make_listing({})
+        results = listing.fetch(2, 10)
+        pagination = listing.get_pagination('memory_test.mock_path')
+
+    assert [record.id for record in results] == list(range(11, 21))
+    assert listing.is_resolved
+    assert pagination == {
+        'limit': 10,
+        'page': 2,
+        'total': 25,
+        'previous_uri': 'http://localhost/mock_path/1/10',
+        'next_uri': 'http://localhost/mock_path/3/10'}
+
+
+@pytest.mark.unit
+def test_memory_listing_page_not_counted(app):
+    with app.test_request_context():
+        listing = make_listing({'count': 'none'})
+        results = listing.fetch(3, 10)
+        pagination = listing.get_pagination('memory_test.mock_path')
+
+    assert len(results) == 5
+    assert 'total' not in pagination
+    assert 'next_uri' not in pagination
+
+
+@pytest.mark.unit
+def test_memory_listing_cursor(app):
+    with app.test_request_context():
+        listing = make_listing({'after': ''})
+        results = listing.fetch(1, 10)
+        pagination = listing.get_pagination('memory_test.mock_path')
+
+    assert [record.id for record in results] == list(range(1, 11))
+    assert 'previous_uri' not in pagination
+    assert listing.next_cursor == Cursor.encode(None, 'Country 10', 10)
+
+    with app.test_request_context():
+        listing = make_listing({'after': listing.next_cursor})
+        results = listing.fetch(1, 10)
+
+    assert [record.id for record in results] == list(range(11, 21))
+    assert listing.previous_cursor == Cursor.encode(None, 'Country 11', 11)
+    assert listing.next_cursor == Cursor.encode(None, 'Country 20', 20)
+
+    with app.test_request_context():
+        listing = make_listing({'before': listing.previous_cursor})
+        results = listing.fetch(1, 5)
+
+    assert [record.id for record in results] == list(range(6, 11))
+    assert listing.previous_cursor == Cursor.encode(None, 'Country 06', 6)
+    assert listing.next_cursor == Cursor.encode(None, 'Country 10', 10)
+
+    with app.test_request_context():
+        listing = make_listing({
+            'after': Cursor.encode(None, 'Country 20', 20)})
+        results = listing.fetch(1, 10)
+
+    assert [record.id for record in results] == list(range(21, 26))
+    assert listing.next_cursor is None
+
+
+@pytest.mark.unit
+def test_memory_listing_cursor_unresolved(app):
+    with app.test_request_context():
+
+        # the record's ordering value changed
+        listing = make_listing({'after': Cursor.encode(None, 'Renamed', 3)})
+        assert not listing.is_resolved
+
+        # the record is gone
+        listing = make_listing({'after': Cursor.encode(None, 'Gone', 99)})
+        assert not listing.is_resolved
+
+
+@pytest.mark.unit
+def test_memory_listing_cursor_invalid(app):
+    with app.test_request_context():
+        with pytest.raises(BadRequest):
+            make_listing({'after': 'not-a-cursor'})
+
+        # cursor of another order
+        with pytest.raises(BadRequest):
+            make_listing({'after': Cursor.encode('id.asc', 3, 3)})
+
+
+@pytest.mark.unit
+def test_memory_listing_select_fields(app):
+    with app.test_request_context():
+        assert make_listing({}).select_fields(CountrySchema) is None
+        assert make_listing({'fields': 'name, id'}).select_fields(
+            CountrySchema) == ('id', 'name')
+        with pytest.raises(BadRequest):
+            make_listing({'fields': 'bad'}).select_fields(CountrySchema)
@@ -62,3 +62,38 @@ def test_pager_get_uris(app):
         assert Pager.get_uris(
             'pager_test.mock_path', 5, 10, 50, {'foo': 'bar'}
         ) == {'previous_uri': 'http://localhost/mock_path/4/10?foo=bar'}
+
+
+@pytest.mark.unit
+def test_pager_get_cursor_uris(app):
+    with app.app_context():
+
+        # mock a route
+        def mock_path(page=1, limit=10):
+            pass
+        public = Blueprint('pager_test', __name__)
+        public.route("/mock_path/<int:page>/<int:limit>",
+                     methods=['GET'])(mock_path)
+        app.register_blueprint(public)
+
+        # single page of results
+        assert Pager.get_cursor_uris(
+            'pager_test.mock_path', 10, None, None, {}) == {}
+
+        # first page of results
+        assert Pager.get_cursor_uris(
+            'pager_test.mock_path', 10, None, 'b', {'after': ''}
+        ) == {'next_uri': 'http://localhost/mock_path/1/10?after=b'}
+
+        # middle page of results with args
+        assert Pager.get_cursor_uris(
+            'pager_test.mock_path', 10, 'a', 'b',
+            {'after': 'x', 'foo': 'bar', 'app_key': '123'}
+        ) == {
+            'previous_uri': 'http://localhost/mock_path/1/10?before=a&foo=bar',
+            'next_uri': 'http://localhost/mock_path/1/10?after=b&foo=bar'}
+
+        # last page of results
+        assert Pager.get_cursor_uris(
+            'pager_test.mock_path', 10, 'a', None, {'before': 'x'}
+        ) == {'previous_uri': 'http://localhost/mock_path/1/10?before=a'}
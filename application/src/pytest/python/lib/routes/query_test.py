@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy.dialects import postgresql
 
 from app import create_app
 from config import Config
@@ -20,3 +21,31 @@ def test_query(app):
     # @todo: Create actual tests for Query
     with app.app_context():
         assert hasattr(Query, 'make')
+
+
+@pytest.mark.unit
+def test_query_search_contains(app):
+    from modules.users.model import User
+    criterion = Query.search(User.username, 'a_b%')
+    compiled = criterion.compile(dialect=postgresql.dialect())
+    assert 'ILIKE' in str(compiled)
+    assert compiled.params == {'username_1': '%a\\_b\\%%'}
+
+
+@pytest.mark.unit
+def test_query_search_prefix(app):
+    from modules.users.model import User
+    criterion = Query.search(User.username, 'a_b', Query.SEARCH_PREFIX)
+    compiled = criterion.compile(dialect=postgresql.dialect())
+    assert 'ILIKE' not in str(compiled)
+    assert 'LIKE' in str(compiled)
+    assert compiled.params == {'username_1': 'a\\_b%'}
+
+
+@pytest.mark.unit
+def test_query_search_exact(app):
+    from modules.users.model import User
+    criterion = Query.search(User.username, 'a_b', Query.SEARCH_EXACT)
+    compiled = criterion.compile(dialect=postgresql.dialect())
+    assert str(compiled) == 'users.username = %(username_1)s'
+    assert compiled.params == {'username_1': 'a_b'}
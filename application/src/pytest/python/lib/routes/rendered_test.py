@@ -0,0 +1,160 @@
+import gzip
+
+import pytest
+from flask import jsonify
+
+from app import create_app
+from config import Config
+from lib.routes import rendered as rendered_module
+from lib.routes.rendered import RenderedResponses, \
+    invalidate_rendered_responses
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    Config.TESTING = True
+    monkeypatch.setattr(Config, 'RENDERED_RESPONSES_ENABLED', True)
+    monkeypatch.setattr(Config, 'RENDERED_RESPONSES_STAMP_DIR',
+                        str(tmp_path))
+    app = create_app(Config)
+    return app
+
+
+def make_rendered(app, mocker, response=None):
+    rendered = RenderedResponses('test')
+    rendered.init_app(app)
+    view = mocker.MagicMock(
+        return_value=response or (jsonify({'terms_of_service': {'id': 1}}),
+                                  200))
+    view.__name__ = 'view'
+    return rendered, view, rendered(view)
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_rendered_responses(app, mocker):
+    rendered, view, wrapped = make_rendered(app, mocker)
+
+    with app.test_request_context('/terms_of_service/current?app_key=1'):
+        response = wrapped()
+
+    assert response.status_code == 200
+    assert response.json == {'terms_of_service': {'id': 1}}
+    assert response.headers['Cache-Control'] == 'public, no-cache'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.headers['ETag'].startswith('W/"')
+    assert 'Content-Encoding' not in response.headers
+
+    # served from the cache, whatever the application key
+    with app.test_request_context('/terms_of_service/current?app_key=2'):
+        cached = wrapped()
+
+    assert cached.get_data() == response.get_data()
+    assert cached.headers['ETag'] == response.headers['ETag']
+    assert view.call_count == 1
+
+    # another variant
+    with app.test_request_context('/terms_of_service/current?fields=id'):
+        wrapped()
+
+    assert view.call_count == 2
+
+    # clients may be allowed to serve stale copies
+    rendered.max_age = 60
+    with app.test_request_context('/terms_of_service/current'):
+        assert wrapped().headers['Cache-Control'] == 'public, max-age=60'
+
+
+@pytest.mark.unit
+def test_rendered_responses_encoding(app, mocker, monkeypatch):
+    monkeypatch.setattr(rendered_module, 'brotli', None)
+    rendered, view, wrapped = make_rendered(app, mocker)
+
+    with app.test_request_context('/terms_of_service/current', headers={
+            'Accept-Encoding': 'gzip, deflate, br'}):
+        response = wrapped()
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == \
+        b'{"terms_of_service":{"id":1}}\n'
+
+    with app.test_request_context('/terms_of_service/current', headers={
+            'Accept-Encoding': 'gzip;q=0, identity'}):
+        response = wrapped()
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.json == {'terms_of_service': {'id': 1}}
+    assert view.call_count == 1
+
+
+@pytest.mark.unit
+def test_rendered_responses_brotli(app, mocker, monkeypatch):
+    brotli_mock = mocker.MagicMock()
+    brotli_mock.compress.return_value = b'compressed'
+    monkeypatch.setattr(rendered_module, 'brotli', brotli_mock)
+    rendered, view, wrapped = make_rendered(app, mocker)
+
+    with app.test_request_context('/terms_of_service/current', headers={
+            'Accept-Encoding': 'gzip, br'}):
+        response = wrapped()
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.get_data() == b'compressed'
+
+
+@pytest.mark.unit
+def test_rendered_responses_if_none_match(app, mocker):
+    rendered, view, wrapped = make_rendered(app, mocker)
+
+    with app.test_request_context('/terms_of_service/current'):
+        etag = wrapped().headers['ETag']
+
+    with app.test_request_context('/terms_of_service/current',
+                                  headers={'If-None-Match': etag}):
+        response = wrapped()
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+    assert view.call_count == 1
+
+
+@pytest.mark.unit
+def test_rendered_responses_not_cached(app, mocker):
+    rendered, view, wrapped = make_rendered(app, mocker, ('', 204))
+
+    with app.test_request_context('/terms_of_service/current'):
+        assert wrapped().status_code == 204
+        assert wrapped().status_code == 204
+
+    assert view.call_count == 2
+
+
+@pytest.mark.unit
+def test_rendered_responses_invalidate(app, mocker):
+    rendered, view, wrapped = make_rendered(app, mocker)
+    other = RenderedResponses('test')
+    other.init_app(app)
+
+    with app.test_request_context('/terms_of_service/current'):
+        wrapped()
+
+        # another process committed a write to a watched model
+        session = mocker.Mock()
+        session.info = {'rendered_changed': {other}}
+        invalidate_rendered_responses(session)
+        assert session.info == {}
+        wrapped()
+
+    assert view.call_count == 2
+
+
+@pytest.mark.unit
+def test_rendered_responses_disabled(app, mocker):
+    rendered, view, wrapped = make_rendered(app, mocker, ('', 204))
+    rendered.enabled = False
+
+    with app.test_request_context('/terms_of_service/current'):
+        assert wrapped() == ('', 204)
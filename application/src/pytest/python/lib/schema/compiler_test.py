@@ -0,0 +1,162 @@
+import importlib
+import json
+import pkgutil
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from flask_marshmallow.fields import URLFor, _tpl
+from marshmallow import Schema, fields
+
+import modules
+from app import create_app
+from config import Config
+from lib.schema.compiler import compile_schema, dump
+
+
+def find_schemas():
+    schemas = []
+    for module_info in pkgutil.iter_modules(modules.__path__):
+        for app_type in ('admin', 'public'):
+            try:
+                module = importlib.import_module('modules.{}.schema_{}'.format(
+                    module_info.name, app_type))
+            except ImportError:
+                continue
+            for name, value in sorted(vars(module).items()):
+                if isinstance(value, type) and issubclass(value, Schema) and \
+                        value.__module__ == module.__name__:
+                    schemas.append(pytest.param(
+                        app_type, value, id='{}.{}'.format(
+                            module_info.name, name)))
+    return schemas
+
+
+SCHEMAS = find_schemas()
+
+VARIANTS = {
+    'values': lambda i: {
+        fields.Integer: i, fields.String: 'value-{}'.format(i),
+        fields.Email: 'user{}@example.com'.format(i),
+        fields.Boolean: (True, 1, 0, 'off')[i % 4],
+        fields.DateTime: datetime(2020, 1, i % 28 + 1, 13, 30, 15, 123456,
+                                  tzinfo=timezone.utc)},
+    'strings': lambda i: {
+        fields.Integer: str(i), fields.String: 'a b/é {}'.format(i),
+        fields.Email: b'user@example.com', fields.Boolean: 'yes',
+        fields.DateTime: datetime(2020, 12, 31, 23, 59, 59)},
+    'none': lambda i: {},
+    'missing': lambda i: None,
+}
+
+
+def make_object(schema, variant, i=1, depth=0):
+    if variant == 'missing':
+        return SimpleNamespace()
+    values = VARIANTS[variant](i)
+    attributes = {}
+    for name, field in schema.fields.items():
+        if isinstance(field, URLFor):
+            for value in field.values.values():
+                attribute = _tpl(str(value))
+                if attribute and attribute not in attributes:
+                    attributes[attribute] = values.get(fields.Integer)
+        elif isinstance(field, fields.Nested):
+            if depth > 1 or variant == 'none':
+                attributes[name] = None
+            elif field.schema.many or field.many:
+                attributes[name] = [
+                    make_object(field.schema, variant, i + j, depth + 1)
+                    for j in range(2)]
+            else:
+                attributes[name] = make_object(
+                    field.schema, variant, i + 1, depth + 1)
+        else:
+            attributes[field.attribute or name] = values.get(type(field))
+    return SimpleNamespace(**attributes)
+
+
+def dump_or_error(function, *args):
+    try:
+        return json.dumps(function(*args))
+    except Exception as e:  # pylint: disable=broad-except
+        return type(e)
+
+
+def options(schema_class):
+    names = [name for name, field in schema_class().dump_fields.items()]
+    nested = [name for name, field in schema_class().dump_fields.items()
+              if isinstance(field, fields.Nested)]
+    yield {}
+    yield {'many': True}
+    yield {'only': names[::2]}
+    yield {'exclude': names[:1], 'many': True}
+    if nested:
+        yield {'only': ['{}.{}'.format(
+            nested[0], next(iter(schema_class().dump_fields[
+                nested[0]].schema.dump_fields)))] + names[:1]}
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('variant', sorted(VARIANTS))
+@pytest.mark.parametrize('app_type, schema_class', SCHEMAS)
+def test_compiled_schema_parity(app_type, schema_class, variant,
+                                monkeypatch):
+    Config.TESTING = True
+    monkeypatch.setattr(Config, 'APP_TYPE', app_type)
+    app = create_app(Config)
+
+    with app.test_request_context():
+        for kwargs in options(schema_class):
+            schema = schema_class(**kwargs)
+            obj = make_object(schema_class(), variant)
+            if schema.many:
+                obj = [obj, make_object(schema_class(), variant, 2)]
+
+            expected = dump_or_error(schema.dump, obj)
+            assert dump_or_error(dump, schema, obj) == expected, kwargs
+
+            # compiled once, reused
+            assert compile_schema(schema) is compile_schema(schema)
+            assert dump_or_error(dump, schema, obj) == expected, kwargs
+
+
+@pytest.mark.unit
+def test_compiled_schema_fallbacks():
+    class AccessorSchema(Schema):
+        id = fields.Integer()
+
+        def get_attribute(self, obj, attr, default):
+            return 42
+
+    obj = SimpleNamespace(id=1)
+    assert dump(AccessorSchema(), obj) == {'id': 42}
+    assert dump(AccessorSchema(), [obj], many=True) == [{'id': 42}]
+
+    class PlainSchema(Schema):
+        id = fields.Integer()
+        name = fields.String(data_key='title', dump_default='none')
+        total = fields.Float()
+
+    assert dump(PlainSchema(), {'id': '3', 'total': 1}) == \
+        {'id': 3, 'title': 'none', 'total': 1.0}
+    assert dump(PlainSchema(many=True), [SimpleNamespace(id=1, total=2)]) \
+        == [{'id': 1, 'title': 'none', 'total': 2.0}]
+    assert dump(PlainSchema(), None) == {'title': 'none'}
+
+
+@pytest.mark.unit
+def test_compiled_schema_unsupported_version(mocker):
+    mocker.patch('lib.schema.compiler.SUPPORTED', False)
+
+    class PlainSchema(Schema):
+        id = fields.Integer()
+
+    schema = PlainSchema()
+    dump_spy = mocker.spy(schema, 'dump')
+
+    assert dump(schema, SimpleNamespace(id=1)) == {'id': 1}
+    dump_spy.assert_called_once()
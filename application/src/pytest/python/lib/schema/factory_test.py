@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+from marshmallow import Schema, fields
+
+from lib.schema.factory import get_schema
+
+
+class SomeSchema(Schema):
+    id = fields.Integer()
+    name = fields.String(required=True)
+    email = fields.String(required=True)
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_get_schema():
+    schema = get_schema(SomeSchema)
+
+    assert isinstance(schema, SomeSchema)
+    assert get_schema(SomeSchema) is schema
+    assert get_schema(SomeSchema, many=False, exclude=[]) is schema
+    assert schema.dump(SimpleNamespace(id=1, name='a', email='b')) == \
+        {'id': 1, 'name': 'a', 'email': 'b'}
+
+
+@pytest.mark.unit
+def test_get_schema_options():
+    schema = get_schema(SomeSchema, many=True, only=['id', 'name'])
+
+    assert get_schema(SomeSchema, many=True, only=('id', 'name')) is schema
+    assert get_schema(SomeSchema, only=('id', 'name')) is not schema
+    assert get_schema(SomeSchema, many=True) is not schema
+    assert schema.dump([SimpleNamespace(id=1, name='a', email='b')]) == \
+        [{'id': 1, 'name': 'a'}]
+
+    schema = get_schema(SomeSchema, exclude=('email',))
+    assert schema.validate({'name': 'a'}) == {}
+    assert get_schema(SomeSchema).validate({'name': 'a'}) == \
+        {'email': ['Missing data for required field.']}
+
+    schema = get_schema(SomeSchema, partial=('email',))
+    assert get_schema(SomeSchema, partial=['email']) is schema
+    assert schema.validate({'name': 'a'}) == {}
+    assert get_schema(SomeSchema, partial=True).validate({}) == {}
@@ -3,7 +3,8 @@ import pytest
 from app import create_app
 from config import Config
 from init_dep import db
-from lib.schema.validate import unique, unique_email, exists
+from lib.schema.validate import unique, unique_email, exists, unique_many, \
+    unique_email_many, exists_many
 
 
 @pytest.fixture
@@ -266,3 +267,78 @@ def test_exists_no_pkey_custom_message_fail(app, mocker):
 
     assert errors == {'field': ["bar"]}
     assert models is None
+
+
+@pytest.mark.unit
+def test_unique_many(app, mocker):
+
+    # mock db query
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .__iter__.return_value = [('bar', 1)]
+
+    errors = unique_many([{}, {}, {}, {}], SomeModel, SomeModel.name,
+                         ['foo', 'bar', 'foo', None])
+
+    assert errors == [{}, {'name': ['Value must be unique.']},
+                      {'name': ['Value must be unique.']}, {}]
+    assert query_mock.return_value.with_entities.call_count == 1
+
+
+@pytest.mark.unit
+def test_unique_many_update(app, mocker):
+    test_model_1 = SomeModel(id=1, name='foo')
+    test_model_2 = SomeModel(id=2, name='baz')
+
+    # mock db query
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .__iter__.return_value = [('bar', 1)]
+
+    errors = unique_many([{}, {}], SomeModel, SomeModel.name, ['foo', 'bar'],
+                         updates=[test_model_1, test_model_2])
+
+    assert errors == [{}, {'name': ['Value must be unique.']}]
+
+
+@pytest.mark.unit
+def test_unique_email_many(app, mocker):
+    from modules.users.model import User
+    digest = User(email='foo@bar.com').email_digest
+
+    # mock db query
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .__iter__.return_value = [(digest, 1)]
+
+    errors = unique_email_many([{}, {}], User, User.email,
+                               ['foo@bar.com', 'bar@foo.com'])
+
+    assert errors == [{'email': ['Value must be unique.']}, {}]
+
+
+@pytest.mark.unit
+def test_exists_many(app, mocker):
+    record_1 = SomeModel(id=1)
+    record_2 = SomeModel(id=2)
+
+    # mock db query
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .filter.return_value \
+        .__iter__.return_value = [record_1, record_2]
+
+    errors, records = exists_many([{}, {}, {}], SomeModel, 'roles',
+                                  [[1, '2'], [], [1, 3]])
+
+    assert errors == [{}, {'roles': ['Missing data for required field.']},
+                      {'roles': ['Invalid value.']}]
+    assert records == [[record_1, record_2], None, [record_1]]
+    assert query_mock.return_value.filter.call_count == 1
+
@@ -0,0 +1,189 @@
+import glob
+import json
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app import create_app
+from config import Config
+from lib.sqlalchemy.batch_writer import BatchWriter
+from modules.logins.model import Login
+
+
+@pytest.fixture
+def app(tmp_path):
+    Config.TESTING = True
+    app = create_app(Config)
+    app.config['LOGINS_WRITER_ENABLED'] = True
+    app.config['LOGINS_WRITER_BATCH_SIZE'] = 100
+    app.config['LOGINS_WRITER_INTERVAL'] = 60
+    app.config['LOGINS_WRITER_SPOOL_DIR'] = str(tmp_path)
+    return app
+
+
+@pytest.fixture
+def writer(app):
+    writer = BatchWriter(Login, ('username', 'success', 'attempt_date'))
+    writer.init_app(app)
+    yield writer
+    writer.enabled = False
+    writer.close()
+
+
+def login(username, success=False):
+    return Login(username=username, success=success,
+                 attempt_date=datetime(2020, 1, 2, 3, 4, 5))
+
+
+def spooled(app, pattern='*.spool*'):
+    rows = []
+    for path in glob.glob(os.path.join(
+            app.config['LOGINS_WRITER_SPOOL_DIR'], pattern)):
+        with open(path) as spool:
+            rows.extend(json.loads(line) for line in spool)
+    return rows
+
+
+def rejected(app):
+    return [row['username'] for row in spooled(app, '*.rejected')]
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_batch_writer_flush(app, writer, mocker):
+    db_mock = mocker.patch('lib.sqlalchemy.batch_writer.db')
+    connection = db_mock.get_engine.return_value.begin.return_value \
+        .__enter__.return_value
+
+    assert writer.enabled
+    writer.add(login('user1'))
+    writer.add(login('user2', True))
+    assert spooled(app) == [
+        {'username': 'user1', 'success': False,
+         'attempt_date': '2020-01-02T03:04:05'},
+        {'username': 'user2', 'success': True,
+         'attempt_date': '2020-01-02T03:04:05'}]
+
+    assert writer.flush()
+    connection.execute.assert_called_once()
+    rows = connection.execute.call_args[0][1]
+    assert [row['username'] for row in rows] == ['user1', 'user2']
+    assert spooled(app) == []
+
+
+@pytest.mark.unit
+def test_batch_writer_flush_fail(app, writer, mocker):
+    db_mock = mocker.patch('lib.sqlalchemy.batch_writer.db')
+    connection = db_mock.get_engine.return_value.begin.return_value \
+        .__enter__.return_value
+    connection.execute.side_effect = OperationalError('', {}, None)
+
+    writer.add(login('user1'))
+    assert not writer.flush()
+    writer.add(login('user2'))
+    assert len(spooled(app)) == 2
+
+    connection.execute.side_effect = None
+    assert writer.flush()
+    rows = connection.execute.call_args[0][1]
+    assert [row['username'] for row in rows] == ['user1', 'user2']
+    assert spooled(app) == []
+
+
+@pytest.mark.unit
+def test_batch_writer_flush_retries(app, writer, mocker):
+    db_mock = mocker.patch('lib.sqlalchemy.batch_writer.db')
+    connection = db_mock.get_engine.return_value.begin.return_value \
+        .__enter__.return_value
+    connection.execute.side_effect = OperationalError('', {}, None)
+    writer.retries = 2
+
+    writer.add(login('user1'))
+    assert not writer.flush()
+    assert len(spooled(app)) == 1
+    assert rejected(app) == []
+
+    # rejected once the retries are exhausted
+    assert not writer.flush()
+    assert spooled(app) == []
+    assert rejected(app) == ['user1']
+    assert connection.execute.call_count == 2
+    assert writer.flush()
+    assert connection.execute.call_count == 2
+
+
+@pytest.mark.unit
+def test_batch_writer_flush_one_by_one(app, writer, mocker):
+    db_mock = mocker.patch('lib.sqlalchemy.batch_writer.db')
+    connection = db_mock.get_engine.return_value.begin.return_value \
+        .__enter__.return_value
+    error = IntegrityError('', {}, None)
+    connection.execute.side_effect = [error, None, error, None]
+
+    for username in ('user1', 'user2', 'user3'):
+        writer.add(login(username))
+    assert not writer.flush()
+    assert [call[0][1][0]['username'] for call
+            in connection.execute.call_args_list[1:]] == \
+        ['user1', 'user2', 'user3']
+    assert spooled(app) == []
+    assert rejected(app) == ['user2']
+    assert writer.flush()
+
+
+@pytest.mark.unit
+def test_batch_writer_flush_one_by_one_retry(app, writer, mocker):
+    db_mock = mocker.patch('lib.sqlalchemy.batch_writer.db')
+    connection = db_mock.get_engine.return_value.begin.return_value \
+        .__enter__.return_value
+    connection.execute.side_effect = [
+        IntegrityError('', {}, None), None, OperationalError('', {}, None),
+        None]
+
+    for username in ('user1', 'user2', 'user3'):
+        writer.add(login(username))
+    assert not writer.flush()
+    assert [row['username'] for row in spooled(app)] == ['user2', 'user3']
+    assert rejected(app) == []
+
+    assert writer.flush()
+    rows = connection.execute.call_args[0][1]
+    assert [row['username'] for row in rows] == ['user2', 'user3']
+    assert spooled(app) == []
+
+
+@pytest.mark.unit
+def test_batch_writer_recover(app, writer, mocker):
+    db_mock = mocker.patch('lib.sqlalchemy.batch_writer.db')
+    connection = db_mock.get_engine.return_value.begin.return_value \
+        .__enter__.return_value
+
+    # spool file of a process that is no longer running
+    pid = 2 ** 22 + 1
+    with open(os.path.join(app.config['LOGINS_WRITER_SPOOL_DIR'],
+                           'logins.%d.spool' % pid), 'w') as spool:
+        spool.write(json.dumps({'username': 'user0', 'success': False,
+                                'attempt_date': '2020-01-02T03:04:05'}) +
+                    '\n{"username": "partial')
+
+    writer.add(login('user1'))
+    assert writer.flush()
+    rows = connection.execute.call_args[0][1]
+    assert [row['username'] for row in rows] == ['user0', 'user1']
+    assert rows[0]['attempt_date'] == datetime(2020, 1, 2, 3, 4, 5)
+    assert spooled(app) == []
+
+
+@pytest.mark.unit
+def test_batch_writer_close(writer, mocker):
+    db_mock = mocker.patch('lib.sqlalchemy.batch_writer.db')
+    connection = db_mock.get_engine.return_value.begin.return_value \
+        .__enter__.return_value
+
+    writer.add(login('user1'))
+    writer.close()
+    connection.execute.assert_called_once()
@@ -0,0 +1,212 @@
+import pytest
+from flask import g
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+from app import create_app
+from config import Config
+from init_dep import db
+from lib.sqlalchemy.loading import LoadingProfile, apply_loading_profiles, \
+    narrow_loading_profiles
+from modules.roles.model import Role
+from modules.users.model import User
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+    return app
+
+
+def user_profile():
+    return LoadingProfile(
+        User,
+        selectin=('roles', 'terms_of_services',
+                  'terms_of_services.terms_of_service'),
+        joined=('profile',))
+
+
+def make_state(mocker, **kwargs):
+    state = mocker.MagicMock()
+    state.lazy_loaded_from = None
+    state.is_select = True
+    state.is_relationship_load = False
+    state.statement.column_descriptions = [{'entity': User, 'expr': User}]
+    for name, value in kwargs.items():
+        setattr(state, name, value)
+    return state
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_loading_profile_init():
+    profile = user_profile()
+
+    assert profile.model is User
+    assert profile.paths == {
+        'roles': 'selectin',
+        'terms_of_services': 'selectin',
+        'terms_of_services.terms_of_service': 'selectin',
+        'profile': 'joined',
+    }
+    assert profile.covers('terms_of_services.terms_of_service')
+    assert not profile.covers('password_history')
+
+    with pytest.raises(ValueError):
+        LoadingProfile(User, eager=('roles',))
+
+
+@pytest.mark.unit
+def test_loading_profile_options(app):
+    with app.app_context():
+        query = User.query.options(*user_profile().options())
+        sql = str(query.statement.compile(dialect=postgresql.dialect()))
+
+        # joined relationships are part of the query, others are not
+        assert 'LEFT OUTER JOIN user_profiles' in sql
+        assert 'roles' not in sql
+        assert 'user_terms_of_services' not in sql
+
+        # nested relationships without a strategy keep their default
+        options = LoadingProfile(
+            User, joined=('terms_of_services.terms_of_service',)).options()
+        assert len(options) == 1
+        sql = str(User.query.options(*options).statement.compile(
+            dialect=postgresql.dialect()))
+        assert 'JOIN terms_of_services' not in sql
+
+
+@pytest.mark.unit
+def test_loading_profile_decorator(app):
+
+    @user_profile()
+    def view(value):
+        assert [profile.model for profile in g.loading_profiles] == [
+            Role, User]
+        return value
+
+    with app.app_context():
+        g.loading_profiles = (LoadingProfile(Role, selectin=('users',)),)
+        assert view(5) == 5
+        assert [profile.model for profile in g.loading_profiles] == [Role]
+        assert view.__name__ == 'view'
+
+
+@pytest.mark.unit
+def test_loading_profile_narrow(app):
+    profile = user_profile().narrow(['terms_of_services', 'username'])
+
+    assert profile.model is User
+    assert profile.paths == {
+        'terms_of_services': 'selectin',
+        'terms_of_services.terms_of_service': 'selectin',
+    }
+
+    with app.app_context():
+
+        # no active profiles
+        narrow_loading_profiles(User, ['roles'])
+        assert 'loading_profiles' not in g
+
+        g.loading_profiles = (user_profile(),
+                              LoadingProfile(Role, selectin=('users',)))
+        narrow_loading_profiles(User, ['roles'])
+        assert g.loading_profiles[0].paths == {'roles': 'selectin'}
+        assert g.loading_profiles[1].paths == {'users': 'selectin'}
+
+
+@pytest.mark.unit
+def test_apply_loading_profiles(app, mocker):
+    with app.app_context():
+
+        # no active profiles
+        state = make_state(mocker)
+        statement = state.statement
+        apply_loading_profiles(state)
+        assert state.statement is statement
+        statement.options.assert_not_called()
+
+        g.loading_profiles = (user_profile(),
+                              LoadingProfile(Role, selectin=('users',)))
+
+        # query of the model
+        apply_loading_profiles(state)
+        assert state.statement is statement.options.return_value
+        assert len(statement.options.call_args[0]) == 4
+
+        # query of other models
+        state = make_state(mocker)
+        statement = state.statement
+        statement.column_descriptions = []
+        apply_loading_profiles(state)
+        statement.options.assert_not_called()
+
+        # query of the model's columns
+        state = make_state(mocker)
+        statement = state.statement
+        statement.column_descriptions = [
+            {'entity': User, 'expr': User.username},
+            {'entity': User, 'expr': User.id}]
+        apply_loading_profiles(state)
+        statement.options.assert_not_called()
+
+        # relationship loads
+        state = make_state(mocker, is_relationship_load=True)
+        statement = state.statement
+        apply_loading_profiles(state)
+        statement.options.assert_not_called()
+
+
+@pytest.mark.unit
+def test_apply_loading_profiles_lazy_load(app, mocker):
+    with app.app_context():
+        g.loading_profiles = (user_profile(),)
+
+        def lazy_load(*path):
+            state = make_state(mocker, is_relationship_load=True,
+                               lazy_loaded_from=mocker.MagicMock())
+            state.loader_strategy_path.path = path
+            return state
+
+        declared = lazy_load(inspect(User), User.roles.property)
+        undeclared = lazy_load(inspect(User), User.password_history.property)
+        nested = lazy_load(inspect(User), User.roles.property, inspect(Role),
+                           Role.users.property)
+
+        # not checked by default
+        for state in (declared, undeclared, nested):
+            apply_loading_profiles(state)
+
+        app.config['LOADING_PROFILE_ASSERT'] = True
+        apply_loading_profiles(declared)
+        with pytest.raises(AssertionError) as info:
+            apply_loading_profiles(undeclared)
+        assert str(info.value) == \
+            'Lazy load of User.password_history outside of its loading profile'
+        with pytest.raises(AssertionError):
+            apply_loading_profiles(nested)
+
+        # models without a profile are not checked
+        apply_loading_profiles(lazy_load(inspect(Role), Role.users.property))
+
+
+@pytest.mark.unit
+def test_apply_loading_profiles_with_entities(app):
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+
+    with app.app_context():
+        db.session.execute(
+            'CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR)')
+        db.session.execute(
+            "INSERT INTO users (id, username) VALUES (1, 'user1')")
+        g.loading_profiles = (user_profile(),)
+
+        # columns only, the profile's options do not apply
+        assert User.query.with_entities(User.username, User.id).filter(
+            User.username.in_(['user1', 'user2'])).all() == [('user1', 1)]
+        assert User.query.with_entities(User.id).count() == 1
+
+        db.session.remove()
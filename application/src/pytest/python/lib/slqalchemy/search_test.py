@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app import create_app
+from config import Config
+from lib.sqlalchemy.search import trigram_index
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+    return app
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_trigram_index(app):
+    from modules.logins.model import Login
+    with app.app_context():
+        indexes = {index.name: index for index in Login.__table__.indexes}
+        assert 'ix_logins_username_trgm' in indexes
+        assert 'ix_logins_ip_address_trgm' in indexes
+        assert str(CreateIndex(indexes['ix_logins_username_trgm']).compile(
+            dialect=postgresql.dialect())) == \
+            'CREATE INDEX ix_logins_username_trgm ON logins USING gin ' \
+            '(username gin_trgm_ops)'
+
+
+@pytest.mark.unit
+def test_trigram_index_name():
+    index = trigram_index('roles', 'name')
+    assert index.name == 'ix_roles_name_trgm'
+    assert index.dialect_options['postgresql']['using'] == 'gin'
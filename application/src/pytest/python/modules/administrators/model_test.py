@@ -7,17 +7,22 @@ from app import create_app
 from config import Config
 from modules.administrators.model import Administrator, \
     AdministratorPasswordHistory
+from init_dep import hasher, token_cache
+from modules.roles.model import Role
+from modules.roles.registry import role_registry
 from fixtures import Fixtures
 
 
 @pytest.fixture
-def app(request):
+def app(request, mocker):
     config = copy(Config)
     config.TESTING = True
     config.APP_TYPE = 'admin' if 'admin_api' in request.keywords else 'public'
     app = create_app(config)
 
     if 'unit' in request.keywords:
+        # role policies, loaded from the database otherwise
+        mocker.patch.object(role_registry, 'generation', return_value='gen1')
         yield app
     else:
         fixtures = Fixtures(app)
@@ -45,6 +50,21 @@ def test_administrator_check_password_fail(app):
     assert not administrator.check_password('testPass2')
 
 
+@pytest.mark.unit
+def test_administrator_rehash_password(app):
+    administrator = Administrator()
+    administrator.password = 'testPass1'
+    changed_at = administrator.password_changed_at
+
+    assert not administrator.rehash_password('testPass1')
+
+    hasher.rounds += 1
+    assert administrator.rehash_password('testPass1')
+    assert administrator.password.startswith('$2b$%02d$' % hasher.rounds)
+    assert administrator.check_password('testPass1')
+    assert administrator.password_changed_at == changed_at
+
+
 @pytest.mark.unit
 def test_administrator_auth_token_pass(app, mocker):
     administrator1 = Administrator()
@@ -59,6 +79,137 @@ def test_administrator_auth_token_pass(app, mocker):
     assert Administrator.verify_auth_token(token)
 
 
+@pytest.mark.unit
+def test_administrator_auth_token_cached(app, mocker):
+    admin1 = Administrator()
+    admin1.id = 1
+    admin1.username = 'admin1'
+    token = admin1.generate_auth_token()
+
+    # mock db query
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .get.return_value = admin1
+
+    snapshot = Administrator.verify_auth_token(token)
+    assert snapshot.id == 1
+    assert snapshot.type == 'administrator'
+    assert snapshot.username == 'admin1'
+
+    # second verification is served from the cache
+    assert Administrator.verify_auth_token(token) is snapshot
+    assert query_mock.return_value.get.call_count == 1
+
+    # writing the account drops the cached token
+    token_cache.invalidate('administrator', 1)
+    assert Administrator.verify_auth_token(token) is not snapshot
+    assert query_mock.return_value.get.call_count == 2
+
+
+@pytest.mark.unit
+def test_administrator_auth_token_claims(app, mocker):
+    role = Role()
+    role.name = 'SUPER_ADMIN'
+    role.password_reset_days = 30
+
+    admin1 = Administrator()
+    admin1.id = 1
+    admin1.username = 'admin1'
+    admin1.password_changed_at = datetime.now()
+    admin1.version = 3
+    admin1.roles = [role]
+    token = admin1.generate_auth_token()
+
+    # mock db query: the account's version
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .scalar.return_value = 3
+
+    snapshot = Administrator.verify_auth_token(token)
+    assert snapshot.id == 1
+    assert snapshot.type == 'administrator'
+    assert snapshot.roles == ('SUPER_ADMIN',)
+    assert snapshot.version == 3
+    assert not snapshot.is_password_expired()
+    assert query_mock.return_value.get.call_count == 0
+
+
+@pytest.mark.unit
+def test_administrator_auth_token_claims_stale(app, mocker):
+    admin1 = Administrator()
+    admin1.id = 1
+    admin1.username = 'admin1'
+    admin1.version = 3
+    token = admin1.generate_auth_token()
+
+    # account has since been written by this process
+    token_cache.invalidate('administrator', 1, 4)
+
+    # mock db query
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .get.return_value = admin1
+
+    assert Administrator.verify_auth_token(token)
+    assert query_mock.return_value.get.call_count == 1
+
+
+@pytest.mark.unit
+def test_administrator_auth_token_claims_stale_elsewhere(app, mocker):
+    admin1 = Administrator()
+    admin1.id = 1
+    admin1.username = 'admin1'
+    admin1.version = 3
+    token = admin1.generate_auth_token()
+
+    # account has since been written by another process or deployment
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .scalar.return_value = 4
+    query_mock.return_value \
+        .get.return_value = admin1
+
+    assert Administrator.verify_auth_token(token)
+    assert query_mock.return_value.get.call_count == 1
+
+    # account has since been deleted, seen once the cached token expired
+    token_cache.cache.clear()
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .scalar.return_value = None
+    query_mock.return_value \
+        .get.return_value = None
+
+    assert Administrator.verify_auth_token(token) is None
+
+
+@pytest.mark.unit
+def test_administrator_auth_token_claims_roles_changed(app, mocker):
+    admin1 = Administrator()
+    admin1.id = 1
+    admin1.username = 'admin1'
+    admin1.version = 3
+    token = admin1.generate_auth_token()
+
+    # a role policy has since been changed on another host
+    role_registry.generation.return_value = 'gen2'
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .scalar.return_value = 3
+    query_mock.return_value \
+        .get.return_value = admin1
+
+    assert Administrator.verify_auth_token(token)
+    assert query_mock.return_value.get.call_count == 1
+
+
 @pytest.mark.unit
 def test_administrator_auth_token_fail(app):
     assert not Administrator.verify_auth_token('badtoken')
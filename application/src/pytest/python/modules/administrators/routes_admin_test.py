@@ -9,9 +9,10 @@ from sqlalchemy.orm.exc import NoResultFound
 from fixtures import Fixtures
 from app import create_app
 from config import Config
+from init_dep import db
 from modules.administrators.routes_admin import get_administrators, \
     post_administrator, get_administrator, put_administrator, \
-    delete_administrator
+    delete_administrator, post_administrators_bulk
 from modules.administrators.model import Administrator
 from modules.roles.model import Role
 from modules.app_keys.model import AppKey
@@ -2174,6 +2175,39 @@ def test_delete_administrator_route_unauthorized(app, mocker, client):
     assert 'error' in response.json
 
 
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_post_administrators_bulk_unique_query(app, mocker):
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+
+    request_mock = mocker.patch('modules.administrators.routes_admin.request')
+    request_mock.json = {'administrators': [
+        {'username': 'admin1', 'email': 'admin1@test.com', 'roles': []},
+        {'username': 'admin2', 'email': 'admin1@test.com', 'roles': []}]}
+
+    with app.app_context():
+
+        # runs the unique_many(), unique_email_many() queries for real,
+        # inside the route's loading profile
+        db.session.execute(
+            'CREATE TABLE administrators (id INTEGER PRIMARY KEY, '
+            'username VARCHAR, email_digest VARCHAR)')
+        db.session.execute(
+            "INSERT INTO administrators (id, username) VALUES (1, 'admin1')")
+
+        result = post_administrators_bulk()
+
+        db.session.remove()
+
+    assert result[1] == 200
+    results = result[0].json['results']
+    assert [item['status'] for item in results] == [400, 400]
+    assert results[0]['error']['username'] == ['Value must be unique.']
+    assert 'email' not in results[0]['error']
+    assert 'username' not in results[1]['error']
+    assert results[1]['error']['email'] == ['Value must be unique.']
+
+
 # INTEGRATION TESTS
 
 
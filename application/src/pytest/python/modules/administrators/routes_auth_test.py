@@ -13,16 +13,19 @@ from modules.administrators.routes_auth import get_auth_token, \
 from modules.administrators.model import Administrator
 from modules.roles.model import Role
 from modules.app_keys.model import AppKey
+from modules.roles.registry import role_registry
 
 
 @pytest.fixture
-def app(request):
+def app(request, mocker):
     config = copy(Config)
     config.TESTING = True
     config.APP_TYPE = 'admin' if 'admin_api' in request.keywords else 'public'
     app = create_app(config)
 
     if 'unit' in request.keywords:
+        # role policies, loaded from the database otherwise
+        mocker.patch.object(role_registry, 'generation', return_value='gen1')
         yield app
     else:
         fixtures = Fixtures(app)
@@ -0,0 +1,113 @@
+from copy import copy
+
+import pytest
+from sqlalchemy.orm.exc import NoResultFound
+
+from app import create_app
+from config import Config
+from lib.cache.version_stamp import VersionStamp
+from modules.app_keys.cache import app_key_cache
+from modules.app_keys.model import AppKey
+
+
+@pytest.fixture
+def app(tmp_path):
+    config = copy(Config)
+    config.TESTING = True
+    config.APP_KEY_CACHE_STAMP_PATH = str(tmp_path / 'app_keys.stamp')
+    app = create_app(config)
+    return app
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_app_key_cache_is_valid(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    one_mock = query_mock.return_value.filter.return_value.one
+    one_mock.return_value = AppKey()
+
+    assert app_key_cache.is_valid('123')
+    assert app_key_cache.is_valid('123')
+    assert one_mock.call_count == 1
+    assert app_key_cache.hits['123'] == 2
+
+
+@pytest.mark.unit
+def test_app_key_cache_is_valid_fail(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    one_mock = query_mock.return_value.filter.return_value.one
+    one_mock.side_effect = NoResultFound()
+
+    assert not app_key_cache.is_valid('BAD_KEY')
+    assert 'BAD_KEY' not in app_key_cache.hits
+
+    # rejected keys are remembered
+    assert not app_key_cache.is_valid('BAD_KEY')
+    assert one_mock.call_count == 1
+
+
+@pytest.mark.unit
+def test_app_key_cache_invalidate(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    one_mock = query_mock.return_value.filter.return_value.one
+    one_mock.return_value = AppKey()
+    assert app_key_cache.is_valid('123')
+
+    # another process wrote app keys
+    VersionStamp(app.config['APP_KEY_CACHE_STAMP_PATH']).bump()
+    one_mock.side_effect = NoResultFound()
+    assert not app_key_cache.is_valid('123')
+
+    one_mock.side_effect = None
+    app_key_cache.invalidate()
+    assert app_key_cache.is_valid('123')
+    app_key_cache.invalidate()
+    one_mock.side_effect = NoResultFound()
+    assert not app_key_cache.is_valid('123')
+
+
+@pytest.mark.unit
+def test_app_key_cache_bloom(app, mocker):
+    app.config['APP_KEY_BLOOM_ENABLED'] = True
+    app_key_cache.init_app(app)
+
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .filter.return_value \
+        .with_entities.return_value \
+        .__iter__.return_value = [AppKey(key='123'), AppKey(key='456')]
+    one_mock = query_mock.return_value.filter.return_value.one
+    one_mock.return_value = AppKey()
+
+    assert app_key_cache.is_valid('123')
+    assert not app_key_cache.is_valid('BAD_KEY')
+    assert one_mock.call_count == 1
+
+    # rebuilt after app keys were written
+    query_mock.return_value \
+        .filter.return_value \
+        .with_entities.return_value \
+        .__iter__.return_value = [AppKey(key='BAD_KEY')]
+    app_key_cache.invalidate()
+    assert app_key_cache.is_valid('BAD_KEY')
+    assert not app_key_cache.is_valid('123')
+
+
+@pytest.mark.unit
+def test_app_key_cache_bloom_ttl(app):
+    app.config['APP_KEY_BLOOM_ENABLED'] = True
+    app.config['APP_KEY_BLOOM_TTL'] = 5
+    app_key_cache.init_app(app)
+
+    # keys revoked on other hosts are only accepted for seconds
+    assert app_key_cache.bloom_ttl == 5
+    assert app_key_cache.keys.ttl == 5
+    assert app_key_cache.rejected.ttl == 5
+
+    app.config['APP_KEY_BLOOM_ENABLED'] = False
+    app_key_cache.init_app(app)
+    assert app_key_cache.keys.ttl == app.config['APP_KEY_CACHE_TTL']
+    assert app_key_cache.rejected.ttl == \
+        app.config['APP_KEY_NEGATIVE_CACHE_TTL']
@@ -0,0 +1,167 @@
+from types import SimpleNamespace
+
+import pytest
+from werkzeug.datastructures import ImmutableMultiDict
+
+from app import create_app
+from config import Config
+from modules.locations.index import location_index, \
+    invalidate_location_index
+from modules.locations.routes_public import get_countries, get_regions
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    Config.TESTING = True
+    monkeypatch.setattr(Config, 'APP_TYPE', 'public')
+    monkeypatch.setattr(Config, 'LOCATIONS_INDEX_ENABLED', True)
+    monkeypatch.setattr(Config, 'LOCATIONS_INDEX_STAMP_PATH',
+                        str(tmp_path / 'locations.stamp'))
+    app = create_app(Config)
+    return app
+
+
+# rows with the database's rank of each record in each order
+COUNTRIES = [
+    SimpleNamespace(id=1, name='United States', code_2='US', code_3='USA',
+                    rank_id=1, rank_name=3, rank_code_2=3, rank_code_3=3),
+    SimpleNamespace(id=2, name='Canada', code_2='CA', code_3='CAN',
+                    rank_id=2, rank_name=1, rank_code_2=1, rank_code_3=1),
+    SimpleNamespace(id=3, name='Mexico', code_2='MX', code_3='MEX',
+                    rank_id=3, rank_name=2, rank_code_2=2, rank_code_3=2),
+]
+REGIONS = [
+    SimpleNamespace(id=1, name='Texas', code_2='TX', country_code='US',
+                    rank_id=1, rank_name=3, rank_code_2=3),
+    SimpleNamespace(id=2, name='Ontario', code_2='ON', country_code='CA',
+                    rank_id=2, rank_name=2, rank_code_2=2),
+    SimpleNamespace(id=3, name='Alaska', code_2=None, country_code='US',
+                    rank_id=3, rank_name=1, rank_code_2=4),
+]
+
+
+def mock_query(mocker, countries=None, regions=None):
+    query_mock = mocker.patch('modules.locations.index.db.session.query')
+    query_mock.return_value.filter.return_value \
+        .__iter__.return_value = COUNTRIES if countries is None else countries
+    query_mock.return_value.filter.return_value.join.return_value \
+        .__iter__.return_value = REGIONS if regions is None else regions
+    return query_mock
+
+
+def ids(listing, page=1, limit=10):
+    return [record.id for record in listing.fetch(page, limit)]
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_location_index_countries(app, mocker):
+    query_mock = mock_query(mocker)
+
+    with app.test_request_context():
+        assert ids(location_index.countries(ImmutableMultiDict())) == \
+            [2, 3, 1]
+        assert ids(location_index.countries(ImmutableMultiDict({
+            'order_by': 'id.desc'}))) == [3, 2, 1]
+        assert ids(location_index.countries(ImmutableMultiDict({
+            'order_by': 'code_3.desc'}))) == [1, 3, 2]
+        assert ids(location_index.countries(ImmutableMultiDict({
+            'order_by': 'bad'}))) == [2, 3, 1]
+
+    # loaded once, one query per model
+    assert query_mock.call_count == 2
+
+
+@pytest.mark.unit
+def test_location_index_regions(app, mocker):
+    mock_query(mocker)
+
+    with app.test_request_context():
+        assert ids(location_index.regions(
+            'US', ImmutableMultiDict())) == [3, 1]
+        assert ids(location_index.regions('US', ImmutableMultiDict({
+            'order_by': 'code_2.desc'}))) == [3, 1]
+        assert ids(location_index.regions(
+            'CA', ImmutableMultiDict())) == [2]
+        assert ids(location_index.regions(
+            'ZZ', ImmutableMultiDict())) == []
+
+
+@pytest.mark.unit
+def test_location_index_invalidate(app, mocker):
+    query_mock = mock_query(mocker)
+
+    with app.test_request_context():
+        assert ids(location_index.countries(ImmutableMultiDict())) == \
+            [2, 3, 1]
+
+        # a country was disabled, in another process
+        mock_query(mocker, countries=COUNTRIES[1:])
+        assert ids(location_index.countries(ImmutableMultiDict())) == \
+            [2, 3, 1]
+        session = mocker.Mock()
+        session.info = {'locations_changed': True}
+        invalidate_location_index(session)
+        assert session.info == {}
+        assert ids(location_index.countries(ImmutableMultiDict())) == [2, 3]
+
+    assert query_mock.call_count == 2
+
+
+@pytest.mark.unit
+def test_location_index_ttl(app, mocker):
+    mock_query(mocker)
+    location_index.ttl = 0
+
+    with app.test_request_context():
+        assert ids(location_index.countries(ImmutableMultiDict())) == \
+            [2, 3, 1]
+        mock_query(mocker, countries=COUNTRIES[:1])
+        assert ids(location_index.countries(ImmutableMultiDict())) == [1]
+
+
+@pytest.mark.unit
+def test_location_index_disabled(app, mocker):
+    location_index.enabled = False
+
+    assert location_index.countries(ImmutableMultiDict()) is None
+    assert location_index.regions('US', ImmutableMultiDict()) is None
+
+
+@pytest.mark.unit
+def test_get_countries_from_memory(app, mocker):
+    mock_query(mocker)
+    app.config['CONDITIONAL_GET_ENABLED'] = False
+
+    with app.test_request_context('/countries/1/2'):
+        result = get_countries(1, 2)
+
+    assert result[1] == 200
+    assert result[0].json['countries'] == [
+        {'id': 2, 'name': 'Canada', 'code_2': 'CA', 'code_3': 'CAN',
+         'regions_uri': 'http://localhost/regions/CA'},
+        {'id': 3, 'name': 'Mexico', 'code_2': 'MX', 'code_3': 'MEX',
+         'regions_uri': 'http://localhost/regions/MX'}]
+    assert result[0].json['total'] == 3
+    assert result[0].json['next_uri'] == 'http://localhost/countries/2/2'
+
+
+@pytest.mark.unit
+def test_get_regions_from_memory(app, mocker):
+    mock_query(mocker)
+    app.config['CONDITIONAL_GET_ENABLED'] = False
+
+    with app.test_request_context('/regions/US?fields=name'):
+        result = get_regions('US')
+
+    assert result[1] == 200
+    assert result[0].json['regions'] == [{'name': 'Alaska'},
+                                         {'name': 'Texas'}]
+    assert result[0].json['total'] == 2
+
+    with app.test_request_context('/regions/ZZ'):
+        result = get_regions('ZZ')
+
+    assert result == ('', 204)
@@ -24,6 +24,23 @@ def app(request):
         fixtures.teardown()
 
 
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_login_ip_inet(app):
+    login = Login(ip_address='::ffff:203.0.113.5')
+    assert login.ip_address == '::ffff:203.0.113.5'
+    assert login.ip_inet == '203.0.113.5'
+
+
+@pytest.mark.unit
+def test_login_ip_inet_invalid(app):
+    login = Login(ip_address='unknown')
+    assert login.ip_address == 'unknown'
+    assert login.ip_inet is None
+
+
 # INTEGRATION TESTS
 
 
@@ -0,0 +1,91 @@
+from datetime import date, datetime
+
+import pytest
+
+from app import create_app
+from config import Config
+from modules.logins.partitions import LoginPartitions
+
+
+@pytest.fixture
+def app():
+    Config.TESTING = True
+    app = create_app(Config)
+    return app
+
+
+@pytest.fixture
+def partitions(app):
+    partitions = LoginPartitions()
+    partitions.init_app(app)
+    return partitions
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_login_partitions_name():
+    assert LoginPartitions.name(date(2026, 3, 1)) == 'logins_y2026m03'
+    assert LoginPartitions.month('logins_y2026m03') == date(2026, 3, 1)
+    assert LoginPartitions.month('logins_default') is None
+
+
+@pytest.mark.unit
+def test_login_partitions_plan_create(partitions):
+    partitions.ahead = 2
+    create, archive, cutoff = partitions.plan(
+        date(2026, 11, 18), ['logins_y2026m11', 'logins_default'])
+    assert create == [date(2026, 12, 1), date(2027, 1, 1)]
+    assert archive == []
+    assert cutoff is None
+
+
+@pytest.mark.unit
+def test_login_partitions_plan_retention(partitions):
+    partitions.ahead = 0
+    partitions.retention = 2
+    create, archive, cutoff = partitions.plan(
+        date(2026, 3, 5), ['logins_y2025m12', 'logins_y2026m01',
+                           'logins_y2026m02', 'logins_y2026m03'])
+    assert create == []
+    assert archive == [date(2025, 12, 1)]
+    assert cutoff == date(2026, 1, 1)
+
+
+@pytest.mark.unit
+def test_login_partitions_retention_requires_archive_dir(partitions):
+    partitions.retention = 12
+    partitions.archive_dir = None
+    with pytest.raises(ValueError):
+        partitions.maintain()
+
+
+@pytest.mark.unit
+def test_login_partitions_create(app, partitions, mocker):
+    session_mock = mocker.patch('modules.logins.partitions.db.session')
+
+    partitions.create(date(2026, 12, 1))
+
+    statements = [str(call[0][0]) for call in
+                  session_mock.execute.call_args_list]
+    assert statements[0].startswith('CREATE TABLE logins_y2026m12 (LIKE')
+    assert 'DELETE FROM logins_default' in statements[1]
+    assert statements[2] == \
+        "ALTER TABLE logins ATTACH PARTITION logins_y2026m12 FOR VALUES " \
+        "FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+    session_mock.commit.assert_called_once()
+
+
+@pytest.mark.unit
+def test_login_partitions_partition_default(app, partitions, mocker):
+    session_mock = mocker.patch('modules.logins.partitions.db.session')
+    session_mock.execute.return_value = [
+        (datetime(2025, 11, 1),), (datetime(2025, 12, 1),)]
+    mocker.patch.object(partitions, '_partitions',
+                        side_effect=[{'logins_y2025m12'}, set()])
+    create_mock = mocker.patch.object(partitions, 'create')
+
+    assert partitions.partition_default() == ['logins_y2025m11']
+    create_mock.assert_called_once_with(date(2025, 11, 1))
+    assert 'FROM logins_default' in str(session_mock.execute.call_args[0][0])
@@ -1,13 +1,15 @@
 from copy import copy
+from datetime import datetime, timezone
 import base64
 
 import pytest
-from werkzeug.exceptions import Unauthorized
+from werkzeug.exceptions import BadRequest, Unauthorized
 from sqlalchemy.orm.exc import NoResultFound
 
 from fixtures import Fixtures
 from app import create_app
 from config import Config
+from modules.logins import routes_admin
 from modules.logins.routes_admin import get_logins
 from modules.logins.model import Login
 from modules.app_keys.model import AppKey
@@ -185,6 +187,61 @@ def test_get_logins_filter(app, mocker):
     assert result[0].json['total'] == expected_total
 
 
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_get_logins_ip_network_invalid(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .order_by.return_value \
+        .count.return_value = 0
+
+    request_mock = mocker.patch('modules.logins.routes_admin.request')
+    request_mock.args = {'ip_network': '203.0.113.0/33'}
+
+    with pytest.raises(BadRequest):
+        get_logins()
+
+
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_get_logins_since_invalid(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .order_by.return_value \
+        .count.return_value = 0
+
+    request_mock = mocker.patch('modules.logins.routes_admin.request')
+    request_mock.args = {'since': '2026-13-01'}
+
+    with pytest.raises(BadRequest):
+        get_logins()
+
+
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_get_logins_since_utc(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .order_by.return_value \
+        .filter.return_value \
+        .filter.return_value \
+        .count.return_value = 0
+    parse_spy = mocker.spy(routes_admin, '_parse_datetime')
+
+    request_mock = mocker.patch('modules.logins.routes_admin.request')
+    request_mock.args = {'since': '2026-03-04T05:06:07Z',
+                         'until': '2026-03-05T00:00:00+00:00'}
+
+    result = get_logins()
+
+    assert result[1] == 204
+    assert [call.args[0] for call in parse_spy.call_args_list] == [
+        '2026-03-04T05:06:07Z', '2026-03-05T00:00:00+00:00']
+    assert parse_spy.spy_return == datetime(2026, 3, 5, tzinfo=timezone.utc)
+    assert routes_admin._parse_datetime('2026-03-04T05:06:07Z') == \
+        datetime(2026, 3, 4, 5, 6, 7, tzinfo=timezone.utc)
+
+
 @pytest.mark.unit
 @pytest.mark.admin_api
 def test_get_logins_route(app, mocker, client):
@@ -0,0 +1,138 @@
+from copy import copy
+
+import pytest
+
+from app import create_app
+from config import Config
+from init_dep import db, token_cache
+from modules.roles.model import Role
+from modules.roles.registry import RolePolicy, role_registry, \
+    invalidate_role_registry
+
+
+@pytest.fixture
+def app(tmp_path):
+    config = copy(Config)
+    config.TESTING = True
+    config.ROLES_REGISTRY_STAMP_PATH = str(tmp_path / 'roles.stamp')
+    app = create_app(config)
+    return app
+
+
+def make_role(role_id, name, max_attempts=5):
+    return Role(id=role_id, name=name, is_admin_role=False, priority=10,
+                login_lockout_policy=True, login_max_attempts=max_attempts,
+                login_timeframe=600, login_ban_time=1800,
+                login_ban_by_ip=True, password_policy=True,
+                password_reuse_history=10, password_reset_days=365)
+
+
+# UNIT TESTS
+
+
+@pytest.mark.unit
+def test_role_registry_get(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .all.return_value = [make_role(1, 'USER'),
+                             make_role(2, 'SUPER_ADMIN')]
+
+    policy = role_registry.get('USER')
+    assert isinstance(policy, RolePolicy)
+    assert policy.id == 1
+    assert policy.login_max_attempts == 5
+    assert policy.password_reuse_history == 10
+    assert role_registry.get('SUPER_ADMIN').id == 2
+    assert role_registry.get('BAD_ROLE') is None
+
+    # served from memory
+    query_mock.return_value.all.return_value = []
+    assert role_registry.get('USER').id == 1
+    assert query_mock.return_value.all.call_count == 1
+
+
+@pytest.mark.unit
+def test_role_registry_ttl(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value.all.return_value = [make_role(1, 'USER')]
+
+    role_registry.ttl = 0
+    assert role_registry.get('USER').login_max_attempts == 5
+    query_mock.return_value.all.return_value = [make_role(1, 'USER', 3)]
+    assert role_registry.get('USER').login_max_attempts == 3
+
+
+@pytest.mark.unit
+def test_role_registry_lockout_out_of_range(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value.all.return_value = [
+        make_role(1, 'USER', 20), make_role(2, 'SUPER_ADMIN', 0)]
+    logger_mock = mocker.patch.object(app, 'logger')
+
+    with app.app_context():
+        role_registry.load()
+        assert role_registry.get('USER').login_max_attempts == \
+            app.config['AUTH_LOCKOUT_HISTORY']
+        assert role_registry.get('SUPER_ADMIN').login_max_attempts == 1
+    assert logger_mock.error.call_count == 2
+
+
+@pytest.mark.unit
+def test_role_registry_generation(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value.all.return_value = [make_role(1, 'USER'),
+                                                make_role(2, 'SUPER_ADMIN')]
+    clear_mock = mocker.patch.object(token_cache, 'clear')
+
+    role_registry.ttl = 0
+    generation = role_registry.generation()
+    assert role_registry.generation() == generation
+    assert not clear_mock.called
+
+    # the same policies, in any order, on another host
+    query_mock.return_value.all.return_value = [make_role(2, 'SUPER_ADMIN'),
+                                                make_role(1, 'USER')]
+    assert role_registry.generation() == generation
+
+    # a policy changed by another host, seen by the TTL reload
+    query_mock.return_value.all.return_value = [make_role(1, 'USER', 3),
+                                                make_role(2, 'SUPER_ADMIN')]
+    assert role_registry.generation() != generation
+    assert clear_mock.call_count == 1
+
+
+@pytest.mark.unit
+def test_role_registry_invalidate(app, mocker):
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value.all.return_value = [make_role(1, 'USER')]
+    clear_mock = mocker.patch.object(token_cache, 'clear')
+
+    role_registry.check()
+    assert role_registry.get('USER').login_max_attempts == 5
+    query_mock.return_value.all.return_value = [make_role(1, 'USER', 3)]
+
+    # nothing changed
+    role_registry.check()
+    assert role_registry.get('USER').login_max_attempts == 5
+    assert not clear_mock.called
+
+    # another process committed a role change
+    session = mocker.Mock()
+    session.info = {'roles_changed': True}
+    invalidate_role_registry(session)
+    assert session.info == {}
+    role_registry.check()
+    assert clear_mock.called
+    assert role_registry.get('USER').login_max_attempts == 3
+
+
+@pytest.mark.unit
+def test_role_policy_to_role(app):
+    role = RolePolicy.from_role(make_role(1, 'USER')).to_role()
+
+    with app.app_context():
+        merged = db.session.merge(role, load=False)
+        assert merged.id == 1
+        assert merged.name == 'USER'
+        assert merged.password_reset_days == 365
+        assert merged not in db.session.new
@@ -25,6 +25,27 @@ def app(request):
         fixtures.teardown()
 
 
+# UNIT TESTS
+
+
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_role_schema_login_max_attempts(app):
+    app.config['AUTH_LOCKOUT_HISTORY'] = 8
+    data = {'name': 'USER', 'is_admin_role': False, 'priority': 100,
+            'login_lockout_policy': True, 'login_max_attempts': 8,
+            'login_timeframe': 600, 'login_ban_time': 1800,
+            'login_ban_by_ip': True, 'password_policy': False,
+            'password_reuse_history': 10, 'password_reset_days': 365}
+
+    with app.app_context():
+        assert RoleAdminSchema().validate(data) == {}
+        for attempts in (0, 9):
+            data['login_max_attempts'] = attempts
+            assert RoleAdminSchema().validate(data) == {
+                'login_max_attempts': ['Value must be between 1 and 8.']}
+
+
 # INTEGRATION TESTS
 
 
@@ -3,12 +3,15 @@ import re
 import base64
 
 import pytest
-from werkzeug.exceptions import NotFound, Unauthorized
+from werkzeug.exceptions import NotFound, ServiceUnavailable, \
+    Unauthorized
 from sqlalchemy.orm.exc import NoResultFound
 
 from fixtures import Fixtures
 from app import create_app
 from config import Config
+from init_dep import hasher
+from lib.errors.handlers import error_503
 from modules.user_account.routes_admin import get_account, put_account, \
     put_password
 from modules.administrators.model import Administrator, \
@@ -761,6 +764,55 @@ def test_put_password_password2_match_fail(app, mocker):
     assert result[0].json == expected_json
 
 
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_put_password_password_history_timeout(app, mocker, monkeypatch):
+    request_mock = mocker.patch('modules.user_account.routes_admin.request')
+    request_mock.json = {
+        'previous_password': "admin1Pass",
+        'password1': "admin1Pass2",
+        'password2': "admin1Pass2",
+    }
+
+    role = Role()
+    role.password_policy = True
+    role.password_reuse_history = 10
+
+    admin1 = Administrator()
+    admin1.password = "admin1Pass"
+    admin1.roles = [role]
+
+    g_mock = mocker.patch('modules.user_account.routes_admin.g')
+    g_mock.user = admin1
+
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+
+    # password history too slow to check within the time budget
+    pw_history1 = AdministratorPasswordHistory()
+    pw_history1.password = hasher.hashpw("admin1Pass", 12)
+    monkeypatch.setattr(hasher, 'reuse_timeout', 0.001)
+
+    # mock password history
+    query_mock.return_value \
+        .filter.return_value \
+        .order_by.return_value \
+        .limit.return_value \
+        .__iter__.return_value = [pw_history1]
+
+    db_mock = mocker.patch('modules.user_account.routes_admin.db')
+
+    with pytest.raises(ServiceUnavailable) as error:
+        put_password()
+
+    result = error_503(error.value)
+    assert result.status_code == 503
+    assert result.json == {'error': "Password history check timed out, "
+                                     "please try again later."}
+    assert result.headers['Retry-After'] == str(
+        app.config['AUTH_HASH_POOL_RETRY_AFTER'])
+    assert db_mock.session.commit.call_count == 0
+
+
 @pytest.mark.unit
 @pytest.mark.admin_api
 def test_put_password_password_history_reuse_fail(app, mocker):
@@ -3,12 +3,15 @@ import re
 import base64
 
 import pytest
-from werkzeug.exceptions import NotFound, Unauthorized
+from werkzeug.exceptions import NotFound, ServiceUnavailable, \
+    Unauthorized
 from sqlalchemy.orm.exc import NoResultFound
 
 from fixtures import Fixtures
 from app import create_app
 from config import Config
+from init_dep import hasher
+from lib.errors.handlers import error_503
 from modules.user_account.routes_public import post_user_account_step1, \
     post_user_account_step2, get_user_account, put_user_account, \
     delete_user_account, put_password, post_password_request_reset_code, \
@@ -1741,6 +1744,54 @@ def test_put_password_password2_match_fail(app, mocker):
     assert result[0].json == expected_json
 
 
+@pytest.mark.unit
+def test_put_password_password_history_timeout(app, mocker, monkeypatch):
+    request_mock = mocker.patch('modules.user_account.routes_public.request')
+    request_mock.json = {
+        'previous_password': "user2pass",
+        'password1': "user2Pass2",
+        'password2': "user2Pass2",
+    }
+
+    role = Role()
+    role.password_policy = True
+    role.password_reuse_history = 10
+
+    user2 = User()
+    user2.password = "user2pass"
+    user2.roles = [role]
+
+    g_mock = mocker.patch('modules.user_account.routes_public.g')
+    g_mock.user = user2
+
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+
+    # password history too slow to check within the time budget
+    pw_history1 = UserPasswordHistory()
+    pw_history1.password = hasher.hashpw("user2pass", 12)
+    monkeypatch.setattr(hasher, 'reuse_timeout', 0.001)
+
+    # mock password history
+    query_mock.return_value \
+        .filter.return_value \
+        .order_by.return_value \
+        .limit.return_value \
+        .__iter__.return_value = [pw_history1]
+
+    db_mock = mocker.patch('modules.user_account.routes_public.db')
+
+    with pytest.raises(ServiceUnavailable) as error:
+        put_password()
+
+    result = error_503(error.value)
+    assert result.status_code == 503
+    assert result.json == {'error': "Password history check timed out, "
+                                     "please try again later."}
+    assert result.headers['Retry-After'] == str(
+        app.config['AUTH_HASH_POOL_RETRY_AFTER'])
+    assert db_mock.session.commit.call_count == 0
+
+
 @pytest.mark.unit
 def test_put_password_password_history_reuse_fail(app, mocker):
     expected_status = 400
@@ -6,17 +6,22 @@ import pytest
 from app import create_app
 from config import Config
 from modules.users.model import User, UserPasswordHistory, UserTermsOfService
+from init_dep import hasher, token_cache
+from modules.roles.model import Role
+from modules.roles.registry import role_registry
 from fixtures import Fixtures
 
 
 @pytest.fixture
-def app(request):
+def app(request, mocker):
     config = copy(Config)
     config.TESTING = True
     config.APP_TYPE = 'admin' if 'admin_api' in request.keywords else 'public'
     app = create_app(config)
 
     if 'unit' in request.keywords:
+        # role policies, loaded from the database otherwise
+        mocker.patch.object(role_registry, 'generation', return_value='gen1')
         yield app
     else:
         fixtures = Fixtures(app)
@@ -44,6 +49,21 @@ def test_user_check_password_fail(app):
     assert not user.check_password('testPass2')
 
 
+@pytest.mark.unit
+def test_user_rehash_password(app):
+    user = User()
+    user.password = 'testPass1'
+    changed_at = user.password_changed_at
+
+    assert not user.rehash_password('testPass1')
+
+    hasher.rounds += 1
+    assert user.rehash_password('testPass1')
+    assert user.password.startswith('$2b$%02d$' % hasher.rounds)
+    assert user.check_password('testPass1')
+    assert user.password_changed_at == changed_at
+
+
 @pytest.mark.unit
 def test_user_auth_token_pass(app, mocker):
     user1 = User()
@@ -58,6 +78,137 @@ def test_user_auth_token_pass(app, mocker):
     assert User.verify_auth_token(token)
 
 
+@pytest.mark.unit
+def test_user_auth_token_cached(app, mocker):
+    user1 = User()
+    user1.id = 1
+    user1.username = 'user1'
+    token = user1.generate_auth_token()
+
+    # mock db query
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .get.return_value = user1
+
+    snapshot = User.verify_auth_token(token)
+    assert snapshot.id == 1
+    assert snapshot.type == 'user'
+    assert snapshot.username == 'user1'
+
+    # second verification is served from the cache
+    assert User.verify_auth_token(token) is snapshot
+    assert query_mock.return_value.get.call_count == 1
+
+    # writing the account drops the cached token
+    token_cache.invalidate('user', 1)
+    assert User.verify_auth_token(token) is not snapshot
+    assert query_mock.return_value.get.call_count == 2
+
+
+@pytest.mark.unit
+def test_user_auth_token_claims(app, mocker):
+    role = Role()
+    role.name = 'USER'
+    role.password_reset_days = 30
+
+    user1 = User()
+    user1.id = 1
+    user1.username = 'user1'
+    user1.password_changed_at = datetime.now()
+    user1.version = 3
+    user1.roles = [role]
+    token = user1.generate_auth_token()
+
+    # mock db query: the account's version
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .scalar.return_value = 3
+
+    snapshot = User.verify_auth_token(token)
+    assert snapshot.id == 1
+    assert snapshot.type == 'user'
+    assert snapshot.roles == ('USER',)
+    assert snapshot.version == 3
+    assert not snapshot.is_password_expired()
+    assert query_mock.return_value.get.call_count == 0
+
+
+@pytest.mark.unit
+def test_user_auth_token_claims_stale(app, mocker):
+    user1 = User()
+    user1.id = 1
+    user1.username = 'user1'
+    user1.version = 3
+    token = user1.generate_auth_token()
+
+    # account has since been written by this process
+    token_cache.invalidate('user', 1, 4)
+
+    # mock db query
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .get.return_value = user1
+
+    assert User.verify_auth_token(token)
+    assert query_mock.return_value.get.call_count == 1
+
+
+@pytest.mark.unit
+def test_user_auth_token_claims_stale_elsewhere(app, mocker):
+    user1 = User()
+    user1.id = 1
+    user1.username = 'user1'
+    user1.version = 3
+    token = user1.generate_auth_token()
+
+    # account has since been written by another process or deployment
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .scalar.return_value = 4
+    query_mock.return_value \
+        .get.return_value = user1
+
+    assert User.verify_auth_token(token)
+    assert query_mock.return_value.get.call_count == 1
+
+    # account has since been deleted, seen once the cached token expired
+    token_cache.cache.clear()
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .scalar.return_value = None
+    query_mock.return_value \
+        .get.return_value = None
+
+    assert User.verify_auth_token(token) is None
+
+
+@pytest.mark.unit
+def test_user_auth_token_claims_roles_changed(app, mocker):
+    user1 = User()
+    user1.id = 1
+    user1.username = 'user1'
+    user1.version = 3
+    token = user1.generate_auth_token()
+
+    # a role policy has since been changed on another host
+    role_registry.generation.return_value = 'gen2'
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .scalar.return_value = 3
+    query_mock.return_value \
+        .get.return_value = user1
+
+    assert User.verify_auth_token(token)
+    assert query_mock.return_value.get.call_count == 1
+
+
 @pytest.mark.unit
 def test_user_auth_token_fail(app):
     assert not User.verify_auth_token('badtoken')
@@ -3,14 +3,15 @@ import re
 import base64
 
 import pytest
-from werkzeug.exceptions import NotFound, Unauthorized
+from werkzeug.exceptions import BadRequest, NotFound, Unauthorized
 from sqlalchemy.orm.exc import NoResultFound
 
 from fixtures import Fixtures
 from app import create_app
 from config import Config
+from init_dep import db
 from modules.users.routes_admin import get_users, post_user, get_user, \
-    put_user, delete_user
+    put_user, delete_user, post_users_bulk, put_users_bulk, delete_users_bulk
 from modules.administrators.model import Administrator
 from modules.users.model import User
 from modules.roles.model import Role
@@ -82,6 +83,51 @@ def test_get_users(app, mocker):
     assert result[0].json['total'] == expected_total
 
 
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_get_users_fields(app, mocker):
+    expected_status = 200
+    expected_length = 2
+    expected_json = {
+        'id': None,
+        'roles': [],
+        'username': None
+    }
+
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .filter.return_value \
+        .order_by.return_value \
+        .options.return_value \
+        .limit.return_value \
+        .offset.return_value \
+        .__iter__.return_value = [User()] * expected_length
+    query_mock.return_value \
+        .filter.return_value \
+        .order_by.return_value \
+        .options.return_value \
+        .count.return_value = expected_length
+
+    with app.test_request_context('/users?fields=id,username,roles'):
+        result = get_users()
+
+    assert result[1] == expected_status
+    assert len(result[0].json['users']) == expected_length
+    assert result[0].json['users'][0] == expected_json
+    query_mock.return_value.filter.return_value.order_by.return_value \
+        .options.assert_called_once()
+
+
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_get_users_fields_unknown(app, mocker):
+    mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+
+    with app.test_request_context('/users?fields=id,foo'):
+        with pytest.raises(BadRequest):
+            get_users()
+
+
 @pytest.mark.unit
 @pytest.mark.admin_api
 def test_get_users_limit_10_page_2_of_3(app, mocker):
@@ -1135,6 +1181,150 @@ def test_post_user_type_fail(app, mocker):
     assert result[0].json == expected_json
 
 
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_post_users_bulk(app, mocker):
+    expected_status = 200
+    expected_error = {'username': ['Value must be unique.']}
+
+    request_mock = mocker.patch('modules.users.routes_admin.request')
+    request_mock.json = {'users': [
+        {
+            'email': 'user%d@test.com' % i,
+            'is_verified': False,
+            'roles': [1],
+            'status': User.STATUS_ENABLED,
+            'username': 'user9',
+            'password': 'user9Pass'
+        } for i in range(2)]}
+
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+
+    # mock unique_many(), unique_email_many() validation
+    query_mock.return_value \
+        .with_entities.return_value \
+        .filter.return_value \
+        .__iter__.return_value = []
+
+    # mock exists_many() validation
+    role_1 = Role()
+    role_1.id = 1
+    role_1.name = 'USER'
+    query_mock.return_value \
+        .filter.return_value \
+        .__iter__.return_value = [role_1]
+
+    db_mock = mocker.patch('modules.users.routes_admin.db')
+
+    result = post_users_bulk()
+
+    assert result[1] == expected_status
+    results = result[0].json['results']
+    assert len(results) == 2
+    assert results[0]['index'] == 0
+    assert results[0]['status'] == 201
+    assert results[0]['user']['username'] == 'user9'
+    assert results[0]['user']['roles'] == [{'id': 1, 'name': 'USER'}]
+    assert results[1] == {'index': 1, 'status': 400, 'error': expected_error}
+    assert db_mock.session.add.call_count == 1
+    assert db_mock.session.commit.call_count == 1
+    assert query_mock.return_value.with_entities.call_count == 2
+
+
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_post_users_bulk_too_many(app, mocker, monkeypatch):
+    monkeypatch.setitem(app.config, 'BULK_MAX_ITEMS', 1)
+
+    request_mock = mocker.patch('modules.users.routes_admin.request')
+    request_mock.json = {'users': [{}, {}]}
+
+    result = post_users_bulk()
+
+    assert result[1] == 400
+    assert result[0].json == {
+        'error': {'users': ['Longer than maximum length 1.']}}
+
+
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_put_users_bulk_not_found(app, mocker):
+    request_mock = mocker.patch('modules.users.routes_admin.request')
+    request_mock.json = {'users': [{'id': 250}]}
+
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .filter.return_value \
+        .__iter__.return_value = []
+
+    mocker.patch('modules.users.routes_admin.db')
+
+    result = put_users_bulk()
+
+    assert result[1] == 200
+    assert result[0].json == {'results': [
+        {'index': 0, 'status': 404, 'error': 'Not found.'}]}
+
+
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_delete_users_bulk(app, mocker):
+    user_1 = User()
+    user_1.id = 1
+
+    request_mock = mocker.patch('modules.users.routes_admin.request')
+    request_mock.json = {'ids': [1, 2]}
+
+    query_mock = mocker.patch('flask_sqlalchemy._QueryProperty.__get__')
+    query_mock.return_value \
+        .filter.return_value \
+        .__iter__.return_value = [user_1]
+
+    db_mock = mocker.patch('modules.users.routes_admin.db')
+
+    result = delete_users_bulk()
+
+    assert result[1] == 200
+    assert result[0].json == {'results': [
+        {'index': 0, 'status': 204},
+        {'index': 1, 'status': 404, 'error': 'Not found.'}]}
+    db_mock.session.delete.assert_called_once_with(user_1)
+    assert db_mock.session.commit.call_count == 1
+
+
+@pytest.mark.unit
+@pytest.mark.admin_api
+def test_post_users_bulk_unique_query(app, mocker):
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+
+    request_mock = mocker.patch('modules.users.routes_admin.request')
+    request_mock.json = {'users': [
+        {'username': 'user1', 'email': 'user1@test.com', 'roles': []},
+        {'username': 'user2', 'email': 'user1@test.com', 'roles': []}]}
+
+    with app.app_context():
+
+        # runs the unique_many(), unique_email_many() queries for real,
+        # inside the route's loading profile
+        db.session.execute(
+            'CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR, '
+            'email_digest VARCHAR)')
+        db.session.execute(
+            "INSERT INTO users (id, username) VALUES (1, 'user1')")
+
+        result = post_users_bulk()
+
+        db.session.remove()
+
+    assert result[1] == 200
+    results = result[0].json['results']
+    assert [item['status'] for item in results] == [400, 400]
+    assert results[0]['error']['username'] == ['Value must be unique.']
+    assert 'email' not in results[0]['error']
+    assert 'username' not in results[1]['error']
+    assert results[1]['error']['email'] == ['Value must be unique.']
+
+
 @pytest.mark.unit
 @pytest.mark.admin_api
 def test_post_user_route_ok(app, mocker, client):
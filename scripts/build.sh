@@ -61,6 +61,10 @@ then
   sudo -u postgres psql api_db_dev -c "CREATE EXTENSION pgcrypto"
   sudo -u postgres psql api_db_test -c "CREATE EXTENSION pgcrypto"
 
+  # add trigram extension to dev and test databases
+  sudo -u postgres psql api_db_dev -c "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+  sudo -u postgres psql api_db_test -c "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+
   # load data fixtures by hijacking flask_testing module
   cd /vagrant
   ./scripts/load_data.sh
@@ -0,0 +1,29 @@
+#!/bin/bash
+
+# prep virtual environment
+export PIPENV_PIPFILE='/vagrant/application/Pipfile'
+
+# export env variables
+cd /vagrant/application
+set -o allexport
+source config/.env.public.local
+set +o allexport
+
+# UX
+HIGHLIGHT_COLOR="\e[1;36m" # cyan
+DEFAULT_COLOR="\e[0m"
+
+echo -e "\n${HIGHLIGHT_COLOR}Adding database extensions...${DEFAULT_COLOR}"
+
+# add trigram extension to dev and test databases
+sudo -u postgres psql api_db_dev -c "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+sudo -u postgres psql api_db_test -c "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+
+echo -e "\n${HIGHLIGHT_COLOR}Upgrading database...${DEFAULT_COLOR}"
+
+if ! pipenv run python -m src.main.scripts.db_upgrade; then
+    echo "Could not upgrade database."
+    exit
+fi
+
+echo "Complete."